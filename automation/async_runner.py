@@ -0,0 +1,184 @@
+import asyncio
+import contextlib
+import contextvars
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from deadlines import DeadlineExceeded, deadline, nearest_deadline
+
+_captured_logs: contextvars.ContextVar = contextvars.ContextVar("captured_logs", default=None)
+
+
+class TestStep:
+    """Um teste do plano e as dependências que ele declara
+
+    requires: recursos que o teste recebe como argumentos nomeados (ex.: "user_id").
+    provides: nome do recurso publicado com o valor de retorno do teste.
+    after: testes que precisam terminar antes, mesmo sem trocar recursos.
+    """
+
+    __test__ = False
+
+    def __init__(self, name: str, func: Callable, requires: Sequence[str] = (),
+                 provides: Optional[str] = None, after: Sequence[str] = ()):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.provides = provides
+        self.after = tuple(after)
+
+
+class AsyncTestRunner:
+    """Executa os testes de um plano em paralelo respeitando o grafo de dependências
+
+    Os registros de log_test de cada teste são guardados durante a execução e
+    repassados ao log_test original na ordem do plano, então o relatório final
+    não depende da ordem em que os testes terminaram.
+
+    `test_timeout` é o prazo de cada teste e `suite_budget` o da execução
+    inteira; ambos limitam os timeouts de socket das requisições, que são
+    interrompidas quando o prazo acaba. Testes que ainda não começaram quando
+    o orçamento da suíte acaba não são executados.
+    """
+
+    def __init__(self, tester, steps: List[TestStep], max_concurrency: int = 8,
+                 log_method: str = "log_test", capture_kwargs: Optional[Callable[[], Dict]] = None,
+                 test_timeout: Optional[float] = None, suite_budget: Optional[float] = None):
+        self.tester = tester
+        self.steps = steps
+        self.max_concurrency = max_concurrency
+        self.log_method = log_method
+        self.test_timeout = test_timeout
+        self.suite_budget = suite_budget
+        # Chamado no contexto do teste no momento do registro, para guardar dados
+        # que dependem desse contexto (ex.: tempos das requisições do teste)
+        self.capture_kwargs = capture_kwargs
+        self.resources: Dict[str, Any] = {}
+        self._validate()
+
+    def _validate(self):
+        names = {step.name for step in self.steps}
+        if len(names) != len(self.steps):
+            raise ValueError("Nomes de testes duplicados no plano")
+        providers = {step.provides: step.name for step in self.steps if step.provides}
+        for step in self.steps:
+            for dep in step.after:
+                if dep not in names:
+                    raise ValueError(f"{step.name} depende de teste desconhecido: {dep}")
+            for resource in step.requires:
+                if resource not in providers:
+                    raise ValueError(f"{step.name} requer recurso sem provedor: {resource}")
+
+        edges = {step.name: self._dependencies(step, providers) for step in self.steps}
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependência circular envolvendo {name}")
+            visiting.add(name)
+            for dep in edges[name]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in edges:
+            visit(name)
+        self._edges = edges
+
+    @staticmethod
+    def _dependencies(step: TestStep, providers: Dict[str, str]) -> List[str]:
+        deps = list(step.after)
+        deps.extend(providers[resource] for resource in step.requires)
+        return deps
+
+    def _run_captured(self, step: TestStep, kwargs: Dict[str, Any], logs: list):
+        _captured_logs.set(logs)
+        log = getattr(self.tester, self.log_method)
+        suite = nearest_deadline()
+        if suite is not None and suite.expired:
+            log(step.name, "Execução dentro do orçamento da suíte", "Não executado", "BUG",
+                f"Orçamento de {suite.seconds:g}s da suíte esgotado antes do teste começar")
+            return None
+        try:
+            with deadline(self.test_timeout, f"prazo do teste {step.name}"):
+                return step.func(**kwargs)
+        except DeadlineExceeded as e:
+            log(step.name, "Execução dentro do prazo", str(e), "BUG", "Teste interrompido por tempo limite")
+            return None
+        except Exception as e:
+            log(step.name, "Execução sem erros", f"{type(e).__name__}: {e}",
+                "BUG", "Erro inesperado durante a execução do teste")
+            return None
+
+    async def _run_step(self, step: TestStep, tasks: Dict[str, asyncio.Task],
+                        semaphore: asyncio.Semaphore, logs: list):
+        if self._edges[step.name]:
+            await asyncio.gather(*(tasks[dep] for dep in self._edges[step.name]))
+
+        kwargs = {resource: self.resources.get(resource) for resource in step.requires}
+        if any(value is None for value in kwargs.values()):
+            return None
+
+        async with semaphore:
+            result = await asyncio.to_thread(self._run_captured, step, kwargs, logs)
+
+        if step.provides:
+            self.resources[step.provides] = result
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        original_log = getattr(self.tester, self.log_method)
+
+        def capturing_log(*args, **kwargs):
+            logs = _captured_logs.get()
+            if logs is None:
+                return original_log(*args, **kwargs)
+            if self.capture_kwargs:
+                kwargs = {**self.capture_kwargs(), **kwargs}
+            logs.append((args, kwargs))
+
+        setattr(self.tester, self.log_method, capturing_log)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        step_logs = {step.name: [] for step in self.steps}
+        tasks: Dict[str, asyncio.Task] = {}
+        try:
+            # As tarefas herdam o contexto no momento da criação, com o prazo da suíte
+            with deadline(self.suite_budget, "orçamento da suíte"):
+                for step in self.steps:
+                    tasks[step.name] = asyncio.ensure_future(
+                        self._run_step(step, tasks, semaphore, step_logs[step.name]))
+            await asyncio.gather(*tasks.values())
+        finally:
+            delattr(self.tester, self.log_method)
+
+        for step in self.steps:
+            for args, kwargs in step_logs[step.name]:
+                original_log(*args, **kwargs)
+        return self.resources
+
+
+def run_plan(tester, steps: List[TestStep], max_concurrency: int = 8, log_method: str = "log_test",
+             capture_kwargs: Optional[Callable[[], Dict]] = None, test_timeout: Optional[float] = None,
+             suite_budget: Optional[float] = None) -> Dict[str, Any]:
+    runner = AsyncTestRunner(tester, steps, max_concurrency, log_method, capture_kwargs,
+                             test_timeout, suite_budget)
+    return asyncio.run(runner.run())
+
+
+@contextlib.contextmanager
+def capture_logs(tester, log_method: str = "log_test"):
+    """Intercepta os registros de um testador durante o bloco, sem repassá-los ao log original
+
+    Produz a lista de chamadas capturadas como tuplas (args, kwargs).
+    """
+    logs = []
+
+    def capturing_log(*args, **kwargs):
+        logs.append((args, kwargs))
+
+    setattr(tester, log_method, capturing_log)
+    try:
+        yield logs
+    finally:
+        delattr(tester, log_method)
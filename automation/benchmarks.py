@@ -0,0 +1,167 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import timeit
+import urllib.parse
+from datetime import datetime
+from http.client import parse_headers
+from typing import Callable, Dict, List, Optional, TextIO
+
+from request_timing import RequestTimings
+from simple_api_tester import SimpleAPITester
+from standin_server import StandinAPI, StandinServer
+from transport import HTTPTransport, endpoint_label
+
+DEFAULT_HISTORY = "benchmarks-history.jsonl"
+
+USER = {"name": "Benchmark", "email": "bench@email.com", "age": 30, "status": "active"}
+PARAMS = {"page": 2, "limit": 10, "status": "active"}
+RAW_HEADERS = (b"Content-Type: application/json; charset=utf-8\r\nContent-Length: 1433\r\n"
+               b"Date: Sun, 18 Oct 2026 06:30:00 GMT\r\nConnection: keep-alive\r\n"
+               b"Keep-Alive: timeout=72\r\n\r\n")
+
+
+def measure(func: Callable, min_time: float = 0.2, repeat: int = 5) -> Dict[str, float]:
+    """Tempo por chamada em microssegundos: mediana e mínimo de `repeat` rodadas de pelo menos `min_time` s"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    samples = [elapsed / number * 1e6 for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {"median_us": statistics.median(samples), "min_us": min(samples), "calls": number * repeat}
+
+
+def build_cases(api: StandinAPI, memory_tester: SimpleAPITester, loopback_tester: SimpleAPITester,
+                sink: TextIO) -> Dict[str, Callable]:
+    """Cada etapa que make_request e log_test executam por requisição, isolada
+
+    Os casos que registram tempos também chamam drain(), como o log_test de cada
+    teste faz; sem isso as medições pendentes cresceriam a cada chamada. A saída
+    do log_test vai para `sink`, aberto (e fechado) por quem chama.
+    """
+    users_body = memory_tester.transport.request("GET", f"{memory_tester.base_url}/users").body
+    users_text = users_body.decode("utf-8")
+    headers_message = parse_headers(io.BytesIO(RAW_HEADERS))
+    timings = {"dns": 0.0, "connect": 0.0, "tls": 0.0, "ttfb": 0.25, "body": 0.02, "json": 0.03}
+    scratch = RequestTimings()
+
+    def timings_record():
+        scratch.record("GET /users", 200, timings)
+        scratch.drain()
+        scratch.reset()
+
+    def make_request(tester: SimpleAPITester, method: str, **kwargs):
+        def call():
+            tester.make_request(method, "/users" if method == "GET" else "/users/1", **kwargs)
+            tester.timings.drain()
+        return call
+
+    def log_test():
+        with contextlib.redirect_stdout(sink):
+            memory_tester.log_test("Benchmark", "200 OK", "200", "PASS")
+
+    return {
+        "url_urlencode": lambda: f"{memory_tester.base_url}/users?{urllib.parse.urlencode(PARAMS)}",
+        "json_dumps_body": lambda: json.dumps(USER).encode("utf-8"),
+        "headers_dict": lambda: dict(headers_message),
+        "body_decode_json_loads": lambda: json.loads(users_body.decode("utf-8")),
+        "json_loads_only": lambda: json.loads(users_text),
+        "endpoint_label": lambda: endpoint_label("GET", "/users/42"),
+        "timings_record": timings_record,
+        "log_test": log_test,
+        # Custo só do servidor, para descontar das medições de make_request abaixo
+        "standin_handle": lambda: api.handle("GET", "/users?page=2&limit=10&status=active"),
+        "make_request_memory": make_request(memory_tester, "GET", params=PARAMS),
+        "make_request_memory_put": make_request(memory_tester, "PUT", data=USER),
+        "make_request_loopback": make_request(loopback_tester, "GET", params=PARAMS),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def last_run(history_path: str) -> Optional[Dict]:
+    if not os.path.exists(history_path):
+        return None
+    last = None
+    with open(history_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def run_benchmarks(min_time: float = 0.2, repeat: int = 5, only: List[str] = None) -> Dict:
+    api = StandinAPI(seed=0, time_scale=0)
+    memory_tester = SimpleAPITester(api.mount("benchmark"), HTTPTransport())
+    # Sem guardar resultados: o log_test medido não deve crescer a memória a cada chamada
+    memory_tester.keep_results = False
+
+    with StandinServer(StandinAPI(seed=0, time_scale=0)) as server, open(os.devnull, "w", encoding="utf-8") as sink:
+        loopback_tester = SimpleAPITester(server.base_url, HTTPTransport(pool_size=1))
+        cases = build_cases(api, memory_tester, loopback_tester, sink)
+        results = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Aquece conexões e caches antes de medir
+            for name, case in cases.items():
+                if not only or name in only:
+                    case()
+        for name, case in cases.items():
+            if only and name not in only:
+                continue
+            results[name] = measure(case, min_time, repeat)
+        loopback_tester.transport.close()
+    api.unmount("benchmark")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+def print_benchmarks(run: Dict, previous: Dict = None):
+    print("=" * 50)
+    print(f"⏱️ Custo por chamada (µs) - revisão {run['revision'] or '?'} / Python {run['python']}")
+    print(f"  {'etapa':<26} {'mediana':>9} {'mínimo':>9} {'chamadas/s':>11} {'vs anterior':>12}")
+    previous_results = previous["results"] if previous else {}
+    for name, result in run["results"].items():
+        change = ""
+        if name in previous_results:
+            before = previous_results[name]["median_us"]
+            change = f"{(result['median_us'] - before) / before:+.1%}"
+        print(f"  {name:<26} {result['median_us']:>9.2f} {result['min_us']:>9.2f} "
+              f"{1e6 / result['median_us']:>11.0f} {change:>12}")
+
+
+def append_history(run: Dict, history_path: str):
+    with open(history_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run, ensure_ascii=False) + "\n")
+    print(f"💾 Resultado adicionado ao histórico {history_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do custo do próprio testador por requisição")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="arquivo JSONL com o histórico das medições")
+    parser.add_argument("--no-history", action="store_true", help="não grava esta medição no histórico")
+    parser.add_argument("--min-time", type=float, default=0.2, help="duração mínima de cada rodada (s)")
+    parser.add_argument("--repeat", type=int, default=5, help="rodadas por etapa")
+    parser.add_argument("--only", help="etapas separadas por vírgula")
+    args = parser.parse_args()
+
+    previous = last_run(args.history)
+    run = run_benchmarks(args.min_time, args.repeat, args.only.split(",") if args.only else None)
+    print_benchmarks(run, previous)
+    if not args.no_history:
+        append_history(run, args.history)
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from transport import Response, StreamingResponse, buffered_stream, header_value
+
+MAGIC = b"CASSETTE1\n"
+FOOTER_MAGIC = b"CASIDX1\n"
+_LENGTH = struct.Struct(">I")
+_FOOTER = struct.Struct(">Q")
+# Cabeçalhos da requisição que mudam a resposta: os condicionais (o ConditionalTransport fica
+# acima da fita, então um GET revalidado é outra requisição e recebe o 304 gravado) e o Accept.
+# Accept-Encoding fica de fora porque a fita guarda o corpo já decodificado; Content-Type é
+# sempre JSON e os demais (User-Agent, Connection...) não alteram o corpo.
+KEY_HEADERS = ("Accept", "If-None-Match", "If-Modified-Since")
+# Valem para o corpo como veio na rede, não para o corpo decodificado que é gravado
+_WIRE_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class CassetteMiss(LookupError):
+    """Requisição sem resposta gravada na fita"""
+
+
+def request_key(method: str, url: str, body: Optional[bytes] = None, headers: Dict[str, str] = None) -> str:
+    """Hash da requisição: método, caminho com query, KEY_HEADERS presentes e corpo
+    (sem o host, para a fita valer em qualquer base_url)"""
+    parts = urllib.parse.urlsplit(url)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    digest = hashlib.sha256(f"{method.upper()} {target}\n".encode("utf-8"))
+    for name in KEY_HEADERS:
+        value = header_value(headers, name)
+        if value is not None:
+            digest.update(f"{name.lower()}: {value}\n".encode("utf-8"))
+    digest.update(body or b"")
+    return digest.hexdigest()
+
+
+def stored_headers(headers: Dict[str, str], body: bytes) -> Dict[str, str]:
+    """Cabeçalhos da resposta como ela é gravada: sem Content-Encoding e com o
+    Content-Length do corpo decodificado"""
+    stored = {name: value for name, value in (headers or {}).items() if name.lower() not in _WIRE_HEADERS}
+    if header_value(headers, "Content-Length") is not None or header_value(headers, "Content-Encoding"):
+        stored["Content-Length"] = str(len(body))
+    return stored
+
+
+class CassetteWriter:
+    """Grava as trocas em sequência e, no close(), um índice chave -> posições no fim do arquivo
+
+    Cada registro é [tamanho][JSON com requisição e metadados da resposta][tamanho][corpo].
+    Se a gravação for interrompida antes do índice, a leitura reconstrói o índice
+    percorrendo os registros.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._index: Dict[str, List[int]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, method: str, url: str, body: Optional[bytes], response: Response,
+               headers: Dict[str, str] = None):
+        key = request_key(method, url, body, headers)
+        meta = json.dumps({
+            "key": key,
+            "method": method.upper(),
+            "url": url,
+            "request_body": (body or b"").decode("utf-8", errors="replace"),
+            "status": response.status,
+            "reason": response.reason,
+            "headers": stored_headers(response.headers, response.body),
+            "timings": response.timings,
+            "wire_bytes": response.wire_bytes
+        }, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._index[key].append(self._file.tell())
+            self._file.write(_LENGTH.pack(len(meta)) + meta + _LENGTH.pack(len(response.body)))
+            self._file.write(response.body)
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            index_offset = self._file.tell()
+            self._file.write(json.dumps(self._index).encode("utf-8"))
+            self._file.write(_FOOTER.pack(index_offset) + FOOTER_MAGIC)
+            self._file.close()
+
+
+class Cassette:
+    """Leitura de uma fita mapeada em memória; abrir não lê os corpos, só o índice
+
+    Quando a mesma requisição foi gravada mais de uma vez (ex.: respostas
+    aleatórias do servidor), as respostas são devolvidas na ordem gravada e
+    depois recomeçam do início.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} não é uma fita gravada")
+        self._index = self._read_index()
+        self._replays: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _read_index(self) -> Dict[str, List[int]]:
+        size = len(self._map)
+        footer_size = _FOOTER.size + len(FOOTER_MAGIC)
+        if size >= len(MAGIC) + footer_size and self._map[size - len(FOOTER_MAGIC):] == FOOTER_MAGIC:
+            (index_offset,) = _FOOTER.unpack_from(self._map, size - footer_size)
+            return json.loads(self._map[index_offset:size - footer_size])
+        return self._scan()
+
+    def _scan(self) -> Dict[str, List[int]]:
+        index: Dict[str, List[int]] = defaultdict(list)
+        for offset, meta, _ in self._records(len(MAGIC)):
+            index[meta["key"]].append(offset)
+        return index
+
+    def _records(self, offset: int):
+        size = len(self._map)
+        while offset + _LENGTH.size <= size:
+            try:
+                meta, body_start, body_end = self._entry(offset)
+            except (struct.error, ValueError):
+                return
+            if body_end > size:
+                return
+            yield offset, meta, (body_start, body_end)
+            offset = body_end
+
+    def _entry(self, offset: int):
+        (meta_size,) = _LENGTH.unpack_from(self._map, offset)
+        meta_end = offset + _LENGTH.size + meta_size
+        meta = json.loads(self._map[offset + _LENGTH.size:meta_end])
+        (body_size,) = _LENGTH.unpack_from(self._map, meta_end)
+        body_start = meta_end + _LENGTH.size
+        return meta, body_start, body_start + body_size
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self._index.values())
+
+    def lookup(self, method: str, url: str, body: Optional[bytes] = None, headers: Dict[str, str] = None) -> Response:
+        key = request_key(method, url, body, headers)
+        offsets = self._index.get(key)
+        if not offsets:
+            raise CassetteMiss(f"Nenhuma resposta gravada para {method.upper()} {url}")
+        with self._lock:
+            position = self._replays[key]
+            self._replays[key] += 1
+        meta, body_start, body_end = self._entry(offsets[position % len(offsets)])
+        return Response(meta["status"], meta["reason"], meta["headers"], self._map[body_start:body_end],
+                        wire_bytes=meta.get("wire_bytes"))
+
+    def exchanges(self):
+        """Todas as trocas gravadas, na ordem em que aconteceram"""
+        for _, meta, (body_start, body_end) in self._records(len(MAGIC)):
+            yield dict(meta, body=self._map[body_start:body_end])
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class CassetteTransport:
+    """Envolve um transporte: em "record" grava cada troca, em "replay" responde só pela fita"""
+
+    def __init__(self, path: str, mode: str = "replay", transport=None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Modo de fita desconhecido: {mode}")
+        if mode == "record" and transport is None:
+            raise ValueError("O modo record precisa de um transporte real")
+        self.path = path
+        self.mode = mode
+        self.transport = transport
+        self._writer = CassetteWriter(path) if mode == "record" else None
+        self._cassette = Cassette(path) if mode == "replay" else None
+
+    def request(self, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None,
+                timeout: float = None) -> Response:
+        if self._cassette is not None:
+            start = time.perf_counter()
+            response = self._cassette.lookup(method, url, body, headers)
+            response.timings = {"dns": 0.0, "connect": 0.0, "tls": 0.0,
+                                "ttfb": (time.perf_counter() - start) * 1000, "body": 0.0}
+            return response
+        response = self.transport.request(method, url, body=body, headers=headers, timeout=timeout)
+        self._writer.record(method, url, body, response, headers)
+        return response
+
+    def stream(self, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None,
+               timeout: float = None) -> StreamingResponse:
+        """A fita guarda respostas inteiras: no replay e na gravação o corpo é lido todo antes do stream"""
+        return buffered_stream(self.request(method, url, body=body, headers=headers, timeout=timeout))
+
+    def close(self):
+        if self._writer:
+            self._writer.close()
+            print(f"📼 Fita gravada em {self.path} ({os.path.getsize(self.path)} bytes)")
+        if self._cassette is not None:
+            self._cassette.close()
@@ -0,0 +1,356 @@
+import argparse
+import json
+
+from cassette import CassetteTransport
+from delay_sweep import DEFAULT_DELAYS, DelaySweep, print_delay_sweep_report
+from flakiness import FlakinessEstimator, print_flakiness_report
+from latency_slo import check_latency_slos, load_slos
+from metrics import MetricsServer, TesterMetrics, write_metrics
+from load_generator import (LoadGenerator, OpenLoopGenerator, parse_rates, print_load_report,
+                            print_open_loop_report)
+from payload_fuzzer import PayloadFuzzer, log_fuzz_results, print_fuzz_report
+from postman_plan import (DEFAULT_COLLECTION, PlanExecutor, load_plan, log_plan_results, parse_expectation,
+                          print_plan_report)
+from conditional import ConditionalTransport, print_revalidation_report
+from response_cache import CachingTransport, ResponseCache, print_cache_stats
+from run_history import RunHistory
+from retry_policy import FailureClassifier, Hedger, RetryBudget
+from soak import SoakTest, print_soak_report
+from standin_server import StandinAPI, StandinServer
+from transport import ACCEPT_ENCODING, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, HTTPTransport
+
+DEFAULT_BASE_URL = "https://cakto-qa-eval.launchify.com.br"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Testes automatizados da API de usuários")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="URL base da API")
+    parser.add_argument("--stream-results", metavar="ARQUIVO",
+                        help="grava cada resultado em JSONL durante a execução (sem acumular em memória)")
+    parser.add_argument("--rotate-mb", type=float, help="rotaciona o arquivo JSONL ao atingir este tamanho")
+    parser.add_argument("--cache", action="store_true",
+                        help="reaproveita respostas de GET idênticos (invalidadas por escritas no recurso)")
+    parser.add_argument("--cache-ttl", type=float, default=30.0, help="validade de uma resposta no cache (s)")
+    parser.add_argument("--cache-size", type=int, default=256, help="máximo de respostas no cache (LRU)")
+    parser.add_argument("--no-compression", action="store_true",
+                        help=f"não envia Accept-Encoding (padrão: {ACCEPT_ENCODING})")
+    parser.add_argument("--no-revalidate", action="store_true",
+                        help="não revalida GETs repetidos com If-None-Match / If-Modified-Since")
+    parser.add_argument("--estimate-savings", action="store_true",
+                        help="estima quanto compressão e ETags economizariam nas respostas que vieram sem elas")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="FITA", help="grava cada requisição e resposta numa fita")
+    cassette.add_argument("--replay", metavar="FITA", help="responde pela fita gravada, sem acessar a rede")
+    parser.add_argument("--mode", choices=["functional", "load", "open-loop", "flaky", "delay-sweep", "soak",
+                                           "collection", "fuzz"],
+                        default="functional",
+                        help="functional: testes funcionais; load: carga em malha fechada; "
+                             "open-loop: taxa de chegada constante em degraus; "
+                             "flaky: estimativa sequencial da taxa de cada resultado; "
+                             "delay-sweep: vários ?delay= simultâneos em /slow-endpoint; "
+                             "soak: /memory-leak por muito tempo, com detecção de tendência; "
+                             "collection: itens da coleção do Postman, em paralelo; "
+                             "fuzz: payloads gerados para POST/PUT /users, com redução das falhas")
+
+    limits = parser.add_argument_group("prazos")
+    limits.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="timeout de socket de cada requisição (s)")
+    limits.add_argument("--test-timeout", type=float, help="prazo de cada teste funcional (s)")
+    limits.add_argument("--suite-budget", type=float, help="prazo da execução funcional inteira (s)")
+
+    slo = parser.add_argument_group("orçamentos de latência")
+    slo.add_argument("--slo", metavar="ARQUIVO",
+                     help="JSON com p50/p95/p99/max em ms por endpoint (padrão: latency_slo.DEFAULT_SLOS)")
+    slo.add_argument("--no-slo", action="store_true", help="não confere os orçamentos de latência no fim")
+
+    metrics = parser.add_argument_group("métricas (OpenMetrics/Prometheus)")
+    metrics.add_argument("--metrics-file", metavar="ARQUIVO",
+                         help="grava contadores e histogramas no formato OpenMetrics ao terminar")
+    metrics.add_argument("--metrics-port", type=int,
+                         help="expõe /metrics nesta porta local durante a execução (0 = porta livre)")
+
+    parser.add_argument("--history", metavar="ARQUIVO",
+                        help="acrescenta a execução a um histórico SQLite (consultas: run_history.py)")
+
+    retries = parser.add_argument_group("repetições dos testes funcionais")
+    retries.add_argument("--retry-budget", type=int, default=0,
+                         help="repetições disponíveis na execução para classificar falhas como "
+                              "determinísticas, intermitentes ou transitórias (0 desliga)")
+    retries.add_argument("--retry-attempts", type=int, default=5,
+                         help="tentativas por falha, contando a original")
+
+    standin = parser.add_argument_group("API local")
+    standin.add_argument("--standin", choices=["memory", "loopback"],
+                         help="testa uma réplica local da API (memory: no próprio processo; "
+                              "loopback: servidor HTTP em 127.0.0.1) em vez de --base-url")
+    standin.add_argument("--standin-seed", type=int, help="semente das respostas aleatórias da réplica")
+    standin.add_argument("--standin-time-scale", type=float, default=1.0,
+                         help="fator aplicado ao atraso de /slow-endpoint na réplica")
+
+    load = parser.add_argument_group("modo de carga")
+    load.add_argument("--vus", type=int, default=10, help="usuários virtuais simultâneos")
+    load.add_argument("--duration", type=float, default=30.0, help="duração em segundos")
+    load.add_argument("--iterations", type=int, help="cenários por usuário virtual")
+    load.add_argument("--seed", type=int, help="semente do sorteio de cenários")
+    load.add_argument("--report", help="arquivo JSON para salvar o relatório de carga")
+    load.add_argument("--hedge", action="store_true",
+                      help="manda uma cópia dos GETs lentos e mede a cauda com e sem hedge")
+    load.add_argument("--hedge-after", type=float,
+                      help="atraso da cópia em ms (padrão: p95 das latências recentes)")
+    load.add_argument("--hedge-budget", type=float, default=0.1,
+                      help="fração máxima de requisições extras gastas com cópias")
+
+    open_loop = parser.add_argument_group("modo open-loop")
+    open_loop.add_argument("--rates", default="50,100,200,500",
+                           help="taxas alvo em req/s, separadas por vírgula")
+    open_loop.add_argument("--step-duration", type=float, default=10.0, help="duração de cada degrau (s)")
+    open_loop.add_argument("--endpoint", default="/users", help="endpoint GET alvo")
+    open_loop.add_argument("--latency-limit", type=float, default=500.0, help="limite de latência (ms)")
+    open_loop.add_argument("--limit-percentile", type=float, default=99.0, help="percentil comparado ao limite")
+    open_loop.add_argument("--max-in-flight", type=int, default=200, help="requisições simultâneas no cliente")
+
+    flaky = parser.add_argument_group("modo flaky")
+    flaky.add_argument("--checks", help="métodos de teste separados por vírgula (padrão: todos os rápidos)")
+    flaky.add_argument("--confidence", type=float, default=0.95, help="confiança das decisões do SPRT")
+    flaky.add_argument("--precision", type=float, default=0.10,
+                       help="meia largura máxima do IC da taxa de BUG (0: para na decisão do SPRT)")
+    flaky.add_argument("--max-samples", type=int, default=200, help="limite de execuções por verificação")
+
+    soak = parser.add_argument_group("modo soak (usa também --duration, --confidence e --report)")
+    soak.add_argument("--soak-rate", type=float, default=1.0, help="chamadas a /memory-leak por segundo")
+    soak.add_argument("--health-interval", type=float, default=5.0, help="segundos entre amostras de /health")
+    soak.add_argument("--mix-rate", type=float, default=0.0,
+                      help="cenários por segundo do mix de tráfego realista (0 desliga)")
+    soak.add_argument("--window", type=float, default=60.0, help="janela da série temporal (s)")
+    soak.add_argument("--min-increase", type=float, default=0.10,
+                      help="aumento relativo da latência que caracteriza degradação")
+
+    collection = parser.add_argument_group("modo collection (usa também --vus, --iterations, --seed e --report)")
+    collection.add_argument("--collection", default=DEFAULT_COLLECTION, help="coleção do Postman (v2.1)")
+    collection.add_argument("--collection-include", metavar="REGEX", help="só os itens cujo pasta/nome casa")
+    collection.add_argument("--collection-exclude", metavar="REGEX",
+                            help="pula os itens cujo pasta/nome casa (ex.: 'Slow Endpoint')")
+    collection.add_argument("--collection-unordered", action="store_true",
+                            help="envia cada requisição como tarefa independente, sem a ordem da coleção")
+    collection.add_argument("--expect-status", metavar="REGEX=CÓDIGOS", action="append", type=parse_expectation,
+                            help="status esperado dos itens sem script de teste cujo pasta/nome casa "
+                                 "(ex.: 'Consistency Test=404'); repetível, substitui os padrões")
+
+    fuzz = parser.add_argument_group("modo fuzz (usa também --vus, --seed e --report)")
+    fuzz.add_argument("--fuzz-cases", type=int, default=2000, help="quantidade de payloads gerados")
+    fuzz.add_argument("--fuzz-methods", default="POST,PUT", help="métodos testados, separados por vírgula")
+    fuzz.add_argument("--shrink-attempts", type=int, default=3,
+                      help="envios de cada candidato na redução (a validação da API é aleatória)")
+
+    sweep = parser.add_argument_group("modo delay-sweep")
+    sweep.add_argument("--delays", default=",".join(str(d) for d in DEFAULT_DELAYS),
+                       help="atrasos em ms, separados por vírgula")
+    sweep.add_argument("--repeats", type=int, default=1, help="requisições por atraso")
+    return parser
+
+
+def check_slos(tester, sketches=None):
+    if tester.latency_slos:
+        print("=" * 50)
+        check_latency_slos(tester.log_test, tester.timings.sketches() if sketches is None else sketches,
+                           tester.latency_slos)
+
+
+def run_load(tester, args, metrics=None):
+    tester.timings.keep_pending = False
+    print(f"🏋️ Gerando carga com {args.vus} usuários virtuais...")
+    hedger = None
+    if args.hedge:
+        hedger = Hedger(RetryBudget(10, ratio=args.hedge_budget), delay_ms=args.hedge_after,
+                        max_workers=args.vus * 2)
+        if metrics:
+            metrics.hedger = hedger
+    generator = LoadGenerator(tester, virtual_users=args.vus, duration=args.duration,
+                              iterations=args.iterations, seed=args.seed, hedger=hedger)
+    report = generator.run()
+    print_load_report(report)
+    check_slos(tester)
+    save_report(report, args.report)
+    return report
+
+
+def run_open_loop(tester, args):
+    tester.timings.keep_pending = False
+    generator = OpenLoopGenerator(tester, args.rates, endpoint=args.endpoint, step_duration=args.step_duration,
+                                  latency_limit_ms=args.latency_limit, limit_percentile=args.limit_percentile,
+                                  max_in_flight=args.max_in_flight)
+    report = generator.run()
+    print_open_loop_report(report)
+    check_slos(tester)
+    save_report(report, args.report)
+    return report
+
+
+def run_flaky(tester, args):
+    tester.timings.keep_pending = False
+    error = 1 - args.confidence
+    estimator = FlakinessEstimator(tester, alpha=error, beta=error, max_samples=args.max_samples,
+                                   confidence=args.confidence, precision=args.precision or None,
+                                   cleanup=lambda user_id: tester.make_request("DELETE", f"/users/{user_id}"))
+    checks = [name.strip() for name in args.checks.split(",")] if args.checks else None
+    reports = estimator.run(checks)
+    print_flakiness_report(reports, args.confidence)
+    save_report(reports, args.report)
+    return reports
+
+
+def start_standin(args) -> str:
+    api = StandinAPI(seed=args.standin_seed, time_scale=args.standin_time_scale)
+    base_url = api.mount() if args.standin == "memory" else StandinServer(api).start()
+    print(f"🧪 Usando a API local em {base_url}")
+    return base_url
+
+
+def run_delay_sweep(tester, args):
+    delays = [int(delay) for delay in args.delays.split(",") if delay.strip()]
+    report = DelaySweep(tester, delays, repeats=args.repeats).run()
+    print_delay_sweep_report(report)
+    save_report(report, args.report)
+    return report
+
+
+def run_collection(tester, args):
+    expectations = dict(args.expect_status) if args.expect_status else None
+    plan = load_plan(args.collection, {"base_url": tester.base_url}, expectations).select(
+        args.collection_include, args.collection_exclude)
+    iterations = args.iterations or 1
+    print(f"📬 Executando {len(plan)} itens de {plan.name} ({iterations} iterações)...")
+    executor = PlanExecutor(tester.transport, plan, concurrency=args.vus, iterations=iterations,
+                            ordered=not args.collection_unordered, timeout=args.timeout, seed=args.seed)
+    report = executor.run()
+    print_plan_report(report)
+    log_plan_results(tester, report)
+    check_slos(tester, executor.sketches())
+    save_report(report, args.report)
+    tester.save_results()
+    return report
+
+
+def run_fuzz(tester, args):
+    tester.timings.keep_pending = False
+    methods = [method.strip() for method in args.fuzz_methods.split(",") if method.strip()]
+    print(f"🎲 Gerando {args.fuzz_cases} payloads para {', '.join(methods)} /users ({args.vus} em paralelo)...")
+    fuzzer = PayloadFuzzer(tester, cases=args.fuzz_cases, methods=methods, concurrency=args.vus, seed=args.seed,
+                           shrink_attempts=args.shrink_attempts, timeout=args.timeout)
+    report = fuzzer.run()
+    print_fuzz_report(report)
+    log_fuzz_results(tester, report)
+    check_slos(tester)
+    save_report(report, args.report)
+    tester.save_results()
+    return report
+
+
+def run_soak(tester, args):
+    tester.timings.keep_pending = False
+    print(f"🕰️ Soak de {args.duration:g}s em /memory-leak a {args.soak_rate:g} req/s...")
+    soak = SoakTest(tester, duration=args.duration, rate=args.soak_rate, health_interval=args.health_interval,
+                    mix_rate=args.mix_rate, window=args.window, confidence=args.confidence,
+                    min_increase=args.min_increase, seed=args.seed)
+    report = soak.run()
+    print_soak_report(report)
+    check_slos(tester)
+    save_report(report, args.report)
+    return report
+
+
+def save_report(report, path):
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Relatório salvo em {path}")
+
+
+def build_transport(args, pool_size: int = None):
+    transport = HTTPTransport(pool_size=pool_size or DEFAULT_POOL_SIZE, timeout=args.timeout,
+                              accept_encoding=None if args.no_compression else ACCEPT_ENCODING)
+    if args.record:
+        transport = CassetteTransport(args.record, "record", transport)
+    elif args.replay:
+        transport = CassetteTransport(args.replay, "replay")
+    if not args.no_revalidate or args.estimate_savings:
+        transport = ConditionalTransport(transport, revalidate=not args.no_revalidate,
+                                         estimate_savings=args.estimate_savings)
+    if args.cache:
+        transport = CachingTransport(transport, ResponseCache(args.cache_size, args.cache_ttl))
+    return transport
+
+
+def main(tester_cls, argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.mode == "open-loop":
+        try:
+            args.rates = parse_rates(args.rates)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.standin:
+        args.base_url = start_standin(args)
+
+    transport = build_transport(args, {
+        "load": args.vus * 2 if args.hedge else args.vus,
+        "open-loop": args.max_in_flight,
+        "collection": args.vus,
+        "fuzz": args.vus,
+        "delay-sweep": len(args.delays.split(",")) * args.repeats + 1
+    }.get(args.mode))
+    tester = tester_cls(args.base_url, transport)
+    tester.latency_slos = None if args.no_slo else load_slos(args.slo) if args.slo else tester.latency_slos
+    metrics = TesterMetrics(tester)
+    server = None
+    if args.metrics_port is not None:
+        server = MetricsServer(metrics, port=args.metrics_port)
+        server.start()
+    try:
+        result = run_mode(tester, args, metrics)
+        if args.history:
+            # Só execuções que chegaram ao fim: uma interrompida marcaria falhas que não existiram
+            with RunHistory(args.history) as history:
+                history.record_tester(tester, args.mode)
+        return result
+    finally:
+        if server:
+            server.stop()
+        # No modo funcional, run_all_tests já grava o arquivo
+        if args.metrics_file and args.mode != "functional":
+            write_metrics(metrics, args.metrics_file)
+        layer = transport
+        while layer is not None:
+            if isinstance(layer, CachingTransport):
+                print_cache_stats(layer.cache.stats())
+            elif isinstance(layer, ConditionalTransport):
+                print_revalidation_report(layer.stats())
+            layer = getattr(layer, "transport", None)
+        transport.close()
+
+
+def run_mode(tester, args, metrics=None):
+    if args.mode == "load":
+        return run_load(tester, args, metrics)
+    if args.mode == "open-loop":
+        return run_open_loop(tester, args)
+    if args.mode == "flaky":
+        return run_flaky(tester, args)
+    if args.mode == "delay-sweep":
+        return run_delay_sweep(tester, args)
+    if args.mode == "soak":
+        return run_soak(tester, args)
+    if args.mode == "collection":
+        return run_collection(tester, args)
+    if args.mode == "fuzz":
+        return run_fuzz(tester, args)
+
+    if args.stream_results:
+        max_bytes = int(args.rotate_mb * 1024 * 1024) if args.rotate_mb else None
+        tester.stream_results(args.stream_results, max_bytes=max_bytes)
+    if args.retry_budget > 0:
+        tester.retry_classifier = FailureClassifier(RetryBudget(args.retry_budget),
+                                                    max_attempts=args.retry_attempts, seed=args.seed)
+    tester.metrics_path = args.metrics_file
+    tester.run_all_tests(test_timeout=args.test_timeout, suite_budget=args.suite_budget)
+    tester.save_results()
@@ -0,0 +1,150 @@
+import hashlib
+import math
+import threading
+import urllib.parse
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Dict
+
+from response_cache import WRITE_METHODS, ResponseCache, cache_key
+from transport import Response, StreamingResponse, endpoint_label, header_value, open_stream
+
+# Abaixo disso servidores costumam não comprimir (o @fastify/compress usa 1024)
+MIN_COMPRESS_BYTES = 1024
+# Cabeçalho + rodapé do formato gzip, somados ao deflate estimado
+GZIP_OVERHEAD = 18
+
+
+class ConditionalTransport:
+    """Revalida GETs repetidos com If-None-Match / If-Modified-Since
+
+    Respostas 2xx com ETag ou Last-Modified ficam guardadas (LRU); o próximo GET
+    da mesma URL vai com os validadores e, se o servidor responder 304, devolve
+    o corpo guardado como se fosse a resposta completa (Response.revalidated).
+    Escritas no recurso descartam o que estiver guardado para ele.
+
+    Com `estimate_savings`, também estima por endpoint o que o servidor
+    economizaria se comprimisse (gzip dos corpos que vieram sem compressão) e
+    se mandasse validadores (respostas sem ETag idênticas à anterior da mesma
+    URL, que poderiam ter sido um 304).
+    """
+
+    def __init__(self, transport, max_entries: int = 256, revalidate: bool = True,
+                 estimate_savings: bool = False):
+        self.transport = transport
+        self.revalidate = revalidate
+        self.store = ResponseCache(max_entries, ttl=math.inf)
+        self.estimate_savings = estimate_savings
+        self.max_entries = max_entries
+        self._digests: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, Dict[str, int]] = defaultdict(lambda: {
+            "requests": 0, "revalidated": 0, "saved_bytes": 0,
+            "uncompressed_bytes": 0, "gzip_estimate_bytes": 0,
+            "unchanged": 0, "unchanged_bytes": 0
+        })
+
+    def request(self, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None,
+                timeout: float = None) -> Response:
+        method = method.upper()
+        if method in WRITE_METHODS:
+            self.store.invalidate(url)
+        if method != "GET":
+            return self.transport.request(method, url, body=body, headers=headers, timeout=timeout)
+
+        stored = self.store.get(method, url)
+        if stored is not None:
+            headers = dict(headers or {})
+            etag = header_value(stored.headers, "ETag")
+            last_modified = header_value(stored.headers, "Last-Modified")
+            if etag and header_value(headers, "If-None-Match") is None:
+                headers["If-None-Match"] = etag
+            if last_modified and header_value(headers, "If-Modified-Since") is None:
+                headers["If-Modified-Since"] = last_modified
+
+        response = self.transport.request(method, url, body=body, headers=headers, timeout=timeout)
+        label = endpoint_label(method, urllib.parse.urlsplit(url).path)
+
+        if stored is not None and response.status == 304:
+            with self._lock:
+                counters = self.endpoints[label]
+                counters["requests"] += 1
+                counters["revalidated"] += 1
+                counters["saved_bytes"] += len(stored.body)
+            # Cabeçalhos do 304 (Date, ETag, Cache-Control) atualizam os guardados
+            merged = dict(stored.headers, **response.headers)
+            return Response(stored.status, stored.reason, merged, stored.body, response.timings,
+                            wire_bytes=response.wire_bytes, revalidated=True)
+
+        with self._lock:
+            self.endpoints[label]["requests"] += 1
+        if 200 <= response.status < 300:
+            if self.revalidate and (header_value(response.headers, "ETag")
+                                    or header_value(response.headers, "Last-Modified")):
+                self.store.put(method, url, response)
+            if self.estimate_savings:
+                self._estimate(label, url, response)
+        return response
+
+    def stream(self, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None,
+               timeout: float = None) -> StreamingResponse:
+        """Repassa o stream sem validadores: guardar o corpo para revalidar desfaria o stream"""
+        if method.upper() in WRITE_METHODS:
+            self.store.invalidate(url)
+        return open_stream(self.transport, method, url, body=body, headers=headers, timeout=timeout)
+
+    def _estimate(self, label: str, url: str, response: Response):
+        size = len(response.body)
+        gzip_size = None
+        if size >= MIN_COMPRESS_BYTES and response.wire_bytes == size:
+            gzip_size = len(zlib.compress(response.body, 6)) + GZIP_OVERHEAD
+        unchanged = False
+        if not (header_value(response.headers, "ETag") or header_value(response.headers, "Last-Modified")):
+            key = cache_key("GET", url)
+            digest = hashlib.sha1(response.body).digest()
+            with self._lock:
+                unchanged = self._digests.get(key) == digest
+                self._digests[key] = digest
+                self._digests.move_to_end(key)
+                while len(self._digests) > self.max_entries:
+                    self._digests.popitem(last=False)
+
+        with self._lock:
+            counters = self.endpoints[label]
+            if gzip_size is not None:
+                counters["uncompressed_bytes"] += size
+                counters["gzip_estimate_bytes"] += gzip_size
+            if unchanged:
+                counters["unchanged"] += 1
+                counters["unchanged_bytes"] += size
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {label: dict(counters) for label, counters in sorted(self.endpoints.items())}
+
+    def close(self):
+        self.transport.close()
+
+
+def print_revalidation_report(stats: Dict[str, Dict[str, int]]):
+    revalidated = sum(data["revalidated"] for data in stats.values())
+    estimated = any(data["uncompressed_bytes"] or data["unchanged"] for data in stats.values())
+    if not revalidated and not estimated:
+        return
+    print(f"🔁 Revalidação: {revalidated} respostas 304, "
+          f"{sum(data['saved_bytes'] for data in stats.values()) / 1024:.1f} KB não baixados")
+    if not estimated:
+        return
+    print("  Economia possível (estimada):")
+    for label, data in stats.items():
+        if not data["uncompressed_bytes"] and not data["unchanged"]:
+            continue
+        parts = []
+        if data["uncompressed_bytes"]:
+            ratio = 1 - data["gzip_estimate_bytes"] / data["uncompressed_bytes"]
+            parts.append(f"gzip {data['uncompressed_bytes'] / 1024:.1f} KB -> "
+                         f"{data['gzip_estimate_bytes'] / 1024:.1f} KB (-{ratio:.0%})")
+        if data["unchanged"]:
+            parts.append(f"{data['unchanged']} respostas iguais à anterior sem ETag "
+                         f"({data['unchanged_bytes'] / 1024:.1f} KB que seriam 304)")
+        print(f"    {label}: " + "; ".join(parts))
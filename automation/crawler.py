@@ -0,0 +1,177 @@
+import contextvars
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from deadlines import DeadlineExceeded
+from json_stream import JSONListStream
+
+# fetch_page(page, limit) -> (status_code, corpo JSON) ou None em erro de conexão; o corpo
+# também pode ser um JSONListStream, lido registro a registro enquanto a página chega
+FetchPage = Callable[[int, int], Optional[Tuple[int, Any]]]
+
+# Tamanho de página da varredura; as verificações que leem só a primeira página usam
+# page_params(1) para pedir exatamente a mesma URL e aproveitar o cache de respostas
+PAGE_LIMIT = 100
+
+
+def page_params(page: int, limit: int = PAGE_LIMIT) -> Dict[str, int]:
+    return {"page": page, "limit": limit}
+
+
+def page_items(body) -> Tuple[Optional[List[Dict]], Optional[Dict]]:
+    """Extrai usuários e paginação das duas formas de resposta de GET /users
+
+    A API às vezes devolve a lista pura e às vezes {"data": [...], "pagination": {...}}.
+    """
+    if isinstance(body, list):
+        return body, None
+    if isinstance(body, dict) and isinstance(body.get("data"), list):
+        pagination = body.get("pagination")
+        return body["data"], pagination if isinstance(pagination, dict) else None
+    return None, None
+
+
+class DuplicateIndex:
+    """Índice em stream de valores repetidos de um campo (ex.: email ou id)
+
+    Guarda só o primeiro id visto de cada valor e, para valores repetidos, a
+    lista de ids, então a memória cresce com o número de valores distintos e
+    cada registro é verificado em O(1).
+    """
+
+    def __init__(self, field: str, id_field: str = "id"):
+        self.field = field
+        self.id_field = id_field
+        self._first_seen: Dict[Hashable, Any] = {}
+        self.duplicates: Dict[Hashable, List[Any]] = {}
+
+    def add(self, record: Dict):
+        value = record.get(self.field)
+        if value is None or not isinstance(value, Hashable):
+            return
+        record_id = record.get(self.id_field)
+        if value not in self._first_seen:
+            self._first_seen[value] = record_id
+            return
+        self.duplicates.setdefault(value, [self._first_seen[value]]).append(record_id)
+
+    def __len__(self):
+        return len(self._first_seen)
+
+
+class UserCrawler:
+    """Percorre todas as páginas de GET /users em paralelo, entregando cada usuário a um callback
+
+    Se a primeira página trouxer paginação, as demais são pedidas em paralelo até
+    totalPages. Se vier a lista pura, o total é desconhecido e as páginas são
+    pedidas em ondas de `concurrency` até aparecer uma página incompleta.
+    Páginas com erro são tentadas de novo até `retries` vezes.
+
+    Quando fetch_page devolve um JSONListStream, os usuários são entregues
+    pela própria thread que lê a página, à medida que chegam (o callback é
+    serializado por uma trava). Uma página que falha no meio do stream não é
+    repetida, para não entregar os mesmos usuários duas vezes.
+    """
+
+    def __init__(self, fetch_page: FetchPage, limit: int = PAGE_LIMIT, concurrency: int = 8,
+                 retries: int = 2, max_pages: int = 100000):
+        self.fetch_page = fetch_page
+        self.limit = limit
+        self.concurrency = concurrency
+        self.retries = retries
+        self.max_pages = max_pages
+        self.stats = {"pages": 0, "users": 0, "failed_pages": [], "list_shape": 0, "paginated_shape": 0}
+        self._lock = threading.Lock()
+
+    def _deliver(self, stream: JSONListStream, on_user: Callable[[Dict], None]) -> Optional[int]:
+        """Entrega os usuários de uma página em stream; None se não era uma lista ou falhou antes do primeiro"""
+        try:
+            for user in stream:
+                with self._lock:
+                    self.stats["users"] += 1
+                    on_user(user)
+        except Exception:
+            if not stream.count:
+                return None
+            raise
+        finally:
+            stream.close()
+        return stream.count if stream.shape in ("list", "paginated") else None
+
+    def _fetch(self, page: int, on_user: Callable[[Dict], None]) -> Tuple[int, Any, Optional[Dict]]:
+        """(página, itens ou número de itens já entregues em stream, paginação)"""
+        for _ in range(self.retries + 1):
+            response = self.fetch_page(page, self.limit)
+            if response and isinstance(response[1], JSONListStream):
+                if response[0] != 200:
+                    response[1].close()
+                    continue
+                try:
+                    delivered = self._deliver(response[1], on_user)
+                except DeadlineExceeded:
+                    raise
+                except Exception:
+                    return page, None, None
+                if delivered is not None:
+                    return page, delivered, response[1].pagination
+            elif response and response[0] == 200:
+                items, pagination = page_items(response[1])
+                if items is not None:
+                    return page, items, pagination
+        return page, None, None
+
+    def _consume(self, result, on_user: Callable[[Dict], None]) -> Tuple[Optional[int], bool]:
+        page, items, pagination = result
+        if items is None:
+            self.stats["failed_pages"].append(page)
+            return None, False
+        self.stats["pages"] += 1
+        self.stats["paginated_shape" if pagination else "list_shape"] += 1
+        if isinstance(items, int):
+            count = items
+        else:
+            count = len(items)
+            for user in items:
+                with self._lock:
+                    self.stats["users"] += 1
+                    on_user(user)
+        total_pages = pagination.get("totalPages") if pagination else None
+        return (total_pages if isinstance(total_pages, int) else None), count < self.limit
+
+    def crawl(self, on_user: Callable[[Dict], None]) -> Dict:
+        total_pages, last_seen = self._consume(self._fetch(1, on_user), on_user)
+        if last_seen:
+            return self.stats
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            next_page = 2
+            pending = set()
+            while True:
+                limit = min(total_pages or self.max_pages, self.max_pages)
+                while not last_seen and next_page <= limit and len(pending) < self.concurrency * 2:
+                    # As páginas herdam o prazo do teste que pediu a varredura
+                    pending.add(executor.submit(contextvars.copy_context().run, self._fetch, next_page, on_user))
+                    next_page += 1
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pages, short_page = self._consume(future.result(), on_user)
+                    if pages and total_pages is None:
+                        total_pages = pages
+                    # Sem totalPages, uma página incompleta indica o fim dos dados
+                    if short_page and total_pages is None:
+                        last_seen = True
+        return self.stats
+
+
+def crawl_users(fetch_page: FetchPage, consumers: Iterable[Callable[[Dict], None]], **options) -> Dict:
+    """Percorre todos os usuários uma vez, repassando cada um a todos os consumidores"""
+    consumers = list(consumers)
+
+    def on_user(user: Dict):
+        for consumer in consumers:
+            consumer(user)
+
+    return UserCrawler(fetch_page, **options).crawl(on_user)
@@ -0,0 +1,201 @@
+import re
+import time
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Sequence
+
+REQUIRED_FIELDS = ("id", "name", "email", "age", "status", "createdAt", "updatedAt")
+VALID_STATUSES = ("active", "inactive", "pending")
+# Mesma regra do POST /users em index.js
+EMAIL_PATTERN = re.compile(r"[^\s@]+@[^\s@]+\.[^\s@]+")
+AGE_RANGE = (0, 150)
+
+RULES = ("missing_fields", "age_non_numeric", "age_out_of_range", "empty_name", "invalid_email",
+         "invalid_status", "duplicate_email", "duplicate_id")
+
+_MISSING = object()
+_NUMBER_TYPES = (int, float)
+
+
+class UserColumns:
+    """Usuários guardados por coluna (uma lista por campo) em vez de um dict por registro
+
+    add() serve direto como consumidor do crawler. Campos ausentes ficam com
+    um marcador próprio, diferente de null.
+    """
+
+    def __init__(self, fields: Sequence[str] = REQUIRED_FIELDS):
+        self.fields = tuple(fields)
+        self.columns: Dict[str, List[Any]] = {field: [] for field in self.fields}
+        self._appenders = [(field, self.columns[field].append) for field in self.fields]
+
+    def add(self, user: Dict):
+        get = user.get if isinstance(user, dict) else {}.get
+        for field, append in self._appenders:
+            append(get(field, _MISSING))
+
+    def extend(self, users: Iterable[Dict]):
+        for user in users:
+            self.add(user)
+
+    def __len__(self):
+        return len(self.columns[self.fields[0]]) if self.fields else 0
+
+
+class DatasetValidator:
+    """Aplica as regras de qualidade a todas as linhas de uma vez, coluna a coluna
+
+    Cada regra é uma passada sobre uma coluna inteira; sempre que possível a
+    passada é feita por funções em C (count, map(type), array, min/max,
+    Counter) e só quando ela acusa problema as linhas culpadas são localizadas.
+    O resultado traz, por regra, quantas linhas falharam, os ids delas e uma
+    amostra dos valores.
+    """
+
+    def __init__(self, required_fields: Sequence[str] = REQUIRED_FIELDS,
+                 statuses: Sequence[str] = VALID_STATUSES, age_range=AGE_RANGE,
+                 email_pattern=EMAIL_PATTERN, sample: int = 10):
+        self.required_fields = tuple(required_fields)
+        self.statuses = frozenset(statuses)
+        self.age_range = age_range
+        self.email_pattern = email_pattern
+        self.sample = sample
+
+    def validate(self, data: UserColumns) -> Dict:
+        start = time.perf_counter()
+        columns = data.columns
+        ids = columns.get("id") or [None] * len(data)
+
+        def offenders(indexes: List[int], values: List[Any] = None) -> Dict:
+            # Usuário sem id (o próprio marcador de ausente) é identificado pela linha
+            result = {"count": len(indexes),
+                      "ids": [f"linha {i}" if ids[i] is _MISSING else ids[i] for i in indexes]}
+            if values is not None:
+                result["values"] = [_describe(values[i]) for i in indexes[:self.sample]]
+            return result
+
+        rules = {}
+        missing: Dict[str, List[int]] = {}
+        for field in self.required_fields:
+            column = columns.get(field)
+            if column is not None and column.count(_MISSING):
+                missing[field] = [i for i, value in enumerate(column) if value is _MISSING]
+        missing_rows = sorted(set().union(*missing.values())) if missing else []
+        rules["missing_fields"] = dict(offenders(missing_rows),
+                                       by_field={field: len(rows) for field, rows in missing.items()})
+
+        if "age" in columns:
+            rules["age_non_numeric"], rules["age_out_of_range"] = self._check_ages(columns["age"], offenders)
+        if "name" in columns:
+            names = columns["name"]
+            if set(map(type, names)) == {str} and all(map(str.strip, names)):
+                empty = []
+            else:
+                empty = [i for i, name in enumerate(names)
+                         if name is not _MISSING and (name.__class__ is not str or not name.strip())]
+            rules["empty_name"] = offenders(empty, names)
+        if "email" in columns:
+            emails = columns["email"]
+            rules["invalid_email"] = offenders(self._invalid_emails(emails), emails)
+            rules["duplicate_email"] = self._check_duplicates(emails, offenders)
+        if "status" in columns:
+            statuses = columns["status"]
+            valid = self.statuses
+            try:
+                distinct = set(statuses)
+            except TypeError:
+                distinct = None
+            if distinct is not None and distinct <= valid:
+                invalid = []
+            else:
+                invalid = [i for i, status in enumerate(statuses)
+                           if status is not _MISSING and (status.__class__ is not str or status not in valid)]
+            rules["invalid_status"] = offenders(invalid, statuses)
+        if "id" in columns:
+            rules["duplicate_id"] = self._check_duplicates(ids, offenders)
+
+        return {
+            "records": len(data),
+            "rules": rules,
+            "failed_rules": [name for name in RULES if rules.get(name, {}).get("count")],
+            "elapsed_ms": (time.perf_counter() - start) * 1000
+        }
+
+    def _check_ages(self, ages: List[Any], offenders):
+        low, high = self.age_range
+        types = set(map(type, ages))
+        has_missing = type(_MISSING) in types
+        types.discard(type(_MISSING))
+        if types <= set(_NUMBER_TYPES):
+            # Caminho rápido: tudo numérico, então basta min/max sobre um array de doubles
+            non_numeric = []
+            values = array("d", [age for age in ages if age is not _MISSING] if has_missing else ages)
+            if not values or (low <= min(values) and max(values) <= high):
+                return offenders(non_numeric, ages), offenders([], ages)
+        else:
+            # bool é subclasse de int, mas true/false não é idade
+            non_numeric = [i for i, age in enumerate(ages)
+                           if age is not _MISSING and age.__class__ not in _NUMBER_TYPES]
+        out_of_range = [i for i, age in enumerate(ages)
+                        if age.__class__ in _NUMBER_TYPES and not low <= age <= high]
+        return offenders(non_numeric, ages), offenders(out_of_range, ages)
+
+    def _invalid_emails(self, emails: List[Any]) -> List[int]:
+        """Linhas com email fora do formato (ausentes não contam)"""
+        if set(map(type, emails)) == {str}:
+            # Uma única busca em C sobre todos os emails, um por linha, achando as linhas que não casam
+            text = "\n".join(emails)
+            if text.count("\n") == len(emails) - 1:
+                invalid_line = re.compile(rf"^(?!(?:{self.email_pattern.pattern})$).*$", re.MULTILINE)
+                rows, line, position = [], 0, 0
+                for found in invalid_line.finditer(text):
+                    line += text.count("\n", position, found.start())
+                    position = found.start()
+                    rows.append(line)
+                return rows
+        match = self.email_pattern.fullmatch
+        return [i for i, email in enumerate(emails)
+                if email is not _MISSING and (email.__class__ is not str or not match(email))]
+
+    @staticmethod
+    def _check_duplicates(values: List[Any], offenders) -> Dict:
+        try:
+            if len(set(values)) == len(values):
+                return offenders([])
+            counts = Counter(values)
+        except TypeError:
+            # Valores não hasheáveis (listas, objetos) não entram na comparação
+            counts = Counter(value for value in values if value.__hash__ is not None)
+        counts.pop(_MISSING, None)
+        counts.pop(None, None)
+        repeated = {value for value, count in counts.items() if count > 1}
+        if not repeated:
+            return offenders([])
+        rows = [i for i, value in enumerate(values) if value.__hash__ is not None and value in repeated]
+        result = offenders(rows, values)
+        result["distinct"] = len(repeated)
+        return result
+
+
+def _describe(value: Any) -> str:
+    if value is _MISSING:
+        return "(ausente)"
+    return f"{value!r} ({type(value).__name__})"
+
+
+def validate_users(users: Iterable[Dict], **options) -> Dict:
+    """Atalho: carrega os usuários em colunas e valida"""
+    columns = UserColumns(options.pop("fields", REQUIRED_FIELDS))
+    columns.extend(users)
+    return DatasetValidator(**options).validate(columns)
+
+
+def print_validation_report(report: Dict, sample: int = 10):
+    print(f"🧪 Validação de {report['records']} usuários em {report['elapsed_ms']:.0f} ms")
+    for name in RULES:
+        rule = report["rules"].get(name)
+        if not rule or not rule["count"]:
+            continue
+        ids = rule["ids"][:sample]
+        more = f" (+{rule['count'] - len(ids)})" if rule["count"] > len(ids) else ""
+        print(f"  ❌ {name}: {rule['count']} linhas, ids {ids}{more}")
@@ -0,0 +1,73 @@
+import contextlib
+import contextvars
+import time
+from typing import Optional, Tuple
+
+_active: contextvars.ContextVar = contextvars.ContextVar("active_deadlines", default=())
+
+
+class DeadlineExceeded(TimeoutError):
+    """O prazo de um teste ou da suíte acabou antes (ou durante) a requisição"""
+
+
+class Deadline:
+    def __init__(self, seconds: float, label: str = "prazo"):
+        self.seconds = seconds
+        self.label = label
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float], label: str = "prazo"):
+    """Impõe um prazo às requisições feitas dentro do bloco (e nas tarefas e threads que herdam o contexto)
+
+    Prazos aninhados valem juntos: prevalece o que acabar primeiro. Com
+    `seconds` None o bloco roda sem prazo adicional.
+    """
+    if seconds is None:
+        yield None
+        return
+    current = Deadline(seconds, label)
+    token = _active.set(_active.get() + (current,))
+    try:
+        yield current
+    finally:
+        _active.reset(token)
+
+
+def active_deadlines() -> Tuple[Deadline, ...]:
+    return _active.get()
+
+
+def nearest_deadline() -> Optional[Deadline]:
+    deadlines = _active.get()
+    return min(deadlines, key=lambda d: d.expires_at) if deadlines else None
+
+
+def effective_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Timeout de socket para a próxima operação: o menor entre `timeout` e o prazo ativo
+
+    Levanta DeadlineExceeded se o prazo já acabou, sem abrir a requisição.
+    """
+    nearest = nearest_deadline()
+    if nearest is None:
+        return timeout
+    remaining = nearest.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"{nearest.label} de {nearest.seconds:g}s esgotado")
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def deadline_error(error: Exception) -> Exception:
+    """Converte o timeout de socket em DeadlineExceeded quando foi o prazo que o causou"""
+    nearest = nearest_deadline()
+    if nearest is not None and nearest.expired:
+        return DeadlineExceeded(f"{nearest.label} de {nearest.seconds:g}s esgotado")
+    return error
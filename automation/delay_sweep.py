@@ -0,0 +1,103 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from stats import linear_fit
+
+DEFAULT_DELAYS = (0, 250, 500, 1000, 2000, 3000, 4000, 5000)
+SERVER_DEFAULT_DELAY_MS = 5000
+
+
+class DelaySweep:
+    """Dispara ao mesmo tempo chamadas a /slow-endpoint com vários ?delay= e ajusta observado x pedido
+
+    Todas as requisições são liberadas juntas por uma barreira, então a
+    varredura inteira leva mais ou menos o tempo do maior atraso. A regressão
+    linear do tempo observado sobre o atraso pedido mede a precisão do
+    endpoint (inclinação perto de 1, intercepto = overhead fixo), e a razão
+    entre a soma dos tempos e o tempo total mostra quantas esperas o servidor
+    conseguiu atender em paralelo.
+    """
+
+    def __init__(self, tester, delays: Sequence[int] = DEFAULT_DELAYS, repeats: int = 1,
+                 include_default: bool = True, endpoint: str = "/slow-endpoint", margin: float = 5.0,
+                 slope_tolerance: float = 0.05, max_intercept_ms: float = 250.0):
+        self.tester = tester
+        self.delays = list(delays)
+        self.repeats = repeats
+        # Inclui uma chamada sem ?delay= (o servidor usa 5000 ms)
+        self.include_default = include_default
+        self.endpoint = endpoint
+        # Folga, em segundos, somada ao atraso pedido para o timeout de cada requisição
+        self.margin = margin
+        self.slope_tolerance = slope_tolerance
+        self.max_intercept_ms = max_intercept_ms
+
+    def _call(self, delay: Optional[int], barrier: threading.Barrier) -> Dict:
+        params = {"delay": delay} if delay is not None else None
+        timeout = (SERVER_DEFAULT_DELAY_MS if delay is None else delay) / 1000 + self.margin
+        barrier.wait()
+        start = time.perf_counter()
+        response = self.tester.make_request("GET", self.endpoint, params=params, timeout=timeout)
+        observed_ms = (time.perf_counter() - start) * 1000
+        return {
+            "requested_ms": delay,
+            "observed_ms": observed_ms,
+            "status": response["status_code"] if response else None
+        }
+
+    def run(self) -> Dict:
+        jobs: List[Optional[int]] = [delay for delay in self.delays for _ in range(self.repeats)]
+        if self.include_default:
+            jobs.append(None)
+        barrier = threading.Barrier(len(jobs))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            # Cada chamada roda numa cópia do contexto atual, herdando os prazos do teste
+            futures = [executor.submit(contextvars.copy_context().run, self._call, delay, barrier)
+                       for delay in jobs]
+            points = [future.result() for future in futures]
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        ok = [p for p in points if p["status"] == 200]
+        swept = [p for p in ok if p["requested_ms"] is not None]
+        report = {
+            "points": points,
+            "default": next((p for p in points if p["requested_ms"] is None), None),
+            "errors": len(points) - len(ok),
+            "wall_ms": wall_ms,
+            "parallelism": sum(p["observed_ms"] for p in ok) / wall_ms if wall_ms else 0.0,
+            "fit": None,
+            "accurate": False
+        }
+        if len({p["requested_ms"] for p in swept}) >= 2:
+            slope, intercept, r_squared = linear_fit([p["requested_ms"] for p in swept],
+                                                     [p["observed_ms"] for p in swept])
+            residuals = [p["observed_ms"] - (intercept + slope * p["requested_ms"]) for p in swept]
+            report["fit"] = {
+                "slope": slope,
+                "intercept_ms": intercept,
+                "r_squared": r_squared,
+                "max_residual_ms": max(abs(r) for r in residuals)
+            }
+            report["accurate"] = (abs(slope - 1) <= self.slope_tolerance
+                                  and abs(intercept) <= self.max_intercept_ms)
+        return report
+
+
+def print_delay_sweep_report(report: Dict):
+    print("=" * 50)
+    print(f"🐢 Varredura de atrasos: {len(report['points'])} requisições simultâneas "
+          f"em {report['wall_ms'] / 1000:.2f}s (paralelismo efetivo {report['parallelism']:.1f})")
+    for point in sorted(report["points"], key=lambda p: (p["requested_ms"] is None, p["requested_ms"] or 0)):
+        requested = "padrão" if point["requested_ms"] is None else f"{point['requested_ms']} ms"
+        print(f"  {requested:>10} -> {point['observed_ms']:8.1f} ms  [{point['status'] or 'erro'}]")
+    fit = report["fit"]
+    if fit:
+        print(f"  observado = {fit['intercept_ms']:.1f} ms + {fit['slope']:.4f} x pedido "
+              f"(R² {fit['r_squared']:.4f}, maior resíduo {fit['max_residual_ms']:.1f} ms)")
+    if report["errors"]:
+        print(f"  ⚠️ {report['errors']} requisições sem resposta 200")
@@ -0,0 +1,178 @@
+import contextlib
+import io
+import math
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from async_runner import capture_logs
+from stats import wilson_interval
+
+DEFAULT_CHECKS = [
+    "test_health_endpoint",
+    "test_root_endpoint",
+    "test_get_users",
+    "test_create_user_valid",
+    "test_create_user_invalid_email",
+    "test_create_user_empty_name",
+    "test_create_user_negative_age",
+    "test_get_user_invalid_id",
+    "test_pagination",
+]
+
+
+class SPRT:
+    """Teste sequencial da razão de verossimilhança de Wald para uma proporção
+
+    Compara H0: p <= p0 contra H1: p >= p1. Cada observação soma seu log da razão
+    de verossimilhança; o teste para quando a soma cruza um dos limites dados
+    pelos erros alpha (aceitar H1 sendo H0 verdadeira) e beta.
+    """
+
+    def __init__(self, p0: float, p1: float, alpha: float = 0.05, beta: float = 0.05):
+        if not 0 < p0 < p1 < 1:
+            raise ValueError("É preciso 0 < p0 < p1 < 1")
+        self.p0 = p0
+        self.p1 = p1
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.llr = 0.0
+        self.decision: Optional[str] = None
+
+    def update(self, event: bool) -> Optional[str]:
+        if self.decision is None:
+            if event:
+                self.llr += math.log(self.p1 / self.p0)
+            else:
+                self.llr += math.log((1 - self.p1) / (1 - self.p0))
+            if self.llr >= self.upper:
+                self.decision = "H1"
+            elif self.llr <= self.lower:
+                self.decision = "H0"
+        return self.decision
+
+
+def _log_field(args, kwargs, index: int, names: List[str]):
+    if len(args) > index:
+        return args[index]
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+    return None
+
+
+def trial_outcome(logs) -> str:
+    """Resume os registros de uma execução: PASS ou os testes com BUG e o valor obtido"""
+    bugs = []
+    for args, kwargs in logs:
+        if _log_field(args, kwargs, 3, ["status"]) == "BUG":
+            name = _log_field(args, kwargs, 0, ["test_name", "nome_teste"])
+            actual = _log_field(args, kwargs, 2, ["actual", "atual"])
+            bugs.append(f"{name}: {actual}")
+    return "; ".join(bugs) if bugs else "PASS"
+
+
+class FlakinessEstimator:
+    """Repete cada verificação até estimar, com a confiança pedida, a taxa de BUG
+
+    Dois SPRTs rodam em paralelo sobre a mesma sequência de execuções:
+    - has_bug: taxa de BUG <= low (H0) contra >= high (H1)
+    - has_pass: taxa de PASS <= low (H0, sempre falha) contra >= high (H1)
+    Eles classificam a verificação como estável, determinística (sempre BUG) ou
+    intermitente, mas só encerram sozinhos quando todas as execuções deram o
+    mesmo resultado. Nos demais casos a regra de parada é a precisão: repete até
+    a metade da largura do IC da taxa de BUG ficar abaixo de `precision` (ou
+    até `max_samples`). Com `precision=None`, basta a decisão dos SPRTs.
+    """
+
+    def __init__(self, tester, low: float = 0.02, high: float = 0.15, alpha: float = 0.05,
+                 beta: float = 0.05, max_samples: int = 200, confidence: float = 0.95,
+                 precision: Optional[float] = 0.10, log_method: str = "log_test", cleanup: Callable = None):
+        self.tester = tester
+        self.low = low
+        self.high = high
+        self.alpha = alpha
+        self.beta = beta
+        self.max_samples = max_samples
+        self.confidence = confidence
+        self.precision = precision
+        self.log_method = log_method
+        # Recebe o valor retornado pela verificação (ex.: id do usuário criado)
+        self.cleanup = cleanup
+
+    def _run_once(self, check: Callable) -> str:
+        with capture_logs(self.tester, self.log_method) as logs:
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    result = check()
+                except Exception as e:
+                    return f"erro: {type(e).__name__}: {e}"
+        if result is not None and self.cleanup:
+            self.cleanup(result)
+        return trial_outcome(logs)
+
+    def _should_stop(self, has_bug: SPRT, has_pass: SPRT, bug_count: int, samples: int) -> bool:
+        decided = has_bug.decision == "H0" or bool(has_bug.decision and has_pass.decision)
+        # Sempre PASS ou sempre BUG: quem encerra é o SPRT, que dá o veredito
+        if bug_count in (0, samples) or self.precision is None:
+            return decided
+        low, high = wilson_interval(bug_count, samples, self.confidence)
+        return (high - low) / 2 <= self.precision
+
+    def estimate(self, name: str, check: Callable) -> Dict:
+        has_bug = SPRT(self.low, self.high, self.alpha, self.beta)
+        has_pass = SPRT(self.low, self.high, self.alpha, self.beta)
+        outcomes = Counter()
+        samples = 0
+        while samples < self.max_samples:
+            outcome = self._run_once(check)
+            outcomes[outcome] += 1
+            samples += 1
+            is_bug = outcome != "PASS"
+            has_bug.update(is_bug)
+            has_pass.update(not is_bug)
+            if self._should_stop(has_bug, has_pass, samples - outcomes["PASS"], samples):
+                break
+
+        if has_bug.decision == "H0":
+            verdict = "estável"
+        elif has_bug.decision == "H1" and has_pass.decision == "H0":
+            verdict = "determinístico"
+        elif has_bug.decision == "H1" and has_pass.decision == "H1":
+            verdict = "intermitente"
+        else:
+            verdict = "inconclusivo"
+
+        bug_count = samples - outcomes["PASS"]
+        return {
+            "check": name,
+            "verdict": verdict,
+            "samples": samples,
+            "bug_rate": bug_count / samples,
+            "bug_rate_ci": wilson_interval(bug_count, samples, self.confidence),
+            "outcomes": {
+                outcome: {
+                    "count": count,
+                    "probability": count / samples,
+                    "ci": wilson_interval(count, samples, self.confidence)
+                }
+                for outcome, count in outcomes.most_common()
+            }
+        }
+
+    def run(self, check_names: List[str] = None) -> List[Dict]:
+        reports = []
+        for name in check_names or DEFAULT_CHECKS:
+            print(f"🎲 Estimando {name}...")
+            reports.append(self.estimate(name, getattr(self.tester, name)))
+        return reports
+
+
+def print_flakiness_report(reports: List[Dict], confidence: float = 0.95):
+    print("=" * 50)
+    for report in reports:
+        low, high = report["bug_rate_ci"]
+        print(f"{report['check']}: {report['verdict']} após {report['samples']} execuções "
+              f"- taxa de BUG {report['bug_rate']:.0%} (IC {confidence:.0%}: {low:.0%}-{high:.0%})")
+        for outcome, data in report["outcomes"].items():
+            low, high = data["ci"]
+            print(f"   {data['probability']:>5.0%} [{low:.0%}-{high:.0%}] {outcome}")
@@ -0,0 +1,155 @@
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789+-.eE"
+_decoder = json.JSONDecoder()
+
+
+def _continues_number(buffer: str, end: int) -> bool:
+    """True se tudo depois do número decodificado ainda pode ser parte dele"""
+    for position in range(end, len(buffer)):
+        if buffer[position] not in _NUMBER_CHARS:
+            return False
+    return True
+
+
+class JSONListStream:
+    """Lê uma resposta de lista JSON registro a registro, a partir de pedaços de bytes
+
+    Aceita as duas formas de GET /users: a lista pura ([...]) e o objeto
+    {"data": [...], "pagination": {...}}. Iterar devolve cada item da lista
+    assim que ele chega completo; as demais chaves do objeto (ex.: pagination)
+    ficam em `extra`. Só o registro atual e o pedaço lido ficam em memória.
+
+    Depois de iterar: `shape` é "list", "paginated" (objeto com data) ou
+    "object" (objeto sem lista em data, ex.: {"error": ...}) e `count` é o
+    número de itens entregues.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self.shape: Optional[str] = None
+        self.extra: Dict[str, Any] = {}
+        self.count = 0
+        self._iterator: Optional[Iterator[Any]] = None
+
+    @property
+    def pagination(self) -> Optional[Dict]:
+        pagination = self.extra.get("pagination")
+        return pagination if isinstance(pagination, dict) else None
+
+    def _fill(self) -> bool:
+        """Lê o próximo pedaço, descartando o que já foi consumido; False no fim do corpo"""
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._utf8.decode(b"", final=True)
+        else:
+            text = self._utf8.decode(chunk)
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return chunk is not None or bool(text)
+
+    def _peek(self) -> str:
+        """Próximo caractere que não é espaço ("" no fim do corpo)"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if not char or char not in chars:
+            raise ValueError(f"JSON inválido: esperado um de {chars!r}, encontrado {char or 'fim'!r}")
+        self._pos += 1
+        return char
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Valor incompleto: lê mais e tenta de novo a partir do início dele
+                if not self._fill():
+                    raise
+                continue
+            # Um número no fim do pedaço pode continuar no próximo, mesmo já com parte dele lida
+            # (ex.: "-7" + ".5e2": "-7." decodifica -7 e para no ponto)
+            if not self._eof and (end == len(self._buffer) or (value.__class__ in (int, float)
+                                                               and _continues_number(self._buffer, end))):
+                if self._fill():
+                    continue
+            self._pos = end
+            return value
+
+    def _items(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            item = self._value()
+            self.count += 1
+            yield item
+            if self._expect(",]") == "]":
+                return
+
+    def __iter__(self) -> Iterator[Any]:
+        # Um único percurso do corpo: iterar de novo continua de onde parou
+        if self._iterator is None:
+            self._iterator = self._parse()
+        return self._iterator
+
+    def _parse(self) -> Iterator[Any]:
+        yield from self._document()
+        # Lê até o fim do corpo: só espaços podem vir depois do valor, e quem guarda o
+        # corpo inteiro (o cache, em StreamingResponse.on_complete) só é avisado no fim
+        if self._peek():
+            raise ValueError(f"JSON inválido: conteúdo depois do fim do valor: {self._peek()!r}")
+
+    def _document(self) -> Iterator[Any]:
+        start = self._expect("[{")
+        self._pos -= 1
+        if start == "[":
+            self.shape = "list"
+            yield from self._items()
+            return
+
+        self.shape = "object"
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "data" and self._peek() == "[":
+                self.shape = "paginated"
+                yield from self._items()
+            else:
+                self.extra[key] = self._value()
+            if self._expect(",}") == "}":
+                return
+
+    def drain(self) -> int:
+        """Consome o resto do corpo sem guardar os itens; devolve quantos foram lidos no total"""
+        for _ in self:
+            pass
+        return self.count
+
+    def close(self):
+        close = getattr(self._chunks, "close", None)
+        if close:
+            close()
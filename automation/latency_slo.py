@@ -0,0 +1,64 @@
+import json
+from typing import Callable, Dict, List
+
+from sketches import DDSketch
+
+# Orçamentos de latência em ms por endpoint (rótulo de transport.endpoint_label)
+DEFAULT_SLOS: Dict[str, Dict[str, float]] = {
+    "GET /health": {"p50": 100, "p95": 300, "p99": 500, "max": 1000},
+    "GET /users": {"p50": 300, "p95": 800, "p99": 1500, "max": 3000},
+    "GET /users/:id": {"p50": 200, "p95": 600, "p99": 1000, "max": 2000},
+    "POST /users": {"p50": 300, "p95": 800, "p99": 1500, "max": 3000},
+    "PUT /users/:id": {"p50": 300, "p95": 800, "p99": 1500, "max": 3000},
+    "DELETE /users/:id": {"p50": 300, "p95": 800, "p99": 1500, "max": 3000},
+}
+
+STATISTICS = ("p50", "p90", "p95", "p99", "p999", "max")
+
+
+def load_slos(path: str) -> Dict[str, Dict[str, float]]:
+    """Lê orçamentos de um JSON no mesmo formato de DEFAULT_SLOS"""
+    with open(path, encoding="utf-8") as f:
+        slos = json.load(f)
+    for endpoint, budget in slos.items():
+        unknown = set(budget) - set(STATISTICS)
+        if unknown:
+            raise ValueError(f"{endpoint}: estatísticas desconhecidas {sorted(unknown)} "
+                             f"(use {', '.join(STATISTICS)})")
+    return slos
+
+
+def _observed(sketch: DDSketch, statistic: str) -> float:
+    if statistic == "max":
+        return sketch.max
+    return sketch.percentile(float(statistic[1:].replace("999", "99.9")))
+
+
+def check_latency_slos(log_test: Callable, sketches: Dict[str, DDSketch],
+                       slos: Dict[str, Dict[str, float]] = DEFAULT_SLOS) -> List[Dict]:
+    """Compara cada orçamento com o sketch do endpoint e registra PASS ou BUG via log_test
+
+    Endpoints sem requisições na execução ficam de fora. Os percentis vêm do
+    sketch (erro relativo de 1% no padrão); o máximo é exato.
+    """
+    results = []
+    for endpoint, budget in slos.items():
+        sketch = sketches.get(endpoint)
+        if sketch is None or not sketch.count:
+            continue
+        for statistic in STATISTICS:
+            if statistic not in budget:
+                continue
+            limit = budget[statistic]
+            observed = _observed(sketch, statistic)
+            passed = observed <= limit
+            name = f"SLO - {endpoint} {statistic}"
+            actual = f"{observed:.1f}ms em {sketch.count} req"
+            if passed:
+                log_test(name, f"<= {limit:g}ms", actual, "PASS", timings=[])
+            else:
+                log_test(name, f"<= {limit:g}ms", actual, "BUG",
+                         f"{statistic} de {endpoint} passou do orçamento de {limit:g}ms", timings=[])
+            results.append({"endpoint": endpoint, "statistic": statistic, "limit_ms": limit,
+                            "observed_ms": observed, "requests": sketch.count, "passed": passed})
+    return results
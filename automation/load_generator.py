@@ -0,0 +1,344 @@
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from retry_policy import Hedger, print_hedge_report
+from sketches import DDSketch, summarize
+from transport import endpoint_label
+
+SEARCH_TERMS = ["maria", "silva", "email", "teste", "a"]
+STATUSES = ["active", "inactive", "pending"]
+SEED_USER_IDS = list(range(1, 13))
+
+
+class Scenario:
+    """Ação de um usuário virtual, escolhida proporcionalmente ao peso"""
+
+    def __init__(self, name: str, weight: float, action: Callable):
+        self.name = name
+        self.weight = weight
+        self.action = action
+
+
+class VirtualUser:
+    def __init__(self, index: int, call: Callable, rng: random.Random):
+        self.index = index
+        self.call = call
+        self.rng = rng
+        self.created_ids: List[int] = []
+
+    def new_payload(self) -> Dict:
+        suffix = f"{self.index}-{self.rng.randrange(10 ** 9)}"
+        return {
+            "name": f"Carga {suffix}",
+            "email": f"carga-{suffix}@email.com",
+            "age": self.rng.randint(18, 80),
+            "status": self.rng.choice(STATUSES)
+        }
+
+
+def _created_id(response) -> Optional[int]:
+    if not response or not isinstance(response.get("data"), dict):
+        return None
+    body = response["data"]
+    user = body.get("data", body)
+    return user.get("id") if isinstance(user, dict) else None
+
+
+def list_users(vu: VirtualUser):
+    params = {"page": vu.rng.randint(1, 3), "limit": vu.rng.choice([5, 10, 20])}
+    if vu.rng.random() < 0.3:
+        params["status"] = vu.rng.choice(STATUSES)
+    if vu.rng.random() < 0.2:
+        params["search"] = vu.rng.choice(SEARCH_TERMS)
+    vu.call("GET", "/users", params=params)
+
+
+def get_user(vu: VirtualUser):
+    vu.call("GET", f"/users/{vu.rng.choice(vu.created_ids or SEED_USER_IDS)}")
+
+
+def create_user(vu: VirtualUser):
+    user_id = _created_id(vu.call("POST", "/users", data=vu.new_payload()))
+    if user_id is not None:
+        vu.created_ids.append(user_id)
+
+
+def update_user(vu: VirtualUser):
+    # Só altera usuários criados pela própria carga para não mexer nos dados de exemplo
+    if not vu.created_ids:
+        return create_user(vu)
+    vu.call("PUT", f"/users/{vu.rng.choice(vu.created_ids)}", data=vu.new_payload())
+
+
+def delete_user(vu: VirtualUser):
+    if not vu.created_ids:
+        return create_user(vu)
+    vu.call("DELETE", f"/users/{vu.created_ids.pop()}")
+
+
+DEFAULT_SCENARIOS = [
+    Scenario("listar usuários", 50, list_users),
+    Scenario("buscar por id", 20, get_user),
+    Scenario("criar usuário", 12, create_user),
+    Scenario("atualizar usuário", 10, update_user),
+    Scenario("remover usuário", 8, delete_user),
+]
+
+
+class LoadStats:
+    """Latências (em DDSketch, memória constante) e códigos de status por endpoint (thread-safe)"""
+
+    def __init__(self):
+        self.latencies: Dict[str, DDSketch] = defaultdict(DDSketch)
+        self.status_codes: Dict[str, Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float, status):
+        with self._lock:
+            self.latencies[endpoint].add(latency * 1000)
+            self.status_codes[endpoint][status if status is not None else "erro"] += 1
+
+    @property
+    def total_requests(self) -> int:
+        return sum(sketch.count for sketch in self.latencies.values())
+
+    def summary(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            sketch = self.latencies[endpoint]
+            endpoints[endpoint] = {
+                "requests": sketch.count,
+                "throughput_rps": sketch.count / elapsed if elapsed else 0.0,
+                "latency_ms": summarize(sketch),
+                "status_codes": {str(code): count for code, count in self.status_codes[endpoint].items()}
+            }
+        total = self.total_requests
+        return {
+            "elapsed_s": elapsed,
+            "total_requests": total,
+            "throughput_rps": total / elapsed if elapsed else 0.0,
+            "endpoints": endpoints
+        }
+
+
+class LoadGenerator:
+    """Modo de carga em malha fechada: N usuários virtuais repetem o mix de cenários
+
+    Cada usuário virtual só envia a próxima requisição depois que a anterior
+    terminou. A execução termina após `duration` segundos ou `iterations`
+    cenários por usuário, o que vier primeiro. Com um `hedger`, os GETs lentos
+    ganham uma cópia e o relatório compara as caudas com e sem hedge.
+    """
+
+    def __init__(self, tester, scenarios: List[Scenario] = None, virtual_users: int = 10,
+                 duration: Optional[float] = 30.0, iterations: Optional[int] = None,
+                 seed: Optional[int] = None, hedger: Hedger = None):
+        if duration is None and iterations is None:
+            raise ValueError("Informe duration, iterations ou ambos")
+        self.tester = tester
+        self.scenarios = scenarios or DEFAULT_SCENARIOS
+        self.virtual_users = virtual_users
+        self.duration = duration
+        self.iterations = iterations
+        self.seed = seed
+        self.hedger = hedger
+        self.stats = LoadStats()
+
+    def _timed_call(self, method: str, endpoint: str, data: Dict = None, params: Dict = None):
+        label = endpoint_label(method, endpoint)
+        start = time.perf_counter()
+        if self.hedger is not None and method == "GET":
+            response = self.hedger.call(label, lambda: self.tester.make_request(method, endpoint, params=params))
+        else:
+            response = self.tester.make_request(method, endpoint, data=data, params=params)
+        latency = time.perf_counter() - start
+        self.stats.record(label, latency, response['status_code'] if response else None)
+        return response
+
+    def _run_user(self, index: int, deadline: Optional[float]):
+        rng = random.Random(None if self.seed is None else self.seed + index)
+        vu = VirtualUser(index, self._timed_call, rng)
+        weights = [scenario.weight for scenario in self.scenarios]
+        done = 0
+        while self.iterations is None or done < self.iterations:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            rng.choices(self.scenarios, weights)[0].action(vu)
+            done += 1
+
+    def run(self) -> Dict:
+        start = time.monotonic()
+        deadline = start + self.duration if self.duration is not None else None
+        threads = [threading.Thread(target=self._run_user, args=(i, deadline), daemon=True)
+                   for i in range(self.virtual_users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report = self.stats.summary(time.monotonic() - start)
+        if self.hedger is not None:
+            report["hedging"] = self.hedger.summary()
+        return report
+
+
+def print_load_report(report: Dict):
+    print("=" * 50)
+    print(f"📈 Requisições: {report['total_requests']} em {report['elapsed_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s)")
+    for endpoint, data in report["endpoints"].items():
+        latency = data["latency_ms"]
+        codes = ", ".join(f"{code}: {count}" for code, count in sorted(data["status_codes"].items()))
+        print(f"  {endpoint}: {data['requests']} req ({data['throughput_rps']:.1f} req/s)")
+        print(f"     p50 {latency['p50']:.1f}ms | p95 {latency['p95']:.1f}ms | "
+              f"p99 {latency['p99']:.1f}ms | máx {latency['max']:.1f}ms")
+        print(f"     status: {codes}")
+    if "hedging" in report:
+        print_hedge_report(report["hedging"])
+
+
+def parse_rates(text: str) -> List[float]:
+    """Converte "50,100,200" nas taxas dos degraus do modo open-loop"""
+    try:
+        rates = [float(rate) for rate in text.split(",") if rate.strip()]
+    except ValueError:
+        raise ValueError(f"--rates deve ser uma lista de números separados por vírgula: {text!r}") from None
+    check_rates(rates)
+    return rates
+
+
+def check_rates(rates: List[float]):
+    if not rates:
+        raise ValueError("Informe ao menos uma taxa (req/s)")
+    invalid = [rate for rate in rates if not (rate > 0 and math.isfinite(rate))]
+    if invalid:
+        raise ValueError(f"Taxas devem ser positivas e finitas (req/s): {', '.join(f'{r:g}' for r in invalid)}")
+
+
+class OpenLoopGenerator:
+    """Modo de carga em malha aberta com taxa de chegada constante, em degraus
+
+    As requisições são disparadas nos instantes agendados (i / taxa) sem esperar
+    as anteriores terminarem. A latência é medida a partir do instante agendado,
+    e não do envio real, para que filas no servidor ou no cliente apareçam nos
+    percentis (correção de coordinated omission). O degrau em que o percentil
+    escolhido passa de `latency_limit_ms` marca o ponto de saturação.
+    """
+
+    def __init__(self, tester, rates: List[float], method: str = "GET", endpoint: str = "/users",
+                 params: Dict = None, data: Dict = None, step_duration: float = 10.0,
+                 latency_limit_ms: float = 500.0, limit_percentile: float = 99.0,
+                 max_in_flight: int = 200, stop_on_violation: bool = True):
+        # Uma taxa zero ou negativa não tem intervalo entre chegadas (1 / taxa)
+        check_rates(rates)
+        self.tester = tester
+        self.rates = rates
+        self.method = method
+        self.endpoint = endpoint
+        self.params = params
+        self.data = data
+        self.step_duration = step_duration
+        self.latency_limit_ms = latency_limit_ms
+        self.limit_percentile = limit_percentile
+        self.max_in_flight = max_in_flight
+        self.stop_on_violation = stop_on_violation
+
+    def _fire(self, scheduled: float, step: Dict, lock: threading.Lock):
+        started = time.perf_counter()
+        response = self.tester.make_request(self.method, self.endpoint, data=self.data, params=self.params)
+        finished = time.perf_counter()
+        status = response['status_code'] if response else "erro"
+        with lock:
+            step["latencies"].add((finished - scheduled) * 1000)
+            step["service_times"].add((finished - started) * 1000)
+            step["status_codes"][status] += 1
+
+    def _run_step(self, rate: float, executor) -> Dict:
+        step = {"latencies": DDSketch(), "service_times": DDSketch(), "status_codes": Counter()}
+        lock = threading.Lock()
+        total = int(rate * self.step_duration)
+        interval = 1.0 / rate
+        futures = []
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(self._fire, scheduled, step, lock))
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+
+        latencies = step["latencies"]
+        service = step["service_times"]
+        limit_value = latencies.percentile(self.limit_percentile)
+        return {
+            "target_rps": rate,
+            "achieved_rps": latencies.count / elapsed if elapsed else 0.0,
+            "requests": latencies.count,
+            "latency_ms": {
+                "p50": latencies.percentile(50),
+                "p95": latencies.percentile(95),
+                "p99": latencies.percentile(99),
+                "max": latencies.max if latencies.count else 0.0
+            },
+            "service_time_ms": {
+                "p50": service.percentile(50),
+                "p99": service.percentile(99)
+            },
+            "status_codes": {str(code): count for code, count in step["status_codes"].items()},
+            # Sem requisições (taxa x duração < 1) não há percentil para comparar: nem dentro nem fora
+            "within_limit": limit_value <= self.latency_limit_ms if latencies.count else None
+        }
+
+    def run(self) -> Dict:
+        steps = []
+        saturation_rps = None
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for rate in self.rates:
+                print(f"⏱️ Degrau de {rate:g} req/s por {self.step_duration:g}s...")
+                result = self._run_step(rate, executor)
+                steps.append(result)
+                if result["within_limit"] is None:
+                    print(f"⚠️ Degrau de {rate:g} req/s não enviou nenhuma requisição em {self.step_duration:g}s; "
+                          f"aumente --step-duration")
+                elif not result["within_limit"]:
+                    if saturation_rps is None:
+                        saturation_rps = rate
+                    if self.stop_on_violation:
+                        break
+
+        sustained = [step["target_rps"] for step in steps if step["within_limit"]]
+        return {
+            "endpoint": endpoint_label(self.method, self.endpoint),
+            "latency_limit_ms": self.latency_limit_ms,
+            "limit_percentile": self.limit_percentile,
+            "max_sustained_rps": max(sustained) if sustained else None,
+            "saturation_rps": saturation_rps,
+            "steps": steps
+        }
+
+
+def print_open_loop_report(report: Dict):
+    print("=" * 50)
+    print(f"📈 {report['endpoint']} - limite p{report['limit_percentile']:g} "
+          f"<= {report['latency_limit_ms']:g}ms")
+    for step in report["steps"]:
+        if step["within_limit"] is None:
+            print(f"  ⚪ {step['target_rps']:g} req/s: sem requisições no degrau")
+            continue
+        latency = step["latency_ms"]
+        mark = "✅" if step["within_limit"] else "❌"
+        print(f"  {mark} {step['target_rps']:g} req/s (obtido {step['achieved_rps']:.1f}): "
+              f"p50 {latency['p50']:.1f}ms | p99 {latency['p99']:.1f}ms | máx {latency['max']:.1f}ms "
+              f"| serviço p99 {step['service_time_ms']['p99']:.1f}ms")
+    if report["saturation_rps"] is not None:
+        print(f"🚧 Saturação a partir de {report['saturation_rps']:g} req/s "
+              f"(máximo sustentado: {report['max_sustained_rps']})")
+    else:
+        print(f"✅ Nenhum degrau passou do limite (máximo testado: {report['max_sustained_rps']})")
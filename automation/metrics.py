@@ -0,0 +1,171 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PREFIX = "api_tester"
+# Mesmos limites padrão dos histogramas do cliente Prometheus, em segundos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Family:
+    def __init__(self, name: str, kind: str, help_text: str, unit: str = None):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.unit = unit
+        self.samples: List[Tuple[str, dict, float]] = []
+
+    def add(self, suffix: str, labels: dict, value: float):
+        self.samples.append((self.name + suffix, labels, value))
+
+    def render(self) -> Iterable[str]:
+        yield f"# TYPE {self.name} {self.kind}"
+        if self.unit:
+            yield f"# UNIT {self.name} {self.unit}"
+        yield f"# HELP {self.name} {_escape(self.help)}"
+        for name, labels, value in self.samples:
+            yield f"{name}{_labels(labels)} {_number(value)}"
+
+
+class TesterMetrics:
+    """Métricas de um testador (APITester/SimpleAPITester) no formato de texto OpenMetrics
+
+    Lê o estado do testador a cada coleta, sem contadores próprios: requisições
+    por endpoint e status, histograma de latência e bytes (de RequestTimings),
+    resultados por status e bugs por teste (de log_test), repetições e
+    classificações (do FailureClassifier) e, no modo de carga, cópias do Hedger.
+    Os limites do histograma saem do DDSketch de cada endpoint, então a
+    contagem em cada limite tem o mesmo erro relativo de 1% dos percentis.
+    """
+
+    def __init__(self, tester, hedger=None, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.tester = tester
+        self.hedger = hedger
+        self.buckets = buckets
+
+    def families(self) -> List[_Family]:
+        timings = self.tester.timings
+        summary = timings.summary()
+        sketches = timings.sketches()
+
+        requests = _Family(f"{PREFIX}_requests", "counter", "Requisições enviadas por endpoint e status")
+        duration = _Family(f"{PREFIX}_request_duration_seconds", "histogram",
+                           "Tempo total da requisição (DNS até o corpo decodificado)", "seconds")
+        wire = _Family(f"{PREFIX}_wire_bytes", "counter", "Bytes de corpo recebidos pela rede", "bytes")
+        body = _Family(f"{PREFIX}_body_bytes", "counter", "Bytes de corpo depois de descomprimidos", "bytes")
+        revalidated = _Family(f"{PREFIX}_revalidated_responses", "counter",
+                              "Respostas 304 servidas pelo corpo guardado")
+        for endpoint, data in summary.items():
+            for status, count in sorted(data["status_codes"].items()):
+                requests.add("_total", {"endpoint": endpoint, "status": status}, count)
+            wire.add("_total", {"endpoint": endpoint}, data["wire_bytes"])
+            body.add("_total", {"endpoint": endpoint}, data["body_bytes"])
+            revalidated.add("_total", {"endpoint": endpoint}, data["revalidated"])
+            sketch = sketches[endpoint]
+            for bound in self.buckets:
+                duration.add("_bucket", {"endpoint": endpoint, "le": _number(bound)},
+                             sketch.count_at_most(bound * 1000))
+            duration.add("_bucket", {"endpoint": endpoint, "le": "+Inf"}, sketch.count)
+            duration.add("_count", {"endpoint": endpoint}, sketch.count)
+            duration.add("_sum", {"endpoint": endpoint}, round(sketch.sum / 1000, 9))
+
+        tests = _Family(f"{PREFIX}_tests", "counter", "Resultados registrados por status")
+        for status, count in sorted(self.tester.status_counts.items()):
+            tests.add("_total", {"status": status}, count)
+        bugs = _Family(f"{PREFIX}_bugs", "counter", "Bugs encontrados por teste")
+        for name, count in sorted(self.tester.bug_counts.items()):
+            bugs.add("_total", {"test": name}, count)
+        families = [requests, duration, wire, body, revalidated, tests, bugs]
+
+        classifier = getattr(self.tester, "retry_classifier", None)
+        if classifier is not None:
+            summary = classifier.summary()
+            retries = _Family(f"{PREFIX}_retries", "counter", "Repetições feitas para classificar falhas")
+            retries.add("_total", {}, summary["budget"]["spent"])
+            denied = _Family(f"{PREFIX}_retries_denied", "counter", "Repetições negadas pelo orçamento")
+            denied.add("_total", {}, summary["budget"]["denied"])
+            classified = _Family(f"{PREFIX}_classified_failures", "counter", "Falhas por classificação")
+            for label, count in summary["labels"].items():
+                classified.add("_total", {"label": label}, count)
+            families += [retries, denied, classified]
+
+        if self.hedger is not None:
+            hedges = _Family(f"{PREFIX}_hedges", "counter", "Cópias enviadas de GETs lentos")
+            wins = _Family(f"{PREFIX}_hedge_wins", "counter", "Cópias que responderam antes da original")
+            for endpoint, data in self.hedger.counters().items():
+                hedges.add("_total", {"endpoint": endpoint}, data["hedges"])
+                wins.add("_total", {"endpoint": endpoint}, data["hedge_wins"])
+            families += [hedges, wins]
+        return families
+
+    def render(self) -> str:
+        lines = [line for family in self.families() if family.samples for line in family.render()]
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def write_metrics(metrics: TesterMetrics, path: str):
+    """Grava o texto num arquivo temporário e troca de uma vez (leitores nunca veem o arquivo pela metade)"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(metrics.render())
+    os.replace(temporary, path)
+    print(f"📊 Métricas salvas em {path}")
+
+
+class MetricsServer:
+    """Endpoint /metrics local para o Prometheus coletar durante execuções longas (thread em segundo plano)"""
+
+    def __init__(self, metrics: TesterMetrics, host: str = "127.0.0.1", port: int = 9464):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                payload = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.metrics = metrics
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"📡 Métricas em {self.url}")
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,477 @@
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from transport import endpoint_label
+
+# Mesma regex do index.js; o contrato abaixo é o que a API deveria validar, não o que ela valida
+EMAIL_REGEX = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
+VALID_STATUSES = ("active", "inactive", "pending")
+FIELDS = ("name", "email", "age", "status")
+MISSING = object()
+
+ACCEPTED = "aceito"
+REJECTED = "rejeitado"
+ERROR = "erro"
+
+INVALID_ACCEPTED = "aceitou payload inválido"
+VALID_REJECTED = "rejeitou payload válido"
+SERVER_ERROR = "erro do servidor"
+ECHO_MISMATCH = "devolveu valor diferente do enviado"
+
+
+# Geradores de valores por campo: misturam valores válidos, bordas e confusão de tipos
+
+def names(rng: random.Random) -> Iterator:
+    samples = ["Teste Usuário", "João", "Zoë Ærøskøbing", "李小龍", "محمد", "Ελένη", "👩‍💻 Dev", "é",
+               "a", " ", "", "\t\n", "\u200b", "O'Brien", "<script>alert(1)</script>", "Robert'); DROP TABLE--",
+               123, 0, True, None, [], {}, ["João"], {"first": "João"}]
+    while True:
+        roll = rng.random()
+        if roll < 0.6:
+            yield rng.choice(samples)
+        elif roll < 0.8:
+            yield rng.choice("aZçÑ李👩") * rng.choice((64, 255, 256, 1024, 10000))
+        else:
+            yield "".join(chr(rng.choice((rng.randint(0x20, 0x7e), rng.randint(0xa0, 0x2fff),
+                                          rng.randint(0x1f300, 0x1f6ff)))) for _ in range(rng.randint(1, 40)))
+
+
+def emails(rng: random.Random) -> Iterator:
+    samples = ["teste@email.com", "a@b.co", "nome+tag@email.com", "nome.sobrenome@sub.dominio.com.br",
+               "USER@EMAIL.COM", "josé@email.com", "x@xn--bcher-kva.com", "email-invalido", "", "@email.com",
+               "nome@", "nome@dominio", "nome @email.com", "nome@@email.com", "nome@email..com", " a@b.co",
+               "a@b.co\n", "a@b.c@d.com", 123, True, None, [], {}, ["a@b.co"]]
+    while True:
+        if rng.random() < 0.85:
+            yield rng.choice(samples)
+        else:
+            yield "a" * rng.choice((64, 65, 255, 1000)) + "@email.com"
+
+
+def ages(rng: random.Random) -> Iterator:
+    samples = [0, 1, 25, 150, 151, -1, -5, 0.5, 25.0, 149.9, 150.0001, 1e308, -0.0, "25", "thirty", "",
+               True, False, None, [], [25], {}, {"years": 25}]
+    while True:
+        yield rng.choice(samples) if rng.random() < 0.8 else rng.randint(-1000, 1000)
+
+
+def statuses(rng: random.Random) -> Iterator:
+    samples = list(VALID_STATUSES) * 3 + ["ACTIVE", "Active", "deleted", "banned", "", " active", "active ",
+                                          0, 1, True, False, None, [], {}, ["active"]]
+    while True:
+        yield rng.choice(samples)
+
+
+def extras(rng: random.Random) -> Iterator:
+    samples = [("id", 999999), ("createdAt", "1970-01-01T00:00:00Z"), ("isAdmin", True), ("role", "admin"),
+               ("updatedAt", None), ("nome", "Campo em português"), ("Email", "outro@email.com")]
+    while True:
+        yield rng.choice(samples)
+
+
+def payloads(rng: random.Random, method: str) -> Iterator:
+    """Payloads estruturados: parte do usuário válido e troca, tira ou acrescenta campos"""
+    generators = {"name": names(rng), "email": emails(rng), "age": ages(rng), "status": statuses(rng)}
+    extra = extras(rng)
+    shapes = [None, [], "texto", 42, True, [{"name": "João", "email": "joao@email.com"}]]
+    while True:
+        if rng.random() < 0.02:
+            yield rng.choice(shapes)
+            continue
+        payload = {"name": "Usuário Fuzz", "email": "fuzz@email.com", "age": 30, "status": "active"}
+        if method == "PUT":
+            payload = {key: value for key, value in payload.items() if rng.random() < 0.5}
+        for field in FIELDS:
+            roll = rng.random()
+            if roll < 0.35:
+                payload[field] = next(generators[field])
+            elif roll < 0.45:
+                payload.pop(field, None)
+        if rng.random() < 0.1:
+            key, value = next(extra)
+            payload[key] = value
+        yield payload
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def violations(payload, method: str) -> Tuple[str, ...]:
+    """Regras do contrato que o payload quebra (vazio: a API deveria aceitar)
+
+    POST exige nome e email; no PUT todos os campos são opcionais, mas os que
+    vierem seguem as mesmas regras. Campos extras não mudam a validade.
+    """
+    if not isinstance(payload, dict):
+        return ("corpo não é um objeto",)
+    problems = []
+    for field in ("name", "email"):
+        if method == "POST" and field not in payload:
+            problems.append(f"{field} ausente")
+    name = payload.get("name", MISSING)
+    if name is not MISSING and not (isinstance(name, str) and name.strip()):
+        problems.append("name vazio ou não textual")
+    email = payload.get("email", MISSING)
+    if email is not MISSING and not (isinstance(email, str) and EMAIL_REGEX.match(email)):
+        problems.append("email inválido")
+    age = payload.get("age", MISSING)
+    if age is not MISSING and age is not None and not (_is_number(age) and 0 <= age <= 150):
+        problems.append("age fora de 0-150 ou não numérica")
+    status = payload.get("status", MISSING)
+    if status is not MISSING and status not in VALID_STATUSES:
+        problems.append("status fora de active/inactive/pending")
+    return tuple(problems)
+
+
+def outcome(status: Optional[int]) -> str:
+    if status is None or status >= 500:
+        return ERROR
+    return ACCEPTED if status < 300 else REJECTED
+
+
+def _mismatches(payload: Dict, returned) -> List[str]:
+    """Campos aceitos que não voltaram iguais na resposta (ex.: acentos trocados, idade 0 virando null)"""
+    if not isinstance(returned, dict):
+        return []
+    return [field for field in FIELDS
+            if field in payload and field in returned and field != "email" and returned[field] != payload[field]]
+
+
+def _with_unique_email(payload, token: str):
+    """Prefixa a parte local do email para que envios repetidos não conflitem (409); não muda a validade
+
+    Só emails com parte local e "@": prefixar "" ou "@x.com" trocaria o ramo de validação que o caso testa.
+    """
+    email = payload.get("email") if isinstance(payload, dict) else None
+    if isinstance(email, str) and "@" in email and not email.startswith("@"):
+        return dict(payload, email=f"{token}{payload['email']}")
+    return payload
+
+
+def _simpler(value) -> List:
+    if isinstance(value, bool) or value is None:
+        return [None] if value is not None else []
+    if isinstance(value, str):
+        candidates = [value[:len(value) // 2], value[:1], "a"] if len(value) > 1 else ["", "a"]
+        if "@" in value:
+            # Encurta a parte local sem perder o formato do email
+            local, domain = value.split("@", 1)
+            candidates[:0] = [f"{local[:len(local) // 2]}@{domain}", f"a@{domain}", "a@b.co"]
+        return [candidate for candidate in candidates if candidate != value]
+    if isinstance(value, (int, float)):
+        return [candidate for candidate in (0, int(value), int(value / 2)) if candidate != value]
+    if isinstance(value, list):
+        return [[]] + [value[:1]] if len(value) > 1 else ([[]] if value else [])
+    if isinstance(value, dict):
+        return [{}] if value else []
+    return []
+
+
+def shrink_candidates(payload) -> Iterator:
+    """Versões menores do payload: sem um campo ou com um valor mais simples"""
+    if not isinstance(payload, dict):
+        if payload not in ({}, None):
+            yield {}
+        return
+    for key in list(payload):
+        yield {k: v for k, v in payload.items() if k != key}
+    for key, value in payload.items():
+        for candidate in _simpler(value):
+            yield dict(payload, **{key: candidate})
+
+
+def _size(payload) -> int:
+    # Em ASCII, um caractere não ASCII pesa mais que "a": a redução prefere o texto simples
+    return len(json.dumps(payload))
+
+
+class PayloadFuzzer:
+    """Fuzzer de propriedades para POST e PUT /users, com os casos enviados em paralelo
+
+    Cada caso sai de um gerador (tipos trocados em age, nomes unicode e longos,
+    emails de borda, campos ausentes ou extras, status inválidos) e é comparado
+    com o contrato em violations(): inválido deveria dar 4xx, válido deveria ser
+    aceito e devolver os mesmos valores, e nenhum deveria dar 5xx. As falhas são
+    agrupadas por tipo e regras quebradas; o primeiro caso de cada grupo é
+    reduzido (campos retirados, valores simplificados) enquanto continuar
+    falhando do mesmo jeito. Como a API valida com Math.random(), um candidato
+    conta como falha se falhar em qualquer uma de `shrink_attempts` tentativas,
+    e o caso mínimo vem com a taxa de reprodução.
+
+    Todo usuário criado (pelos casos, pela redução ou como alvo dos PUTs) é
+    removido com DELETE logo em seguida ou no fim.
+    """
+
+    def __init__(self, tester, cases: int = 2000, methods=("POST", "PUT"), concurrency: int = 16,
+                 seed: Optional[int] = None, shrink_attempts: int = 3, max_shrink_requests: int = 300,
+                 reproduce_attempts: int = 10, timeout: float = None):
+        self.tester = tester
+        self.cases = cases
+        self.methods = tuple(method.upper() for method in methods)
+        self.concurrency = concurrency
+        self.seed = seed
+        self.shrink_attempts = shrink_attempts
+        self.max_shrink_requests = max_shrink_requests
+        self.reproduce_attempts = reproduce_attempts
+        self.timeout = timeout
+        self.targets: List[int] = []
+        self._lock = threading.Lock()
+        self._tokens = itertools.count()
+        self._run_token = uuid.uuid4().hex[:6]
+        self._counts = {method: Counter() for method in self.methods}
+        self._failures: Dict[Tuple, Dict] = {}
+        self._cleanup = Counter()
+        self._leftover: List[int] = []
+
+    def _send(self, method: str, path: str, payload=MISSING) -> Tuple[Optional[int], object]:
+        body = None
+        if payload is not MISSING:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        try:
+            response = self.tester.transport.request(method, f"{self.tester.base_url}{path}", body=body,
+                                                     headers={"Content-Type": "application/json"},
+                                                     timeout=self.timeout)
+        except Exception:
+            return None, None
+        self.tester.timings.record(endpoint_label(method, path), response.status, response.timings, response)
+        try:
+            data = json.loads(response.body) if response.body else None
+        except ValueError:
+            data = None
+        return response.status, data
+
+    def _delete(self, user_id):
+        status, _ = self._send("DELETE", f"/users/{user_id}")
+        with self._lock:
+            if status is not None and status < 300:
+                self._cleanup["deleted"] += 1
+            else:
+                self._leftover.append(user_id)
+
+    def _attempt(self, method: str, payload, target: Optional[int]) -> Tuple[Optional[str], Optional[int]]:
+        """Envia o caso uma vez e devolve (tipo de falha ou None, status)"""
+        sent = _with_unique_email(payload, f"fz{self._run_token}{next(self._tokens)}-")
+        path = "/users" if method == "POST" else f"/users/{target}"
+        status, data = self._send(method, path, sent)
+        returned = data.get("data") if isinstance(data, dict) else None
+        if method == "POST" and isinstance(returned, dict) and returned.get("id") is not None \
+                and outcome(status) == ACCEPTED:
+            with self._lock:
+                self._cleanup["created"] += 1
+            self._delete(returned["id"])
+
+        result = outcome(status)
+        expected_valid = not violations(payload, method)
+        if result == ERROR:
+            return SERVER_ERROR, status
+        if result == ACCEPTED and not expected_valid:
+            return INVALID_ACCEPTED, status
+        if result == REJECTED and expected_valid:
+            return VALID_REJECTED, status
+        if result == ACCEPTED and _mismatches(sent, returned):
+            return ECHO_MISMATCH, status
+        return None, status
+
+    def _target(self, index: int) -> Optional[int]:
+        return self.targets[index % len(self.targets)] if self.targets else None
+
+    def _check(self, case: Tuple[int, str, object]):
+        index, method, payload = case
+        kind, status = self._attempt(method, payload, self._target(index))
+        with self._lock:
+            counts = self._counts[method]
+            counts["cases"] += 1
+            counts[outcome(status)] += 1
+            if kind is None:
+                return
+            counts["failures"] += 1
+            signature = (method, kind, violations(payload, method))
+            failure = self._failures.get(signature)
+            if failure is None:
+                self._failures[signature] = {"method": method, "kind": kind, "violations": list(signature[2]),
+                                             "count": 0, "status_codes": Counter(), "example": payload,
+                                             "target": self._target(index)}
+                failure = self._failures[signature]
+            failure["count"] += 1
+            failure["status_codes"][status if status is not None else "erro"] += 1
+
+    def _generate(self) -> Iterator[Tuple[int, str, object]]:
+        generators = {method: payloads(random.Random(None if self.seed is None else f"{self.seed}:{method}"), method)
+                      for method in self.methods}
+        if "PUT" in self.methods and not self.targets:
+            generators.pop("PUT")
+        methods = list(generators)
+        for index in range(self.cases):
+            method = methods[index % len(methods)]
+            yield index, method, next(generators[method])
+
+    def _create_targets(self):
+        """Usuários que os PUTs alteram: um por worker, para espalhar a concorrência"""
+        for _ in range(max(1, self.concurrency)):
+            status, data = self._send("POST", "/users", {
+                "name": "Alvo do Fuzzer", "email": f"alvo-{uuid.uuid4().hex[:12]}@email.com",
+                "age": 30, "status": "active"})
+            created = data.get("data") if isinstance(data, dict) else None
+            if status is not None and status < 300 and isinstance(created, dict) and created.get("id") is not None:
+                self.targets.append(created["id"])
+        if not self.targets:
+            print("⚠️ Não foi possível criar usuários para os PUTs; só o POST será testado")
+
+    def _fails_like(self, failure: Dict, candidate, budget: List[int]) -> bool:
+        method = failure["method"]
+        broken = set(violations(candidate, method))
+        # Pode deixar de quebrar regras, mas não quebrar outras nem passar a ser válido (ou inválido)
+        if not broken <= set(failure["violations"]) or bool(broken) != bool(failure["violations"]):
+            return False
+        for _ in range(self.shrink_attempts):
+            if budget[0] <= 0:
+                return False
+            budget[0] -= 1
+            kind, _ = self._attempt(method, candidate, failure["target"])
+            if kind == failure["kind"]:
+                return True
+        return False
+
+    def shrink(self, failure: Dict) -> Dict:
+        """Reduz o exemplo enquanto ele continuar falhando do mesmo jeito (redução gulosa)"""
+        current = failure["example"]
+        budget = [self.max_shrink_requests]
+        improved = True
+        while improved and budget[0] > 0:
+            improved = False
+            for candidate in shrink_candidates(current):
+                if _size(candidate) < _size(current) and self._fails_like(failure, candidate, budget):
+                    current, improved = candidate, True
+                    break
+        requests = self.max_shrink_requests - budget[0] + self.reproduce_attempts
+        reproduced = self._reproduce(failure, current)
+        if not reproduced and current is not failure["example"]:
+            # A redução aceita candidatos que falharam uma vez; se o mínimo não se repete, vale o exemplo original
+            current = failure["example"]
+            reproduced = self._reproduce(failure, current)
+            requests += self.reproduce_attempts
+        return {"payload": current, "violations": list(violations(current, failure["method"])),
+                "requests": requests, "reproduced": reproduced, "attempts": self.reproduce_attempts}
+
+    def _reproduce(self, failure: Dict, payload) -> int:
+        return sum(self._attempt(failure["method"], payload, failure["target"])[0] == failure["kind"]
+                   for _ in range(self.reproduce_attempts))
+
+    def run(self) -> Dict:
+        start = time.perf_counter()
+        if "PUT" in self.methods:
+            self._create_targets()
+        # Lotes limitados: o gerador não é consumido inteiro de uma vez
+        batch_size = max(1, self.concurrency) * 32
+        cases = self._generate()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                batch = list(itertools.islice(cases, batch_size))
+                if not batch:
+                    break
+                list(executor.map(self._check, batch))
+            fuzz_elapsed = time.perf_counter() - start
+            failures = sorted(self._failures.values(), key=lambda failure: -failure["count"])
+            shrunk = list(executor.map(self.shrink, failures))
+        for target in self.targets:
+            self._delete(target)
+        elapsed = time.perf_counter() - start
+
+        # Grupos que se reduzem às mesmas regras quebradas são o mesmo bug
+        merged: Dict[Tuple, Dict] = {}
+        for failure, minimal in zip(failures, shrunk):
+            key = (failure["method"], failure["kind"], tuple(minimal["violations"]))
+            group = merged.get(key)
+            if group is None:
+                merged[key] = dict(failure, violations=minimal["violations"], minimal=minimal,
+                                   status_codes=Counter(failure["status_codes"]))
+                continue
+            group["count"] += failure["count"]
+            group["status_codes"].update(failure["status_codes"])
+            # O caso que mais se repete representa o grupo; o tamanho só desempata
+            if _preference(minimal) > _preference(group["minimal"]):
+                group["minimal"] = minimal
+
+        total = sum(counts["cases"] for counts in self._counts.values())
+        return {
+            "cases": total,
+            "concurrency": self.concurrency,
+            "seed": self.seed,
+            "elapsed_s": elapsed,
+            "cases_per_minute": total / fuzz_elapsed * 60 if fuzz_elapsed else 0.0,
+            "methods": {method: {key: counts[key] for key in ("cases", ACCEPTED, REJECTED, ERROR, "failures")}
+                        for method, counts in self._counts.items() if counts["cases"]},
+            "failures": [
+                {"method": group["method"], "kind": group["kind"], "violations": group["violations"],
+                 "count": group["count"],
+                 "status_codes": {str(code): count for code, count in group["status_codes"].items()},
+                 "example": group["example"], "minimal": group["minimal"],
+                 "confirmed": group["minimal"]["reproduced"] > 0}
+                for group in sorted(merged.values(), key=lambda group: -group["count"])
+            ],
+            "cleanup": {"created": self._cleanup["created"] + len(self.targets),
+                        "deleted": self._cleanup["deleted"], "leftover": self._leftover}
+        }
+
+
+def _preference(minimal: Dict) -> Tuple[float, int]:
+    rate = minimal["reproduced"] / minimal["attempts"] if minimal["attempts"] else 0.0
+    return rate, -_size(minimal["payload"])
+
+
+def _endpoint(method: str) -> str:
+    return "POST /users" if method == "POST" else "PUT /users/:id"
+
+
+def log_fuzz_results(tester, report: Dict):
+    """Um BUG por grupo de falhas confirmado (com o caso mínimo) e um PASS por método sem elas
+
+    Grupos que não se repetiram nenhuma vez na confirmação não viram BUG: ficam
+    como não confirmados no texto do PASS do método.
+    """
+    confirmed = [failure for failure in report["failures"] if failure["confirmed"]]
+    failing = {failure["method"] for failure in confirmed}
+    for method, counts in report["methods"].items():
+        if method not in failing:
+            unconfirmed = sum(failure["count"] for failure in report["failures"] if failure["method"] == method)
+            note = f" ({unconfirmed} divergências não confirmadas)" if unconfirmed else ""
+            tester.log_test(f"Fuzz - {_endpoint(method)}", "Validação conforme o contrato",
+                            f"{counts['cases']} casos sem divergência confirmada{note}", "PASS", timings=[])
+    for failure in confirmed:
+        rules = ", ".join(failure["violations"]) or "payload válido"
+        codes = ", ".join(f"{code}: {count}" for code, count in sorted(failure["status_codes"].items()))
+        minimal = failure["minimal"]
+        tester.log_test(f"Fuzz - {_endpoint(failure['method'])} {failure['kind']} ({rules})",
+                        "4xx" if failure["violations"] else "2xx com os mesmos valores",
+                        f"{failure['count']} de {report['methods'][failure['method']]['cases']} casos ({codes})",
+                        "BUG",
+                        f"Caso mínimo: {json.dumps(minimal['payload'], ensure_ascii=False)} "
+                        f"(reproduziu {minimal['reproduced']} de {minimal['attempts']} vezes)", timings=[])
+
+
+def print_fuzz_report(report: Dict):
+    print("=" * 50)
+    print(f"🎲 Fuzzer: {report['cases']} casos em {report['elapsed_s']:.1f}s "
+          f"({report['cases_per_minute']:.0f} casos/min, {report['concurrency']} em paralelo)")
+    for method, counts in report["methods"].items():
+        print(f"  {_endpoint(method)}: {counts['cases']} casos | {counts[ACCEPTED]} aceitos | "
+              f"{counts[REJECTED]} rejeitados | {counts[ERROR]} erros | {counts['failures']} divergências")
+    for failure in report["failures"]:
+        minimal = failure["minimal"]
+        rules = ", ".join(failure["violations"]) or "payload válido"
+        mark = "❌" if failure["confirmed"] else "⚠️ não confirmado:"
+        print(f"  {mark} {_endpoint(failure['method'])} {failure['kind']} ({rules}): {failure['count']} casos")
+        print(f"     mínimo: {json.dumps(minimal['payload'], ensure_ascii=False)[:200]} "
+              f"(reproduziu {minimal['reproduced']}/{minimal['attempts']})")
+    cleanup = report["cleanup"]
+    leftover = f", {len(cleanup['leftover'])} não removidos" if cleanup["leftover"] else ""
+    print(f"🧹 {cleanup['created']} usuários criados, {cleanup['deleted']} removidos{leftover}")
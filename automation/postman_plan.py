@@ -0,0 +1,327 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sketches import DDSketch
+from transport import endpoint_label
+
+DEFAULT_COLLECTION = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "postman_collection.json")
+
+# Status esperado quando o item não tem script de teste; igual ao que os testadores cobram
+DEFAULT_STATUS = {"GET": (200,), "HEAD": (200,), "POST": (201,), "PUT": (200,), "PATCH": (200,), "DELETE": (200,)}
+# Itens sem script de teste cujo esperado não é o do método, por expressão regular sobre "pasta/nome".
+# É o padrão de compile_collection; --expect-status troca a tabela inteira
+DEFAULT_EXPECTATIONS = {
+    r"Consistency Test": (404,),  # GET /users/999999: o id não existe de propósito
+}
+
+_VARIABLE = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+# pm.response.to.have.status(201) / pm.expect(pm.response.code).to.eql(201) / .to.be.oneOf([200, 204])
+_STATUS_ASSERTION = re.compile(r"to\.have\.status\(\s*(\d{3})\s*\)|response\.code\)\.to\.(?:eql|equal)\(\s*(\d{3})\s*\)"
+                               r"|response\.code\)\.to\.be\.oneOf\(\s*\[([\d\s,]+)\]\s*\)")
+
+_DYNAMIC = {
+    "$randomInt": lambda rng: str(rng.randint(0, 1000)),
+    "$guid": lambda rng: str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+    "$randomUUID": lambda rng: str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+    "$timestamp": lambda rng: str(int(time.time())),
+}
+
+
+class _Template:
+    """Texto com as variáveis da coleção já trocadas; só as dinâmicas ({{$randomInt}}) ficam para cada envio"""
+
+    def __init__(self, text: str, variables: Dict[str, str]):
+        self.parts: List[Tuple[bool, str]] = []
+        position = 0
+        for found in _VARIABLE.finditer(text):
+            name = found.group(1)
+            literal = text[position:found.start()]
+            position = found.end()
+            if name in _DYNAMIC:
+                self.parts.append((False, literal))
+                self.parts.append((True, name))
+            elif name in variables:
+                self.parts.append((False, literal + str(variables[name])))
+            else:
+                raise ValueError(f"Variável não definida na coleção: {{{{{name}}}}}")
+        self.parts.append((False, text[position:]))
+        self.static = not any(dynamic for dynamic, _ in self.parts)
+        self.text = "".join(part for _, part in self.parts) if self.static else None
+        # Para rótulos: cada variável dinâmica vira um segmento :id, como os ids numéricos
+        self.pattern = "".join(":id" if dynamic else part for dynamic, part in self.parts)
+
+    def render(self, rng: random.Random) -> str:
+        if self.static:
+            return self.text
+        return "".join(_DYNAMIC[part](rng) if dynamic else part for dynamic, part in self.parts)
+
+
+def _encode_url(url: str) -> str:
+    """Escapa o que a coleção escreve cru (ex.: ?search=João), sem escapar de novo o que já vem com %"""
+    parts = urllib.parse.urlsplit(url)
+    return urllib.parse.urlunsplit((parts.scheme, parts.netloc,
+                                    urllib.parse.quote(parts.path, safe="/%:@!$&'()*+,;="),
+                                    urllib.parse.quote(parts.query, safe="=&%:@/?!$'()*+,;"), ""))
+
+
+class PlannedRequest:
+    """Uma requisição da coleção pronta para enviar: URL resolvida, corpo em bytes e status esperados"""
+
+    __slots__ = ("name", "folder", "method", "label", "headers", "expected", "_url", "_body")
+
+    def __init__(self, name: str, folder: str, method: str, url: _Template, headers: Dict[str, str],
+                 body: Optional[_Template], expected: Sequence[int]):
+        self.name = name
+        self.folder = folder
+        self.method = method
+        self.headers = headers
+        self.expected = tuple(expected)
+        self._url = _encode_url(url.text) if url.static else url
+        self._body = body.text.encode("utf-8") if body is not None and body.static else body
+        self.label = endpoint_label(method, urllib.parse.urlsplit(url.pattern).path or "/")
+
+    def build(self, rng: random.Random) -> Tuple[str, Optional[bytes]]:
+        url = self._url if isinstance(self._url, str) else _encode_url(self._url.render(rng))
+        body = self._body
+        if isinstance(body, _Template):
+            body = body.render(rng).encode("utf-8")
+        return url, body
+
+
+class RequestPlan:
+    """Coleção do Postman compilada: a lista de PlannedRequest na ordem da coleção"""
+
+    def __init__(self, name: str, requests: List[PlannedRequest]):
+        self.name = name
+        self.requests = requests
+
+    def select(self, include: str = None, exclude: str = None) -> "RequestPlan":
+        """Filtra os itens por expressão regular sobre "pasta/nome" """
+        requests = [request for request in self.requests
+                    if (not include or re.search(include, f"{request.folder}/{request.name}"))
+                    and not (exclude and re.search(exclude, f"{request.folder}/{request.name}"))]
+        return RequestPlan(self.name, requests)
+
+    def __len__(self):
+        return len(self.requests)
+
+
+def parse_expectation(text: str) -> Tuple[str, Tuple[int, ...]]:
+    """'REGEX=404' ou 'REGEX=200,204' -> (REGEX, (códigos...))"""
+    pattern, separator, codes = text.rpartition("=")
+    try:
+        parsed = tuple(int(code) for code in codes.split(",") if code.strip())
+    except ValueError:
+        parsed = ()
+    if not separator or not pattern or not parsed:
+        raise ValueError(f"Esperado inválido: {text!r} (use REGEX=CÓDIGO[,CÓDIGO...])")
+    re.compile(pattern)
+    return pattern, parsed
+
+
+def _expected_status(item: Dict, method: str, path: str, expectations: Dict[str, Sequence[int]]) -> Tuple[int, ...]:
+    for event in item.get("event", []):
+        if event.get("listen") != "test":
+            continue
+        script = event.get("script", {}).get("exec", [])
+        source = "\n".join(script) if isinstance(script, list) else str(script)
+        codes = []
+        for found in _STATUS_ASSERTION.finditer(source):
+            single = found.group(1) or found.group(2)
+            codes.extend([int(single)] if single else [int(code) for code in found.group(3).split(",") if code.strip()])
+        if codes:
+            return tuple(dict.fromkeys(codes))
+    for pattern, codes in expectations.items():
+        if re.search(pattern, path):
+            return tuple(codes)
+    return DEFAULT_STATUS.get(method, (200,))
+
+
+def compile_collection(collection: Dict, variables: Dict[str, str] = None,
+                       expectations: Dict[str, Sequence[int]] = None) -> RequestPlan:
+    """Resolve as variáveis, codifica os corpos e define o esperado de cada item (formato v2.1)
+
+    O esperado vem do script de teste do item; sem ele, da primeira expressão
+    de `expectations` (padrão: DEFAULT_EXPECTATIONS) que casa com "pasta/nome";
+    e, por fim, do método.
+    """
+    expectations = DEFAULT_EXPECTATIONS if expectations is None else expectations
+    resolved = {entry["key"]: entry.get("value", "") for entry in collection.get("variable", [])
+                if not entry.get("disabled")}
+    resolved.update(variables or {})
+    requests: List[PlannedRequest] = []
+
+    def walk(items: List[Dict], folder: str):
+        for item in items:
+            if "item" in item:
+                walk(item["item"], f"{folder}/{item['name']}" if folder else item["name"])
+                continue
+            request = item["request"]
+            method = request.get("method", "GET").upper()
+            url = request["url"]
+            raw_url = url if isinstance(url, str) else url["raw"]
+            headers = {header["key"]: _Template(header.get("value", ""), resolved).render(random)
+                       for header in request.get("header", []) if not header.get("disabled")}
+            body = None
+            if (request.get("body") or {}).get("mode") == "raw" and request["body"].get("raw"):
+                body = _Template(request["body"]["raw"], resolved)
+            requests.append(PlannedRequest(item["name"], folder, method, _Template(raw_url, resolved),
+                                           headers, body,
+                                           _expected_status(item, method, f"{folder}/{item['name']}", expectations)))
+
+    walk(collection.get("item", []), "")
+    return RequestPlan(collection.get("info", {}).get("name", "coleção"), requests)
+
+
+_plans: Dict[tuple, RequestPlan] = {}
+_plans_lock = threading.Lock()
+
+
+def load_plan(path: str = DEFAULT_COLLECTION, variables: Dict[str, str] = None,
+              expectations: Dict[str, Sequence[int]] = None) -> RequestPlan:
+    """Lê e compila a coleção uma vez; o mesmo arquivo com as mesmas variáveis e esperados reaproveita o plano"""
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size, tuple(sorted((variables or {}).items())),
+           None if expectations is None else tuple((pattern, tuple(codes)) for pattern, codes in expectations.items()))
+    with _plans_lock:
+        plan = _plans.get(key)
+    if plan is None:
+        with open(path, encoding="utf-8") as f:
+            plan = compile_collection(json.load(f), variables, expectations)
+        with _plans_lock:
+            _plans[key] = plan
+    return plan
+
+
+class PlanExecutor:
+    """Executa o plano várias vezes em paralelo sobre um transporte com pool
+
+    Cada iteração percorre os itens na ordem da coleção (um PUT antes do
+    DELETE do mesmo usuário continua antes); as iterações rodam em paralelo,
+    até `concurrency` de cada vez. Com `ordered=False`, cada requisição vira
+    uma tarefa independente, para medir a API com a coleção embaralhada.
+    Itens que dependem do estado (email fixo, DELETE de um id fixo) só podem
+    passar na primeira iteração.
+    """
+
+    def __init__(self, transport, plan: RequestPlan, concurrency: int = 8, iterations: int = 1,
+                 ordered: bool = True, timeout: float = None, seed: Optional[int] = None):
+        self.transport = transport
+        self.plan = plan
+        self.concurrency = concurrency
+        self.iterations = iterations
+        self.ordered = ordered
+        self.timeout = timeout
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._results = [{"latencies": DDSketch(), "status_codes": Counter(), "matched": 0}
+                         for _ in plan.requests]
+
+    def _send(self, index: int, rng: random.Random):
+        request = self.plan.requests[index]
+        url, body = request.build(rng)
+        start = time.perf_counter()
+        try:
+            status = self.transport.request(request.method, url, body=body, headers=request.headers,
+                                            timeout=self.timeout).status
+        except Exception:
+            status = None
+        latency = time.perf_counter() - start
+        with self._lock:
+            result = self._results[index]
+            result["latencies"].add(latency * 1000)
+            result["status_codes"][status if status is not None else "erro"] += 1
+            result["matched"] += status in request.expected
+
+    def _iteration(self, iteration: int):
+        rng = random.Random(None if self.seed is None else f"{self.seed}:{iteration}")
+        for index in range(len(self.plan.requests)):
+            self._send(index, rng)
+
+    def _single(self, task: int):
+        iteration, index = divmod(task, len(self.plan.requests))
+        self._send(index, random.Random(None if self.seed is None else f"{self.seed}:{iteration}:{index}"))
+
+    def sketches(self) -> Dict[str, DDSketch]:
+        """Latências (ms) por endpoint, juntando os itens da coleção que vão para a mesma rota"""
+        merged: Dict[str, DDSketch] = {}
+        with self._lock:
+            for request, result in zip(self.plan.requests, self._results):
+                if request.label in merged:
+                    merged[request.label].merge(result["latencies"])
+                else:
+                    merged[request.label] = result["latencies"].copy()
+        return merged
+
+    def run(self) -> Dict:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            if self.ordered:
+                list(executor.map(self._iteration, range(self.iterations)))
+            else:
+                list(executor.map(self._single, range(self.iterations * len(self.plan.requests))))
+        elapsed = time.perf_counter() - start
+
+        items = []
+        for request, result in zip(self.plan.requests, self._results):
+            latencies = result["latencies"]
+            items.append({
+                "name": request.name,
+                "folder": request.folder,
+                "endpoint": request.label,
+                "expected": list(request.expected),
+                "requests": latencies.count,
+                "matched": result["matched"],
+                "status_codes": {str(code): count for code, count in result["status_codes"].items()},
+                "latency_ms": {
+                    "p50": latencies.percentile(50),
+                    "p95": latencies.percentile(95),
+                    "max": latencies.max if latencies.count else 0.0
+                }
+            })
+        total = sum(item["requests"] for item in items)
+        return {
+            "collection": self.plan.name,
+            "iterations": self.iterations,
+            "concurrency": self.concurrency,
+            "elapsed_s": elapsed,
+            "total_requests": total,
+            "throughput_rps": total / elapsed if elapsed else 0.0,
+            "items": items
+        }
+
+
+def log_plan_results(tester, report: Dict):
+    """Um resultado por item da coleção no log do testador (BUG se algum envio veio com outro status)"""
+    for item in report["items"]:
+        expected = " ou ".join(str(code) for code in item["expected"])
+        codes = ", ".join(f"{code}: {count}" for code, count in sorted(item["status_codes"].items()))
+        name = f"Coleção - {item['name']}"
+        if item["matched"] == item["requests"]:
+            tester.log_test(name, expected, codes, "PASS", timings=[])
+        else:
+            tester.log_test(name, expected, codes, "BUG",
+                            f"{item['requests'] - item['matched']} de {item['requests']} envios de "
+                            f"{item['endpoint']} com status diferente do esperado", timings=[])
+
+
+def print_plan_report(report: Dict):
+    print("=" * 50)
+    print(f"📬 {report['collection']}: {report['total_requests']} requisições em {report['elapsed_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s, {report['iterations']} iterações, "
+          f"{report['concurrency']} em paralelo)")
+    for item in report["items"]:
+        mark = "✅" if item["matched"] == item["requests"] else "❌"
+        latency = item["latency_ms"]
+        print(f"  {mark} {item['name']} ({item['endpoint']}): {item['matched']}/{item['requests']} "
+              f"| p50 {latency['p50']:.1f}ms | p95 {latency['p95']:.1f}ms")
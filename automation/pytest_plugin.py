@@ -0,0 +1,142 @@
+"""Plugin do pytest que expõe os testar_* de TestesBasicosAPI como itens do pytest
+
+Ativado por automation/tests/conftest.py. Cada método testar_* vira um teste
+que falha quando algum resultado registrado por ele é BUG. Fixtures:
+
+- url_base_api (sessão): --api-base-url ou API_BASE_URL; "standin" usa a
+  réplica local em memória. Sem URL, os testes são pulados.
+- transporte_api (sessão): HTTPTransport com pool keep-alive, um por worker; com
+  --api-cache, envolvido por um CachingTransport compartilhado pelos testes da sessão.
+- testador_api: TestesBasicosAPI novo a cada teste, sobre o transporte da sessão.
+- usuario_criado: usuário criado para o teste e removido ao final.
+
+Marcadores: slow (vai para o começo da fila, para não sobrar no fim de uma
+execução paralela) e stateful(grupo) (com pytest-xdist, todos os testes do
+mesmo grupo rodam em sequência no mesmo worker).
+"""
+import inspect
+import os
+
+import pytest
+
+from deadlines import DeadlineExceeded, deadline
+from response_cache import CachingTransport, ResponseCache
+from transport import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, HTTPTransport
+
+CHECK_PREFIX = "testar_"
+DEFAULT_STATEFUL_GROUP = "usuarios"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("api", "Testes da API de usuários")
+    group.addoption("--api-base-url", default=os.environ.get("API_BASE_URL"),
+                    help="URL da API testada (ou API_BASE_URL); 'standin' usa a réplica local em memória")
+    group.addoption("--api-timeout", type=float, default=DEFAULT_TIMEOUT,
+                    help="timeout de cada requisição em segundos")
+    group.addoption("--api-test-timeout", type=float, default=None,
+                    help="prazo de cada teste em segundos")
+    group.addoption("--api-cache", action="store_true",
+                    help="reaproveita respostas de GETs idênticos entre os testes (desligado por padrão)")
+    group.addoption("--api-cache-ttl", type=float, default=30.0, help="validade de uma resposta no cache (s)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: teste demorado (varre todas as páginas, espera o servidor)")
+    config.addinivalue_line("markers", "stateful(grupo): altera ou depende do estado do servidor; "
+                                       "com pytest-xdist roda no mesmo worker que o resto do grupo")
+    if not config.pluginmanager.hasplugin("xdist"):
+        config.addinivalue_line("markers", "xdist_group(nome): grupo do pytest-xdist (sem efeito sem ele)")
+    # Com -n, o xdist usa --dist load, que ignora xdist_group; loadgroup distribui igual e respeita os grupos
+    if getattr(config.option, "dist", "no") == "load":
+        config.option.dist = "loadgroup"
+
+
+def pytest_pycollect_makeitem(collector, name, obj):
+    if not (inspect.isclass(obj) and hasattr(obj, "MARCADORES_PYTEST")):
+        return None
+    return [pytest.Function.from_parent(collector, name=method, callobj=_make_check(obj, method))
+            for method, _ in inspect.getmembers(obj, inspect.isfunction) if method.startswith(CHECK_PREFIX)]
+
+
+def _make_check(tester_cls, method: str):
+    takes_user = len(inspect.signature(getattr(tester_cls, method)).parameters) > 1
+
+    if takes_user:
+        def check(testador_api, usuario_criado, api_test_timeout):
+            _run_check(testador_api, method, api_test_timeout, usuario_criado)
+    else:
+        def check(testador_api, api_test_timeout):
+            _run_check(testador_api, method, api_test_timeout)
+
+    check.__name__ = method
+    check.tester_cls = tester_cls
+    check.__doc__ = getattr(tester_cls, method).__doc__
+    for marker in tester_cls.MARCADORES_PYTEST.get(method, ()):
+        name, *args = (marker,) if isinstance(marker, str) else marker
+        check = getattr(pytest.mark, name)(*args)(check)
+    return check
+
+
+def _run_check(tester, method: str, test_timeout, *args):
+    try:
+        with deadline(test_timeout, f"prazo de {method}"):
+            getattr(tester, method)(*args)
+    except DeadlineExceeded as e:
+        pytest.fail(f"{method}: {e}", pytrace=False)
+    bugs = [record for record in tester.resultados_teste if record["status"] == "BUG"]
+    if bugs:
+        pytest.fail("\n".join(f"{bug['nome_teste']}: esperado {bug['esperado']}, atual {bug['atual']}"
+                              + (f" ({bug['descricao_bug']})" if bug.get("descricao_bug") else "")
+                              for bug in bugs), pytrace=False)
+
+
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        marker = item.get_closest_marker("stateful")
+        if marker is not None:
+            item.add_marker(pytest.mark.xdist_group(marker.args[0] if marker.args else DEFAULT_STATEFUL_GROUP))
+    # Ordenação estável: os lentos primeiro, o resto na ordem em que foi coletado
+    items.sort(key=lambda item: item.get_closest_marker("slow") is None)
+
+
+@pytest.fixture(scope="session")
+def url_base_api(request):
+    url = request.config.getoption("--api-base-url")
+    if not url:
+        pytest.skip("informe --api-base-url (ou API_BASE_URL); 'standin' usa a réplica local")
+    if url != "standin":
+        yield url.rstrip("/")
+        return
+    from standin_server import StandinAPI
+    api = StandinAPI()
+    try:
+        yield api.mount(f"pytest-{os.getpid()}")
+    finally:
+        api.unmount()
+
+
+@pytest.fixture(scope="session")
+def transporte_api(request):
+    transport = HTTPTransport(pool_size=DEFAULT_POOL_SIZE, timeout=request.config.getoption("--api-timeout"))
+    if request.config.getoption("--api-cache"):
+        transport = CachingTransport(transport, ResponseCache(ttl=request.config.getoption("--api-cache-ttl")))
+    yield transport
+    transport.close()
+
+
+@pytest.fixture(scope="session")
+def api_test_timeout(request):
+    return request.config.getoption("--api-test-timeout")
+
+
+@pytest.fixture
+def testador_api(request, url_base_api, transporte_api):
+    return request.function.tester_cls(url_base_api, transporte_api)
+
+
+@pytest.fixture
+def usuario_criado(testador_api):
+    with testador_api.usuario_temporario() as usuario:
+        if not usuario:
+            pytest.fail("POST /users com dados válidos não criou o usuário do teste", pytrace=False)
+        yield usuario
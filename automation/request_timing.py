@@ -0,0 +1,135 @@
+import contextvars
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from sketches import DDSketch
+
+PHASES = ("dns", "connect", "tls", "ttfb", "body", "json")
+
+
+class RequestTimings:
+    """Coleta o tempo por fase de cada requisição de um testador
+
+    As medições feitas desde o último registro de teste ficam pendentes no
+    contexto atual (cada teste do AsyncTestRunner roda num contexto próprio) e
+    são anexadas ao resultado por drain(). Modos que não registram um resultado
+    por requisição (carga, soak, flaky) desligam `keep_pending`.
+
+    Todas as medições também entram no resumo por endpoint, que guarda somas e
+    um DDSketch do tempo total em vez das medições: a memória não cresce com o
+    número de requisições. Respostas servidas pelo cache (`from_cache`) não
+    foram à rede e ficam de fora, para não puxar percentis e SLOs para 0 ms.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self._pending = contextvars.ContextVar(f"pending_timings_{id(self)}", default=())
+        self.keep_pending = True
+        self.relative_accuracy = relative_accuracy
+        self._by_endpoint: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, status, phases: Dict[str, float], response=None) -> Optional[Dict]:
+        if response is not None and response.from_cache:
+            return None
+        entry = {"endpoint": endpoint, "status": status}
+        for phase in PHASES:
+            entry[f"{phase}_ms"] = round(phases.get(phase, 0.0), 3)
+        entry["total_ms"] = round(sum(phases.get(phase, 0.0) for phase in PHASES), 3)
+        if response is not None:
+            # Bytes do corpo na rede e depois de descomprimido (transport.Response)
+            entry["wire_bytes"] = response.wire_bytes
+            entry["body_bytes"] = response.body_bytes
+            if response.revalidated:
+                entry["revalidated"] = True
+        if self.keep_pending:
+            # Tupla imutável: contextos copiados pelo asyncio não compartilham a mesma lista
+            self._pending.set(self._pending.get() + (entry,))
+        with self._lock:
+            aggregate = self._by_endpoint.get(endpoint)
+            if aggregate is None:
+                aggregate = self._by_endpoint[endpoint] = {
+                    "requests": 0, "status_codes": Counter(), "phase_ms": dict.fromkeys(PHASES, 0.0),
+                    "total_ms": DDSketch(self.relative_accuracy),
+                    "wire_bytes": 0, "body_bytes": 0, "revalidated": 0
+                }
+            aggregate["requests"] += 1
+            aggregate["status_codes"][status if status is not None else "erro"] += 1
+            for phase in PHASES:
+                aggregate["phase_ms"][phase] += entry[f"{phase}_ms"]
+            aggregate["total_ms"].add(entry["total_ms"])
+            aggregate["wire_bytes"] += entry.get("wire_bytes") or 0
+            aggregate["body_bytes"] += entry.get("body_bytes") or 0
+            aggregate["revalidated"] += bool(entry.get("revalidated"))
+        return entry
+
+    def reset(self):
+        """Descarta as medições pendentes e o histórico por endpoint"""
+        self._pending.set(())
+        with self._lock:
+            self._by_endpoint.clear()
+
+    def drain(self) -> List[Dict]:
+        pending = list(self._pending.get())
+        self._pending.set(())
+        return pending
+
+    def sketches(self) -> Dict[str, DDSketch]:
+        """Cópia do sketch de tempo total (ms) de cada endpoint, para checar SLOs ou juntar com outros"""
+        with self._lock:
+            return {endpoint: data["total_ms"].copy() for endpoint, data in self._by_endpoint.items()}
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            snapshot = {endpoint: dict(data, phase_ms=dict(data["phase_ms"]), total_ms=data["total_ms"].copy(),
+                                       status_codes=dict(data["status_codes"]))
+                        for endpoint, data in self._by_endpoint.items()}
+
+        result = {}
+        for endpoint in sorted(snapshot):
+            data = snapshot[endpoint]
+            requests = data["requests"]
+            totals = data["total_ms"]
+            result[endpoint] = {
+                "requests": requests,
+                "status_codes": {str(code): count for code, count in data["status_codes"].items()},
+                "mean_ms": {phase: data["phase_ms"][phase] / requests for phase in PHASES},
+                "total_p50_ms": totals.percentile(50),
+                "total_p95_ms": totals.percentile(95),
+                "total_p99_ms": totals.percentile(99),
+                "total_max_ms": totals.max,
+                "wire_bytes": data["wire_bytes"],
+                "body_bytes": data["body_bytes"],
+                "revalidated": data["revalidated"]
+            }
+        return result
+
+
+def print_timing_summary(summary: Dict[str, Dict]):
+    if not summary:
+        return
+    print("⏱️ Tempo médio por fase (ms):")
+    print(f"  {'endpoint':<24}{'req':>5}" + "".join(f"{phase:>9}" for phase in PHASES) + f"{'p95':>9}")
+    for endpoint, data in summary.items():
+        phases = "".join(f"{data['mean_ms'][phase]:>9.1f}" for phase in PHASES)
+        print(f"  {endpoint:<24}{data['requests']:>5}{phases}{data['total_p95_ms']:>9.1f}")
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def print_transfer_summary(summary: Dict[str, Dict]):
+    """Volume por endpoint: bytes na rede x descomprimidos e quantas respostas vieram de um 304"""
+    if not summary or not any(data["body_bytes"] for data in summary.values()):
+        return
+    print("📦 Volume transferido por endpoint:")
+    print(f"  {'endpoint':<24}{'req':>5}{'rede':>12}{'corpo':>12}{'economia':>10}{'304':>6}")
+    for endpoint, data in sorted(summary.items(), key=lambda item: -item[1]["body_bytes"]):
+        saved = 1 - data["wire_bytes"] / data["body_bytes"] if data["body_bytes"] else 0.0
+        print(f"  {endpoint:<24}{data['requests']:>5}{_format_bytes(data['wire_bytes']):>12}"
+              f"{_format_bytes(data['body_bytes']):>12}{saved:>10.0%}{data['revalidated']:>6}")
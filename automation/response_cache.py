@@ -0,0 +1,152 @@
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from transport import Response, StreamingResponse, buffered_stream, open_stream
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+CacheKey = Tuple[str, str, str, str]
+
+
+def cache_key(method: str, url: str) -> CacheKey:
+    """(método, origem, caminho, query com parâmetros ordenados)"""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return method.upper(), f"{parts.scheme}://{parts.netloc}", parts.path.rstrip("/") or "/", query
+
+
+class ResponseCache:
+    """Cache LRU com TTL de respostas de leitura bem-sucedidas
+
+    Uma escrita (POST, PUT, PATCH, DELETE) invalida as entradas do mesmo
+    recurso, dos recursos abaixo dele e da coleção que o contém: um PUT em
+    /users/5 descarta /users/5 e todas as páginas de /users. Um POST em
+    /users descarta só /users e o que está abaixo (a raiz / não é coleção).
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Response]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, method: str, url: str) -> Optional[Response]:
+        key = cache_key(method, url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, method: str, url: str, response: Response):
+        key = cache_key(method, url)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, url: str) -> int:
+        _, origin, path, _ = cache_key("GET", url)
+        # Vazio para recursos de primeiro nível (/users), que não estão dentro de outra coleção
+        parent = path.rsplit("/", 1)[0]
+        with self._lock:
+            stale = [key for key in self._entries
+                     if key[1] == origin and (key[2] == path or key[2].startswith(path.rstrip("/") + "/")
+                                              or (parent and key[2] == parent))]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+class CachingTransport:
+    """Envolve um transporte respondendo leituras repetidas pelo cache (opcional, ativado com --cache)"""
+
+    def __init__(self, transport, cache: ResponseCache = None):
+        self.transport = transport
+        self.cache = cache or ResponseCache()
+
+    def _hit(self, method: str, url: str) -> Optional[Response]:
+        if method not in CACHEABLE_METHODS:
+            return None
+        cached = self.cache.get(method, url)
+        if cached is None:
+            return None
+        # Sem fases de rede; com from_cache o RequestTimings não mede o acerto (nem os SLOs)
+        return Response(cached.status, cached.reason, cached.headers, cached.body,
+                        {"dns": 0.0, "connect": 0.0, "tls": 0.0, "ttfb": 0.0, "body": 0.0}, wire_bytes=0,
+                        from_cache=True)
+
+    def request(self, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None,
+                timeout: float = None) -> Response:
+        method = method.upper()
+        hit = self._hit(method, url)
+        if hit is not None:
+            return hit
+
+        if method in WRITE_METHODS:
+            self.cache.invalidate(url)
+        response = self.transport.request(method, url, body=body, headers=headers, timeout=timeout)
+        if method in WRITE_METHODS:
+            # De novo depois da resposta: descarta leituras concorrentes guardadas durante a escrita
+            self.cache.invalidate(url)
+        elif method in CACHEABLE_METHODS and 200 <= response.status < 300:
+            self.cache.put(method, url, response)
+        return response
+
+    def stream(self, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None,
+               timeout: float = None) -> StreamingResponse:
+        """Acerto no cache vira stream do corpo guardado; uma leitura 2xx lida até o fim é guardada"""
+        method = method.upper()
+        hit = self._hit(method, url)
+        if hit is not None:
+            return buffered_stream(hit)
+        if method in WRITE_METHODS:
+            self.cache.invalidate(url)
+        streamed = open_stream(self.transport, method, url, body=body, headers=headers, timeout=timeout)
+        if method in WRITE_METHODS:
+            self.cache.invalidate(url)
+        elif method in CACHEABLE_METHODS and 200 <= streamed.status < 300:
+            # Só o corpo completo entra no cache: um stream fechado no meio não é guardado
+            streamed.on_complete = lambda data: self.cache.put(method, url, Response(
+                streamed.status, streamed.reason, streamed.headers, data, dict(streamed.timings),
+                wire_bytes=streamed.wire_bytes, revalidated=streamed.revalidated))
+        return streamed
+
+    def close(self):
+        self.transport.close()
+
+
+def print_cache_stats(stats: Dict[str, float]):
+    print(f"🗃️ Cache: {stats['hits']} acertos, {stats['misses']} faltas ({stats['hit_rate']:.0%}), "
+          f"{stats['invalidations']} invalidadas, {stats['evictions']} descartadas por LRU")
@@ -0,0 +1,122 @@
+import glob
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+
+class JSONLResultSink:
+    """Grava cada resultado como uma linha JSON, com escrita em buffer e flush periódico
+
+    O buffer é descarregado a cada `buffer_records` registros, a cada
+    `flush_interval` segundos (também por uma thread em segundo plano, para não
+    segurar registros durante testes lentos) e no close(). Se o processo cair,
+    perde-se no máximo o que estava no buffer. Com `max_bytes`, o arquivo é
+    rotacionado em segmentos numerados: results.jsonl, results.jsonl.1, ...
+    Cada sink é uma execução: segmentos deixados por uma execução anterior no
+    mesmo caminho são apagados ao abrir, para não irem parar no export.
+    """
+
+    def __init__(self, path: str, buffer_records: int = 100, flush_interval: float = 1.0,
+                 max_bytes: Optional[int] = None, fsync: bool = False):
+        self.path = path
+        self.buffer_records = buffer_records
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        for segment in segment_paths(path):
+            os.remove(segment)
+        self._file = open(path, "w", encoding="utf-8")
+        self._segment = 1
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def _segment_path(self, index: int) -> str:
+        return self.path if index == 0 else f"{self.path}.{index}"
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def write(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            if (len(self._buffer) >= self.buffer_records
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+        self._last_flush = time.monotonic()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        self._segment += 1
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._flush_locked()
+
+    def records(self) -> Iterator[Dict]:
+        """Registros gravados por este sink (só os desta execução), buffer incluído"""
+        self.flush()
+        return iter_records(self.path)
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            if not self._file.closed:
+                self._flush_locked()
+                self._file.close()
+
+
+def segment_paths(path: str) -> List[str]:
+    """Segmentos existentes de um stream, em ordem cronológica"""
+    rotated = [p for p in glob.glob(glob.escape(path) + ".*") if p.rsplit(".", 1)[-1].isdigit()]
+    rotated.sort(key=lambda p: int(p.rsplit(".", 1)[-1]))
+    return ([path] if os.path.exists(path) else []) + rotated
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Lê os registros de todos os segmentos; ignora a última linha se ela ficou truncada"""
+    for segment in segment_paths(path):
+        with open(segment, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                yield json.loads(line)
+
+
+def write_json_array(records: Iterator[Dict], path: str) -> int:
+    """Escreve no mesmo formato de json.dump(indent=2), um registro por vez"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in records:
+            body = json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            f.write(("," if count else "") + "\n  " + body)
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+
+def export_legacy(stream_path: str, results_path: str, bugs_path: str) -> int:
+    """Gera os arquivos de resultados e de bugs no formato antigo a partir do stream"""
+    total = write_json_array(iter_records(stream_path), results_path)
+    write_json_array((r for r in iter_records(stream_path) if r.get("status") == "BUG"), bugs_path)
+    return total
@@ -0,0 +1,139 @@
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+FIELDS = ("test_name", "expected", "actual", "status", "bug_description")
+NONE = 0xFFFFFFFF
+
+
+class StringTable:
+    """Guarda cada texto distinto uma única vez e o referencia por um índice inteiro"""
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._values: List[str] = []
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE
+        value = str(value)
+        index = self._index.get(value)
+        if index is None:
+            index = len(self._values)
+            self._index[value] = index
+            self._values.append(value)
+        return index
+
+    def lookup(self, index: int) -> Optional[str]:
+        return None if index == NONE else self._values[index]
+
+    def __len__(self):
+        return len(self._values)
+
+
+class ResultStore:
+    """Armazena os resultados em colunas compactas em vez de um dict por registro
+
+    Textos (nome do teste, status, esperado, atual, descrição) viram índices de
+    uma tabela de strings, o horário é um float monotônico num array e a lista
+    de bugs é só um array de posições. Os dicts no formato de sempre são
+    montados apenas quando alguém lê um registro ou exporta o conjunto.
+    """
+
+    def __init__(self, fields: Sequence[str] = FIELDS, extra_field: str = "timings"):
+        if len(fields) != len(FIELDS):
+            raise ValueError(f"São esperados {len(FIELDS)} nomes de campos")
+        self.fields = tuple(fields)
+        self.extra_field = extra_field
+        self.strings = StringTable()
+        self._columns = [array("I") for _ in FIELDS]
+        self._timestamps = array("d")
+        self._bug_indexes = array("I")
+        self._bug_status = self.strings.intern("BUG")
+        # Dados extras (ex.: tempos das requisições) só para registros que os têm
+        self._extras: Dict[int, list] = {}
+        self._wall_base = time.time()
+        self._monotonic_base = time.monotonic()
+
+    def append(self, test_name: str, expected: str, actual: str, status: str,
+               bug_description: str = None, extra: list = None) -> int:
+        index = len(self._timestamps)
+        values = (test_name, expected, actual, status, bug_description)
+        for column, value in zip(self._columns, values):
+            column.append(self.strings.intern(value))
+        self._timestamps.append(time.monotonic())
+        if extra:
+            self._extras[index] = extra
+        if self._columns[3][index] == self._bug_status:
+            self._bug_indexes.append(index)
+        return index
+
+    def build_record(self, test_name: str, expected: str, actual: str, status: str,
+                     bug_description: str = None, extra: list = None) -> Dict:
+        """Monta o dict de um resultado sem armazená-lo (usado ao gravar em stream)"""
+        return self._as_dict((test_name, expected, actual, status, bug_description),
+                             datetime.now().isoformat(), extra or [])
+
+    def _as_dict(self, values, timestamp: str, extra: list) -> Dict:
+        record = {self.fields[0]: values[0], "timestamp": timestamp}
+        for name, value in zip(self.fields[1:], values[1:]):
+            record[name] = value
+        record[self.extra_field] = extra
+        return record
+
+    def _timestamp(self, index: int) -> str:
+        wall = self._wall_base + (self._timestamps[index] - self._monotonic_base)
+        return datetime.fromtimestamp(wall).isoformat()
+
+    def record(self, index: int) -> Dict:
+        values = [self.strings.lookup(column[index]) for column in self._columns]
+        return self._as_dict(values, self._timestamp(index), self._extras.get(index, []))
+
+    def status_of(self, index: int) -> str:
+        return self.strings.lookup(self._columns[3][index])
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.record(i) for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("índice de resultado fora do intervalo")
+        return self.record(item)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self)):
+            yield self.record(index)
+
+    @property
+    def bugs(self) -> "BugView":
+        return BugView(self)
+
+    def to_list(self) -> List[Dict]:
+        return list(self)
+
+
+class BugView:
+    """Visão somente leitura dos registros com status BUG de um ResultStore"""
+
+    def __init__(self, store: ResultStore):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store._bug_indexes)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._store.record(i) for i in self._store._bug_indexes[item]]
+        return self._store.record(self._store._bug_indexes[item])
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in self._store._bug_indexes:
+            yield self._store.record(index)
+
+    def to_list(self) -> List[Dict]:
+        return list(self)
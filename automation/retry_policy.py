@@ -0,0 +1,306 @@
+import contextvars
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from deadlines import nearest_deadline
+from sketches import DDSketch
+from stats import percentile, wilson_interval
+
+# Repetir estes não muda o estado do servidor além da primeira vez (DELETE muda a resposta: 404)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT")
+
+DETERMINISTIC = "determinístico"
+INTERMITTENT = "intermitente"
+TRANSIENT = "transitório"
+UNCLASSIFIED = "não classificado"
+
+
+class RetryBudget:
+    """Fichas de repetição compartilhadas por toda a execução (thread-safe)
+
+    Começa com `tokens` fichas e ganha `ratio` a cada requisição registrada em
+    deposit(), no estilo dos retry budgets de gRPC/Finagle: com ratio=0.1, as
+    repetições e hedges nunca passam de ~10% do tráfego mais a reserva inicial.
+    """
+
+    def __init__(self, tokens: float, ratio: float = 0.0):
+        self.tokens = float(tokens)
+        self.ratio = ratio
+        self.spent = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        if self.ratio:
+            with self._lock:
+                self.tokens += self.ratio
+
+    def spend(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                self.denied += 1
+                return False
+            self.tokens -= 1
+            self.spent += 1
+            return True
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"spent": self.spent, "denied": self.denied, "remaining": int(self.tokens)}
+
+
+class FailureClassifier:
+    """Repete uma verificação que falhou para dizer se a falha é do código ou do momento
+
+    A primeira resposta continua sendo a avaliada pelo teste; as repetições só
+    rotulam a falha:
+
+    - determinístico: todas as tentativas falharam;
+    - transitório: só a primeira falhou (as repetições seguintes passaram);
+    - intermitente: falhou mais de uma vez, mas nem sempre; vem com a taxa
+      observada e o intervalo de Wilson;
+    - não classificado: sem orçamento ou sem como repetir com segurança.
+
+    Só métodos idempotentes são repetidos tal como foram; para os demais (POST)
+    o teste pode passar `replay`, uma requisição equivalente que não conflita
+    com a original (ex.: outro email) e desfaz o que criou. Entre as tentativas
+    há uma espera exponencial com jitter completo, sem passar do prazo ativo.
+    """
+
+    def __init__(self, budget: RetryBudget, max_attempts: int = 5, base_delay: float = 0.1,
+                 max_delay: float = 2.0, confidence: float = 0.95, seed: Optional[int] = None):
+        if max_attempts < 2:
+            raise ValueError("max_attempts precisa ser ao menos 2")
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.confidence = confidence
+        self.records: List[Dict] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _pause(self, retry: int) -> bool:
+        """Espera antes da repetição `retry` (1, 2, ...); False se o prazo ativo não comporta"""
+        with self._lock:
+            pause = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+        active = nearest_deadline()
+        if active is not None and active.remaining() <= pause:
+            return False
+        time.sleep(pause)
+        return True
+
+    def run(self, name: str, method: str, attempt: Callable[[], Any], is_expected: Callable[[Any], bool],
+            replay: Callable[[], Any] = None) -> Tuple[Any, Optional[Dict]]:
+        """Executa `attempt`; se falhar, repete e devolve (primeira resposta, classificação)"""
+        first = attempt()
+        if is_expected(first):
+            return first, None
+
+        repeat = attempt if method.upper() in IDEMPOTENT_METHODS else replay
+        outcomes = [False]
+        reason = None
+        if repeat is None:
+            reason = f"{method.upper()} não é idempotente"
+        while repeat is not None and len(outcomes) < self.max_attempts:
+            if not self.budget.spend():
+                reason = "orçamento de repetições esgotado"
+                break
+            if not self._pause(len(outcomes)):
+                reason = "prazo do teste"
+                break
+            outcomes.append(bool(is_expected(repeat())))
+            # Duas repetições seguidas passando depois da falha inicial: foi pontual
+            if outcomes == [False, True, True]:
+                break
+
+        record = self._classify(name, method.upper(), outcomes, reason)
+        with self._lock:
+            self.records.append(record)
+        return first, record
+
+    def _classify(self, name: str, method: str, outcomes: List[bool], reason: Optional[str]) -> Dict:
+        attempts = len(outcomes)
+        failures = outcomes.count(False)
+        if attempts == 1:
+            label = UNCLASSIFIED
+        elif failures == attempts:
+            label = DETERMINISTIC
+        elif failures == 1:
+            label = TRANSIENT
+        else:
+            label = INTERMITTENT
+        return {
+            "test": name,
+            "method": method,
+            "label": label,
+            "attempts": attempts,
+            "failures": failures,
+            "failure_rate": failures / attempts,
+            "failure_rate_ci": wilson_interval(failures, attempts, self.confidence),
+            "reason": reason
+        }
+
+    def summary(self) -> Dict:
+        with self._lock:
+            records = list(self.records)
+        return {
+            "labels": {label: sum(1 for record in records if record["label"] == label)
+                       for label in (DETERMINISTIC, INTERMITTENT, TRANSIENT, UNCLASSIFIED)},
+            "budget": self.budget.stats(),
+            "failures": records
+        }
+
+
+def describe(record: Dict) -> str:
+    if record["label"] == UNCLASSIFIED:
+        return f"{UNCLASSIFIED}: {record['reason']}"
+    if record["label"] == INTERMITTENT:
+        low, high = record["failure_rate_ci"]
+        return (f"{INTERMITTENT}: falhou {record['failures']} de {record['attempts']} tentativas "
+                f"({record['failure_rate']:.0%}, IC {low:.0%}-{high:.0%})")
+    if record["label"] == TRANSIENT:
+        return f"{TRANSIENT}: só a 1ª de {record['attempts']} tentativas falhou"
+    return f"{DETERMINISTIC}: falhou nas {record['attempts']} tentativas"
+
+
+def with_classification(description: str, record: Optional[Dict]) -> str:
+    """Acrescenta o rótulo à descrição do bug registrada pelo teste"""
+    return f"{description} [{describe(record)}]" if record else description
+
+
+def print_retry_report(summary: Dict):
+    if not summary["failures"]:
+        return
+    labels = ", ".join(f"{count} {label}" for label, count in summary["labels"].items() if count)
+    budget = summary["budget"]
+    print(f"🔁 Falhas repetidas: {labels} ({budget['spent']} repetições, "
+          f"{budget['denied']} negadas pelo orçamento)")
+    for record in summary["failures"]:
+        print(f"  {record['test']}: {describe(record)}")
+
+
+class Hedger:
+    """Manda uma cópia da requisição se a primeira demorar demais e fica com a que chegar antes
+
+    A cópia sai depois de `delay_ms` ou, sem ele, do percentil `percentile_target`
+    das últimas latências (até juntar `min_samples`, nada é duplicado). Cada
+    cópia gasta uma ficha do orçamento. Além da latência com hedge, guarda a da
+    requisição original mesmo quando ela perde, para comparar as caudas.
+    """
+
+    def __init__(self, budget: RetryBudget, delay_ms: float = None, percentile_target: float = 95.0,
+                 window: int = 256, min_samples: int = 20, max_workers: int = 32):
+        self.budget = budget
+        self.delay_ms = delay_ms
+        self.percentile_target = percentile_target
+        self.min_samples = min_samples
+        self._recent = deque(maxlen=window)
+        self._observed = 0
+        self._adaptive_delay: Optional[float] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, Dict] = defaultdict(lambda: {
+            "requests": 0, "hedges": 0, "hedge_wins": 0, "hedged": DDSketch(), "primary": DDSketch()
+        })
+
+    def _delay(self) -> Optional[float]:
+        if self.delay_ms is not None:
+            return self.delay_ms / 1000
+        return self._adaptive_delay
+
+    def _observe(self, label: str, latency: float):
+        with self._lock:
+            self.endpoints[label]["primary"].add(latency * 1000)
+            self._recent.append(latency)
+            self._observed += 1
+            if self._observed >= self.min_samples and self._observed % 16 == 0:
+                self._adaptive_delay = percentile(sorted(self._recent), self.percentile_target)
+
+    def _submit(self, send: Callable[[], Any], finished: Dict, key: str, on_finish: Callable = None):
+        def timed():
+            try:
+                return send()
+            finally:
+                # Instante em que a resposta chegou, não em que a thread que espera acordou
+                finished[key] = time.perf_counter()
+                if on_finish:
+                    on_finish(finished[key])
+        return self._executor.submit(contextvars.copy_context().run, timed)
+
+    def call(self, label: str, send: Callable[[], Any]) -> Any:
+        self.budget.deposit()
+        finished: Dict[str, float] = {}
+        start = time.perf_counter()
+        primary = self._submit(send, finished, "primary", lambda end: self._observe(label, end - start))
+
+        delay = self._delay()
+        hedged = False
+        try:
+            result = primary.result(timeout=delay)
+            winner = primary
+        except FutureTimeoutError:
+            if not self.budget.spend():
+                result, winner = primary.result(), primary
+            else:
+                hedged = True
+                hedge = self._submit(send, finished, "hedge")
+                done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+                winner = primary if primary in done else hedge
+                result = winner.result()
+                if result is None:
+                    # A primeira a chegar falhou: ainda vale a outra
+                    winner = hedge if winner is primary else primary
+                    result = winner.result()
+        latency = finished["primary" if winner is primary else "hedge"] - start
+
+        with self._lock:
+            counters = self.endpoints[label]
+            counters["requests"] += 1
+            counters["hedged"].add(latency * 1000)
+            if hedged:
+                counters["hedges"] += 1
+                counters["hedge_wins"] += winner is not primary
+        return result
+
+    def counters(self) -> Dict[str, Dict[str, int]]:
+        """Requisições, cópias e vitórias por endpoint, sem encerrar o executor (para coletas no meio da carga)"""
+        with self._lock:
+            return {label: {key: data[key] for key in ("requests", "hedges", "hedge_wins")}
+                    for label, data in sorted(self.endpoints.items())}
+
+    def summary(self) -> Dict:
+        self._executor.shutdown(wait=True)
+        endpoints = {}
+        with self._lock:
+            for label, data in sorted(self.endpoints.items()):
+                endpoints[label] = {
+                    "requests": data["requests"],
+                    "hedges": data["hedges"],
+                    "hedge_wins": data["hedge_wins"],
+                    "latency_ms": {
+                        name: {f"p{pct}": data[key].percentile(pct) for pct in (50, 95, 99)}
+                        for name, key in (("hedged", "hedged"), ("unhedged", "primary"))
+                    }
+                }
+        delay = self._delay()
+        return {
+            "delay_ms": delay * 1000 if delay is not None else None,
+            "budget": self.budget.stats(),
+            "endpoints": endpoints
+        }
+
+
+def print_hedge_report(summary: Dict):
+    delay = f"{summary['delay_ms']:.1f}ms" if summary["delay_ms"] is not None else "sem amostras"
+    print(f"🪞 Hedging (cópia após {delay}, {summary['budget']['denied']} negadas pelo orçamento):")
+    for label, data in summary["endpoints"].items():
+        hedged, unhedged = data["latency_ms"]["hedged"], data["latency_ms"]["unhedged"]
+        print(f"  {label}: {data['hedges']} cópias em {data['requests']} req, {data['hedge_wins']} venceram")
+        print(f"     sem hedge p95 {unhedged['p95']:.1f}ms | p99 {unhedged['p99']:.1f}ms -> "
+              f"com hedge p95 {hedged['p95']:.1f}ms | p99 {hedged['p99']:.1f}ms")
@@ -0,0 +1,310 @@
+import argparse
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sketches import DDSketch, summarize
+from stats import trend_test, wilson_interval
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    mode TEXT,
+    base_url TEXT,
+    source TEXT,
+    tests INTEGER NOT NULL DEFAULT 0,
+    bugs INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    test_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    endpoint TEXT,
+    latency_ms REAL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    expected TEXT,
+    actual TEXT,
+    bug_description TEXT,
+    PRIMARY KEY (run_id, seq)
+);
+CREATE INDEX IF NOT EXISTS results_by_test ON results (test_name, run_id, status);
+CREATE INDEX IF NOT EXISTS results_by_endpoint ON results (endpoint, run_id);
+CREATE TABLE IF NOT EXISTS endpoint_latency (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    endpoint TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    mean_ms REAL,
+    p50_ms REAL,
+    p90_ms REAL,
+    p95_ms REAL,
+    p99_ms REAL,
+    max_ms REAL,
+    sketch TEXT,
+    PRIMARY KEY (endpoint, run_id)
+);
+"""
+
+STATISTICS = ("mean_ms", "p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms")
+# Nomes dos campos nos resultados antigos (resultados-testes-automatizados.json)
+LEGACY_FIELDS = {"nome_teste": "test_name", "esperado": "expected", "atual": "actual",
+                 "descricao_bug": "bug_description"}
+
+
+def _result_row(run_id: int, seq: int, record: Dict):
+    record = {LEGACY_FIELDS.get(key, key): value for key, value in record.items()}
+    timings = record.get("timings") or []
+    # Um teste pode fazer várias requisições: o endpoint da linha é o da primeira
+    endpoint = timings[0]["endpoint"] if timings else None
+    latency = round(sum(entry["total_ms"] for entry in timings), 3) if timings else None
+    return (run_id, seq, record["test_name"], record["status"], endpoint, latency, len(timings),
+            _text(record.get("expected")), _text(record.get("actual")), record.get("bug_description"))
+
+
+def _text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class RunHistory:
+    """Histórico de execuções num SQLite local, indexado por teste, endpoint e execução
+
+    Cada execução vira uma linha em `runs`; cada resultado registrado, uma linha
+    em `results` (teste, status, endpoint da primeira requisição e latência
+    somada); e cada endpoint, uma linha em `endpoint_latency` com percentis e o
+    DDSketch serializado, para que tendências de p95 não precisem reler as
+    requisições. As consultas abaixo usam só os índices; nenhum JSON é relido.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        # WAL: dá para consultar o histórico enquanto outra execução grava
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_run(self, results: Iterable[Dict], sketches: Dict[str, DDSketch] = None, mode: str = None,
+                   base_url: str = None, started_at: str = None, source: str = None) -> int:
+        """Grava uma execução inteira numa transação e devolve o id dela"""
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (started_at, mode, base_url, source) VALUES (?, ?, ?, ?)",
+                (started_at or datetime.now().isoformat(), mode, base_url, source))
+            run_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (_result_row(run_id, seq, record) for seq, record in enumerate(results)))
+            rows = []
+            for endpoint, sketch in (sketches or {}).items():
+                if not sketch.count:
+                    continue
+                stats = summarize(sketch, (50, 90, 95, 99))
+                rows.append((run_id, endpoint, sketch.count, stats["mean"], stats["p50"], stats["p90"],
+                             stats["p95"], stats["p99"], stats["max"], json.dumps(sketch.to_dict())))
+            self.connection.executemany(
+                "INSERT INTO endpoint_latency VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.execute(
+                "UPDATE runs SET finished_at = ?, tests = (SELECT COUNT(*) FROM results WHERE run_id = ?),"
+                " bugs = (SELECT COUNT(*) FROM results WHERE run_id = ? AND status = 'BUG') WHERE id = ?",
+                (datetime.now().isoformat(), run_id, run_id, run_id))
+        return run_id
+
+    def record_tester(self, tester, mode: str = "functional") -> int:
+        """Grava a execução de um testador (resultados em memória ou do stream JSONL)"""
+        if tester.keep_results or not tester.results_sink:
+            results = iter(tester.test_results)
+        else:
+            # Só o que este sink gravou: o caminho pode ter sido usado por execuções anteriores
+            results = tester.results_sink.records()
+        run_id = self.record_run(results, tester.timings.sketches(), mode, tester.base_url)
+        print(f"🗃️ Execução {run_id} gravada no histórico {self.path}")
+        return run_id
+
+    def import_json(self, path: str, mode: str = None) -> int:
+        """Importa um arquivo de resultados antigo (test-results.json ou resultados-testes-automatizados.json)"""
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+        started_at = records[0].get("timestamp") if records else None
+        return self.record_run(records, mode=mode, started_at=started_at, source=path)
+
+    def runs(self, last: int = 20) -> List[Dict]:
+        rows = self.connection.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (last,))
+        return [dict(row) for row in reversed(rows.fetchall())]
+
+    def first_failure(self, test_name: str) -> Optional[Dict]:
+        """Primeira execução da sequência de falhas atual do teste (None se ele passou na última vez)"""
+        row = self.connection.execute("""
+            SELECT runs.*, results.actual, results.bug_description FROM results JOIN runs ON runs.id = results.run_id
+            WHERE results.test_name = :name AND results.status = 'BUG'
+              AND results.run_id > COALESCE((SELECT MAX(run_id) FROM results
+                                            WHERE test_name = :name AND status != 'BUG'), 0)
+            ORDER BY results.run_id LIMIT 1
+        """, {"name": test_name}).fetchone()
+        return dict(row) if row else None
+
+    def latency_trend(self, endpoint: str, statistic: str = "p95_ms", last: int = 500) -> Dict:
+        """Série de uma estatística do endpoint nas últimas `last` execuções, com o teste t da inclinação"""
+        if statistic not in STATISTICS:
+            raise ValueError(f"Estatística desconhecida: {statistic} (use {', '.join(STATISTICS)})")
+        rows = self.connection.execute(f"""
+            SELECT run_id, runs.started_at, endpoint_latency.requests, {statistic} AS value
+            FROM endpoint_latency JOIN runs ON runs.id = endpoint_latency.run_id
+            WHERE endpoint = ? ORDER BY run_id DESC LIMIT ?
+        """, (endpoint, last)).fetchall()
+        points = [dict(row) for row in reversed(rows)]
+        trend = None
+        if len(points) >= 3:
+            trend = trend_test(list(range(len(points))), [point["value"] for point in points])
+        return {"endpoint": endpoint, "statistic": statistic, "points": points, "trend": trend}
+
+    def merged_sketch(self, endpoint: str, last: int = 500) -> DDSketch:
+        """Junta os sketches das últimas execuções: percentis do período todo, não média de p95"""
+        merged = DDSketch()
+        rows = self.connection.execute(
+            "SELECT sketch FROM endpoint_latency WHERE endpoint = ? ORDER BY run_id DESC LIMIT ?", (endpoint, last))
+        for (sketch,) in rows:
+            merged.merge(DDSketch.from_dict(json.loads(sketch)))
+        return merged
+
+    def flake_rates(self, last: int = 100, confidence: float = 0.95) -> List[Dict]:
+        """Por teste, nas últimas `last` execuções: taxa de falha, IC de Wilson e trocas de status
+
+        Um teste que sempre falha tem taxa 100% e nenhuma troca; o instável tem
+        trocas. A lista vem ordenada pelas trocas e depois pela taxa.
+        """
+        rows = self.connection.execute("""
+            WITH recent AS (
+                SELECT test_name, run_id, MAX(status = 'BUG') AS failed FROM results
+                WHERE run_id > COALESCE((SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?), 0)
+                GROUP BY test_name, run_id
+            ), ordered AS (
+                SELECT test_name, failed, LAG(failed) OVER (PARTITION BY test_name ORDER BY run_id) AS previous
+                FROM recent
+            )
+            SELECT test_name, COUNT(*) AS runs, SUM(failed) AS failures,
+                   SUM(previous IS NOT NULL AND previous != failed) AS flips
+            FROM ordered GROUP BY test_name
+        """, (last,)).fetchall()
+        rates = []
+        for row in rows:
+            runs, failures = row["runs"], row["failures"]
+            rates.append({"test": row["test_name"], "runs": runs, "failures": failures, "flips": row["flips"],
+                          "failure_rate": failures / runs,
+                          "failure_rate_ci": wilson_interval(failures, runs, confidence)})
+        rates.sort(key=lambda rate: (-rate["flips"], -rate["failure_rate"], rate["test"]))
+        return rates
+
+    def diff(self, run_a: int, run_b: int) -> Dict:
+        """O que mudou de `run_a` para `run_b`: status por teste e estatísticas por endpoint"""
+        def statuses(run_id):
+            rows = self.connection.execute(
+                "SELECT test_name, MAX(status = 'BUG') AS failed FROM results WHERE run_id = ? GROUP BY test_name",
+                (run_id,))
+            return {name: "BUG" if failed else "PASS" for name, failed in rows}
+
+        def latencies(run_id):
+            rows = self.connection.execute("SELECT * FROM endpoint_latency WHERE run_id = ?", (run_id,))
+            return {row["endpoint"]: row for row in rows}
+
+        before, after = statuses(run_a), statuses(run_b)
+        changed = [{"test": name, "before": before[name], "after": after[name]}
+                   for name in sorted(before.keys() & after.keys()) if before[name] != after[name]]
+        latency_before, latency_after = latencies(run_a), latencies(run_b)
+        endpoints = []
+        for endpoint in sorted(latency_before.keys() & latency_after.keys()):
+            old, new = latency_before[endpoint], latency_after[endpoint]
+            endpoints.append({"endpoint": endpoint,
+                              **{stat: {"before": old[stat], "after": new[stat],
+                                        "change": (new[stat] - old[stat]) / old[stat] if old[stat] else None}
+                                 for stat in ("p50_ms", "p95_ms", "p99_ms")}})
+        return {
+            "runs": (run_a, run_b),
+            "new_failures": [c["test"] for c in changed if c["after"] == "BUG"],
+            "fixed": [c["test"] for c in changed if c["after"] == "PASS"],
+            "added": sorted(after.keys() - before.keys()),
+            "removed": sorted(before.keys() - after.keys()),
+            "endpoints": endpoints
+        }
+
+
+def print_diff(diff: Dict):
+    run_a, run_b = diff["runs"]
+    print(f"🔀 Execução {run_a} -> {run_b}")
+    for label, key in (("🐛 Passaram a falhar", "new_failures"), ("✅ Voltaram a passar", "fixed"),
+                       ("➕ Testes novos", "added"), ("➖ Testes removidos", "removed")):
+        if diff[key]:
+            print(f"{label}: {', '.join(diff[key])}")
+    for data in diff["endpoints"]:
+        p95 = data["p95_ms"]
+        change = f" ({p95['change']:+.0%})" if p95["change"] is not None else ""
+        print(f"  {data['endpoint']}: p95 {p95['before']:.1f}ms -> {p95['after']:.1f}ms{change}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas ao histórico de execuções (SQLite)")
+    parser.add_argument("database", help="arquivo do histórico (--history dos testadores)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    runs = commands.add_parser("runs", help="últimas execuções")
+    runs.add_argument("--last", type=int, default=20)
+    first = commands.add_parser("first-failure", help="execução em que o teste começou a falhar")
+    first.add_argument("test")
+    trend = commands.add_parser("trend", help="tendência de latência de um endpoint")
+    trend.add_argument("endpoint", help='rótulo do endpoint, ex.: "GET /users"')
+    trend.add_argument("--statistic", default="p95_ms", choices=STATISTICS)
+    trend.add_argument("--last", type=int, default=500)
+    flaky = commands.add_parser("flaky", help="taxa de falha e trocas de status por teste")
+    flaky.add_argument("--last", type=int, default=100)
+    diff = commands.add_parser("diff", help="diferenças entre duas execuções")
+    diff.add_argument("run_a", type=int)
+    diff.add_argument("run_b", type=int)
+    imported = commands.add_parser("import", help="importa arquivos JSON de resultados antigos")
+    imported.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    with RunHistory(args.database) as history:
+        if args.command == "runs":
+            for run in history.runs(args.last):
+                print(f"#{run['id']} {run['started_at']} {run['mode'] or '-'}: "
+                      f"{run['tests']} testes, {run['bugs']} bugs")
+        elif args.command == "first-failure":
+            run = history.first_failure(args.test)
+            if run is None:
+                print(f"✅ {args.test} passou na última execução em que rodou")
+            else:
+                print(f"🐛 {args.test} falha desde a execução #{run['id']} ({run['started_at']})")
+                if run["bug_description"]:
+                    print(f"   {run['bug_description']}")
+        elif args.command == "trend":
+            result = history.latency_trend(args.endpoint, args.statistic, args.last)
+            for point in result["points"]:
+                print(f"#{point['run_id']} {point['started_at']}: {point['value']:.1f}ms ({point['requests']} req)")
+            if result["trend"]:
+                print(f"📈 Inclinação {result['trend']['slope']:+.3f}ms por execução "
+                      f"(p={result['trend']['p_two_sided']:.3f})")
+        elif args.command == "flaky":
+            for rate in history.flake_rates(args.last):
+                low, high = rate["failure_rate_ci"]
+                print(f"{rate['test']}: {rate['failures']}/{rate['runs']} falhas ({rate['failure_rate']:.0%}, "
+                      f"IC {low:.0%}-{high:.0%}), {rate['flips']} trocas de status")
+        elif args.command == "diff":
+            print_diff(history.diff(args.run_a, args.run_b))
+        elif args.command == "import":
+            for path in args.files:
+                print(f"📥 {path} -> execução #{history.import_json(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,13 @@
-import urllib.request
-import urllib.parse
-import urllib.error
-import json
-import time
-from datetime import datetime
+from async_runner import TestStep
+from crawler import page_params
+from dataset_validator import validate_users
+from delay_sweep import DelaySweep
+from retry_policy import with_classification
+from tester_base import TesterBase
 
-class SimpleAPITester:
-    def __init__(self, base_url="https://cakto-qa-eval.launchify.com.br"):
-        self.base_url = base_url
-        self.bugs_found = []
-        self.test_results = []
-        
-    def log_test(self, test_name, expected, actual, status, bug_description=None):
-        result = {
-            "test_name": test_name,
-            "timestamp": datetime.now().isoformat(),
-            "expected": expected,
-            "actual": actual,
-            "status": status,
-            "bug_description": bug_description
-        }
-        self.test_results.append(result)
-        
-        if status == "BUG":
-            self.bugs_found.append(result)
-            print(f"🐛 BUG ENCONTRADO: {test_name}")
-            print(f"   Esperado: {expected}")
-            print(f"   Atual: {actual}")
-            if bug_description:
-                print(f"   Descrição: {bug_description}")
-            print()
-        else:
-            print(f"✅ {test_name} - {status}")
-    
-    def make_request(self, method, endpoint, data=None, params=None):
-        url = f"{self.base_url}{endpoint}"
-        
-        if params:
-            query_string = urllib.parse.urlencode(params)
-            url += f"?{query_string}"
-        
-        try:
-            json_data = None
-            if data and method.upper() in ["POST", "PUT"]:
-                json_data = json.dumps(data).encode('utf-8')
-            
-            req = urllib.request.Request(url, data=json_data)
-            req.add_header('Content-Type', 'application/json')
-            
-            if method.upper() == "GET":
-                req.get_method = lambda: 'GET'
-            elif method.upper() == "POST":
-                req.get_method = lambda: 'POST'
-            elif method.upper() == "PUT":
-                req.get_method = lambda: 'PUT'
-            elif method.upper() == "DELETE":
-                req.get_method = lambda: 'DELETE'
-            
-            with urllib.request.urlopen(req) as response:
-                response_data = response.read().decode('utf-8')
-                return {
-                    'status_code': response.getcode(),
-                    'data': json.loads(response_data) if response_data else None
-                }
-                
-        except urllib.error.HTTPError as e:
-            try:
-                error_data = e.read().decode('utf-8')
-                return {
-                    'status_code': e.code,
-                    'data': json.loads(error_data) if error_data else None
-                }
-            except:
-                return {
-                    'status_code': e.code,
-                    'data': None
-                }
-        except Exception as e:
-            print(f"Erro na requisição {method} {endpoint}: {e}")
-            return None
+class SimpleAPITester(TesterBase):
+    RESULTS_DIR = "../test-cases"
+    PRINT_PASSES = True
     
     def test_health_endpoint(self):
         print("🔍 Testando endpoint /health...")
@@ -108,7 +37,8 @@ class SimpleAPITester:
     
     def test_get_users(self):
         print("🔍 Testando GET /users...")
-        response = self.make_request("GET", "/users")
+        # Mesma página que a varredura do crawler pede (reaproveitada com --cache)
+        response = self.make_request("GET", "/users", params=page_params(1))
         
         if response:
             if response['status_code'] == 200:
@@ -117,9 +47,9 @@ class SimpleAPITester:
                     self.log_test("GET Users - Estrutura", "Lista de usuários", "Lista de usuários retornada", "PASS")
                     
                     if data['data']:
-                        user = data['data'][0]
-                        required_fields = ["id", "name", "email", "age", "status", "createdAt", "updatedAt"]
-                        missing_fields = [field for field in required_fields if field not in user]
+                        # Todos os usuários da página, não só o primeiro, numa passada por coluna
+                        missing = validate_users(data['data'])["rules"]["missing_fields"]
+                        missing_fields = list(missing["by_field"])
                         
                         if missing_fields:
                             self.log_test("GET Users - Campos obrigatórios", "Todos os campos presentes", 
@@ -147,7 +77,9 @@ class SimpleAPITester:
             "status": "active"
         }
         
-        response = self.make_request("POST", "/users", data=valid_user)
+        response, retry = self.request_classified("POST User - Status", "POST", "/users",
+                                                  lambda r: r is not None and r['status_code'] == 201,
+                                                  data=valid_user, replay=self.repeat_create_user(valid_user))
         
         if response:
             if response['status_code'] == 201:
@@ -161,9 +93,10 @@ class SimpleAPITester:
                                 "Usuário criado deve retornar ID")
             else:
                 self.log_test("POST User - Status", "201 Created", f"{response['status_code']}", "BUG",
-                            "Criação de usuário válido deveria retornar 201 Created")
+                            with_classification("Criação de usuário válido deveria retornar 201 Created", retry))
         else:
-            self.log_test("POST User", "201 Created", "Erro na requisição", "BUG", "Falha na conexão")
+            self.log_test("POST User", "201 Created", "Erro na requisição", "BUG",
+                          with_classification("Falha na conexão", retry))
         
         return None
     
@@ -229,7 +162,8 @@ class SimpleAPITester:
     
     def test_get_user_by_id(self, user_id):
         print(f"🔍 Testando GET /users/{user_id}...")
-        response = self.make_request("GET", f"/users/{user_id}")
+        response, retry = self.request_classified("GET User by ID", "GET", f"/users/{user_id}",
+                                                  lambda r: r is not None and r['status_code'] == 200)
         
         if response:
             if response['status_code'] == 200:
@@ -241,22 +175,25 @@ class SimpleAPITester:
                                 "Dados do usuário retornado não correspondem ao ID solicitado")
             else:
                 self.log_test("GET User by ID", "200 OK", f"{response['status_code']}", "BUG",
-                            "Busca de usuário válido deveria retornar 200 OK")
+                            with_classification("Busca de usuário válido deveria retornar 200 OK", retry))
         else:
-            self.log_test("GET User by ID", "200 OK", "Erro na requisição", "BUG", "Falha na conexão")
+            self.log_test("GET User by ID", "200 OK", "Erro na requisição", "BUG",
+                          with_classification("Falha na conexão", retry))
     
     def test_get_user_invalid_id(self):
         print("🔍 Testando GET /users/99999 (ID inexistente)...")
-        response = self.make_request("GET", "/users/99999")
+        response, retry = self.request_classified("GET User - ID inexistente", "GET", "/users/99999",
+                                                  lambda r: r is not None and r['status_code'] == 404)
         
         if response:
             if response['status_code'] == 404:
                 self.log_test("GET User - ID inexistente", "404 Not Found", f"{response['status_code']} Not Found", "PASS")
             else:
                 self.log_test("GET User - ID inexistente", "404 Not Found", f"{response['status_code']}", "BUG",
-                            "ID inexistente deveria retornar 404 Not Found")
+                            with_classification("ID inexistente deveria retornar 404 Not Found", retry))
         else:
-            self.log_test("GET User - ID inexistente", "404 Not Found", "Erro na requisição", "BUG", "Falha na conexão")
+            self.log_test("GET User - ID inexistente", "404 Not Found", "Erro na requisição", "BUG",
+                          with_classification("Falha na conexão", retry))
     
     def test_update_user(self, user_id):
         print(f"🔍 Testando PUT /users/{user_id}...")
@@ -319,8 +256,10 @@ class SimpleAPITester:
                 self.log_test("Pagination - Página negativa", "400 Bad Request", f"{response['status_code']}", "BUG",
                             "Página negativa deveria retornar 400 Bad Request")
         
-        response = self.make_request("GET", "/users", params={"page": 1, "limit": 10000})
+        # Só o status importa: a lista (possivelmente enorme) é descartada registro a registro
+        response = self.stream_request("GET", "/users", params={"page": 1, "limit": 10000})
         if response:
+            self.drain_stream(response)
             if response['status_code'] == 400:
                 self.log_test("Pagination - Limite excessivo", "400 Bad Request", f"{response['status_code']} Bad Request", "PASS")
             else:
@@ -330,18 +269,27 @@ class SimpleAPITester:
     def test_performance_endpoints(self):
         print("🔍 Testando endpoints de performance...")
         
-        start_time = time.time()
-        response = self.make_request("GET", "/slow-endpoint")
-        end_time = time.time()
-        
-        if response:
-            response_time = end_time - start_time
+        # Atrasos variados em paralelo: a precisão do endpoint é medida no tempo de uma chamada longa
+        report = DelaySweep(self).run()
+        default = report["default"]
+        if default and default["status"] is not None:
+            response_time = default["observed_ms"] / 1000
             if response_time > 5:
                 self.log_test("Performance - Slow Endpoint", "Resposta lenta", f"{response_time:.2f}s", "PASS")
             else:
                 self.log_test("Performance - Slow Endpoint", "Resposta lenta", f"{response_time:.2f}s", "BUG",
                             "Endpoint deveria ser lento (>5s)")
         
+        fit = report["fit"]
+        if fit:
+            actual = (f"observado = {fit['intercept_ms']:.0f}ms + {fit['slope']:.3f} x pedido "
+                      f"(R² {fit['r_squared']:.3f})")
+            if report["accurate"]:
+                self.log_test("Performance - Precisão do atraso", "observado ≈ pedido", actual, "PASS")
+            else:
+                self.log_test("Performance - Precisão do atraso", "observado ≈ pedido", actual, "BUG",
+                            "O tempo de resposta deveria acompanhar o ?delay= pedido")
+        
         response = self.make_request("GET", "/memory-leak")
         if response:
             if response['status_code'] == 200:
@@ -350,49 +298,27 @@ class SimpleAPITester:
                 self.log_test("Performance - Memory Leak", "200 OK", f"{response['status_code']}", "BUG",
                             "Memory leak endpoint deveria retornar 200 OK")
     
-    def run_all_tests(self):
-        print("🚀 Iniciando testes da API de usuários...")
-        print("=" * 50)
-        
-        self.test_health_endpoint()
-        self.test_root_endpoint()
-        self.test_get_users()
-        
-        user_id = self.test_create_user_valid()
-        self.test_create_user_invalid_email()
-        self.test_create_user_empty_name()
-        self.test_create_user_negative_age()
-        
-        if user_id:
-            self.test_get_user_by_id(user_id)
-        self.test_get_user_invalid_id()
-        
-        if user_id:
-            self.test_update_user(user_id)
-        
-        self.test_pagination()
-        self.test_performance_endpoints()
-        
-        if user_id:
-            self.test_delete_user(user_id)
-        
-        print("=" * 50)
-        print(f"✅ Testes concluídos!")
-        print(f"📊 Total de testes: {len(self.test_results)}")
-        print(f"🐛 Bugs encontrados: {len(self.bugs_found)}")
-        print(f"✅ Testes passaram: {len([t for t in self.test_results if t['status'] == 'PASS'])}")
-        print(f"❌ Testes falharam: {len([t for t in self.test_results if t['status'] == 'BUG'])}")
-    
-    def save_results(self):
-        with open("../test-cases/test-results.json", "w", encoding="utf-8") as f:
-            json.dump(self.test_results, f, indent=2, ensure_ascii=False)
-        
-        with open("../test-cases/bugs-found.json", "w", encoding="utf-8") as f:
-            json.dump(self.bugs_found, f, indent=2, ensure_ascii=False)
-        
-        print("💾 Resultados salvos em test-cases/")
+    def build_test_plan(self):
+        # Os POSTs com teste@email.com rodam depois da criação válida e antes do PUT
+        # (que troca o email do usuário criado) para manter o mesmo estado do servidor
+        # (email duplicado) da execução sequencial
+        return [
+            TestStep("health", self.test_health_endpoint),
+            TestStep("root", self.test_root_endpoint),
+            TestStep("get_users", self.test_get_users),
+            TestStep("create_user", self.test_create_user_valid, provides="user_id"),
+            TestStep("create_user_invalid_email", self.test_create_user_invalid_email),
+            TestStep("create_user_empty_name", self.test_create_user_empty_name, after=["create_user"]),
+            TestStep("create_user_negative_age", self.test_create_user_negative_age, after=["create_user"]),
+            TestStep("get_user_by_id", self.test_get_user_by_id, requires=["user_id"]),
+            TestStep("get_user_invalid_id", self.test_get_user_invalid_id),
+            TestStep("update_user", self.test_update_user, requires=["user_id"],
+                     after=["get_user_by_id", "create_user_empty_name", "create_user_negative_age"]),
+            TestStep("pagination", self.test_pagination),
+            TestStep("performance", self.test_performance_endpoints),
+            TestStep("delete_user", self.test_delete_user, requires=["user_id"], after=["update_user"]),
+        ]
 
 if __name__ == "__main__":
-    tester = SimpleAPITester()
-    tester.run_all_tests()
-    tester.save_results()
+    from cli import main
+    main(SimpleAPITester)
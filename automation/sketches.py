@@ -0,0 +1,144 @@
+import math
+from typing import Dict, Optional
+
+# Abaixo disso (em ms) o valor conta como zero: não há bucket logarítmico para 0
+MIN_TRACKED_VALUE = 1e-6
+
+
+class DDSketch:
+    """Sketch de quantis com erro relativo garantido (DDSketch, Masson et al., VLDB 2019)
+
+    Cada valor cai no bucket ceil(log_gamma(v)), com gamma = (1 + a) / (1 - a);
+    o quantil devolvido fica a no máximo `relative_accuracy` (a) do valor real.
+    Só os contadores dos buckets ficam em memória: com a=1%, latências de 1 µs
+    a 1 h cabem em ~1.100 buckets, não importa quantas requisições. Passando de
+    `max_buckets`, os buckets mais baixos são fundidos (os quantis altos, que
+    são os que importam para SLO, continuam exatos dentro do erro).
+
+    Dois sketches com a mesma precisão podem ser somados com merge(), por
+    exemplo os de cada worker ou de cada janela de tempo. Não é thread-safe:
+    quem compartilha o sketch entre threads usa a própria trava.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy precisa estar entre 0 e 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        if value > MIN_TRACKED_VALUE:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            buckets = self.buckets
+            buckets[key] = buckets.get(key, 0) + 1
+            if len(buckets) > self.max_buckets:
+                self._collapse()
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        self.buckets[target] += sum(self.buckets.pop(key) for key in keys[:excess])
+
+    def merge(self, other: "DDSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Só dá para juntar sketches com a mesma precisão")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "DDSketch":
+        sketch = DDSketch(self.relative_accuracy, self.max_buckets)
+        sketch.merge(self)
+        return sketch
+
+    def quantile(self, q: float) -> float:
+        """Valor no quantil q (0 a 1); nan sem valores"""
+        if not self.count:
+            return math.nan
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Meio (em escala relativa) do bucket (gamma^(k-1), gamma^k]
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def count_at_most(self, value: float) -> int:
+        """Quantos valores são <= value, na granularidade dos buckets (erro relativo de até a no limite)"""
+        if value >= self.max:
+            return self.count
+        if value < self.min:
+            return 0
+        total = self.zero_count
+        if value > MIN_TRACKED_VALUE:
+            limit = math.ceil(math.log(value) / self._log_gamma)
+            total += sum(count for key, count in self.buckets.items() if key <= limit)
+        return total
+
+    def percentile(self, pct: float) -> float:
+        return self.quantile(pct / 100.0)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else math.nan
+
+    def to_dict(self) -> Dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "zero_count": self.zero_count,
+            "buckets": {str(key): count for key, count in sorted(self.buckets.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, max_buckets: int = 2048) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], max_buckets)
+        sketch.buckets = {int(key): count for key, count in data["buckets"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if data["count"]:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+def summarize(sketch: Optional[DDSketch], percentiles=(50, 90, 95, 99)) -> Dict[str, float]:
+    """Média, percentis e máximo de um sketch, no formato dos relatórios ({"p95": ...})"""
+    if sketch is None or not sketch.count:
+        return {"mean": math.nan, **{f"p{pct:g}": math.nan for pct in percentiles}, "max": math.nan}
+    return {"mean": sketch.mean, **{f"p{pct:g}": sketch.percentile(pct) for pct in percentiles},
+            "max": sketch.max}
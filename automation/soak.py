@@ -0,0 +1,226 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from load_generator import DEFAULT_SCENARIOS, VirtualUser
+from sketches import DDSketch
+from stats import RunningTrend
+
+
+class SoakTest:
+    """Chama /memory-leak a uma taxa controlada por muito tempo e procura degradação progressiva
+
+    Em paralelo, /health é amostrado a intervalos fixos (e, opcionalmente, um
+    mix de tráfego realista roda à taxa `mix_rate`). Cada série acumula, sem
+    guardar as amostras, uma regressão incremental da latência no tempo e um
+    DDSketch por janela, então a memória não cresce com a duração. Ao final, o
+    teste t da inclinação diz se ela é positiva: a série é considerada em
+    degradação quando a inclinação é significativa na confiança pedida e o
+    aumento previsto ao longo da execução passa de `min_increase` da latência
+    inicial.
+
+    A latência conta a partir do instante agendado de cada requisição (como no
+    OpenLoopGenerator), para que atrasos no cliente também apareçam. Com
+    `max_in_flight` requisições em andamento, as próximas não entram numa fila:
+    são descartadas e contadas como erro da série.
+    """
+
+    def __init__(self, tester, duration: float = 3600.0, rate: float = 1.0, health_interval: float = 5.0,
+                 mix_rate: float = 0.0, window: float = 60.0, confidence: float = 0.95,
+                 min_increase: float = 0.10, endpoint: str = "/memory-leak", seed: Optional[int] = None,
+                 max_in_flight: int = 32):
+        self.tester = tester
+        self.duration = duration
+        self.rate = rate
+        self.health_interval = health_interval
+        self.mix_rate = mix_rate
+        self.window = window
+        self.confidence = confidence
+        self.min_increase = min_increase
+        self.endpoint = endpoint
+        self.seed = seed
+        self.max_in_flight = max_in_flight
+        names = ["memory_leak", "health"] + (["mix"] if mix_rate else [])
+        self.series: Dict[str, Dict] = {name: {"requests": 0, "errors": 0, "dropped": 0, "trend": RunningTrend(),
+                                               "windows": {}}
+                                        for name in names}
+        self._lock = threading.Lock()
+        self._start = 0.0
+
+    def _window(self, data: Dict, offset: float) -> Dict:
+        window = data["windows"].get(int(offset // self.window))
+        if window is None:
+            window = data["windows"][int(offset // self.window)] = {"latency": DDSketch(), "requests": 0,
+                                                                      "errors": 0}
+        return window
+
+    def _record(self, series: str, scheduled: float, response):
+        latency_ms = (time.perf_counter() - scheduled) * 1000
+        offset = scheduled - self._start
+        failed = response is None or response["status_code"] >= 500
+        with self._lock:
+            data = self.series[series]
+            data["requests"] += 1
+            window = self._window(data, offset)
+            window["requests"] += 1
+            window["latency"].add(latency_ms)
+            if failed:
+                data["errors"] += 1
+                window["errors"] += 1
+            else:
+                # Inclinação em ms por hora, para ser legível em execuções longas
+                data["trend"].add(offset / 3600, latency_ms)
+
+    def _dropped(self, series: str, scheduled: float):
+        with self._lock:
+            data = self.series[series]
+            data["requests"] += 1
+            data["errors"] += 1
+            data["dropped"] += 1
+            window = self._window(data, scheduled - self._start)
+            window["requests"] += 1
+            window["errors"] += 1
+
+    def _timed(self, series: str, scheduled: Optional[float], method: str, endpoint: str, data: Dict = None,
+               params: Dict = None):
+        if scheduled is None:
+            scheduled = time.perf_counter()
+        response = self.tester.make_request(method, endpoint, data=data, params=params)
+        self._record(series, scheduled, response)
+        return response
+
+    @staticmethod
+    def _holding(slots: threading.BoundedSemaphore, fire: Callable, scheduled: float):
+        try:
+            fire(scheduled)
+        finally:
+            slots.release()
+
+    def _paced(self, series: str, interval: float, fire: Callable, executor: ThreadPoolExecutor,
+               slots: threading.BoundedSemaphore, stop: threading.Event):
+        # Agenda pelo relógio (i * intervalo) e não pelo fim da chamada anterior: a taxa não cai se o servidor piorar
+        index = 0
+        while True:
+            scheduled = self._start + index * interval
+            if stop.wait(max(scheduled - time.perf_counter(), 0)):
+                return
+            # Sem vaga, a requisição não sairia no horário: numa fila ela só atrasaria as seguintes
+            if slots.acquire(blocking=False):
+                executor.submit(self._holding, slots, fire, scheduled)
+            else:
+                self._dropped(series, scheduled)
+            index += 1
+
+    def run(self) -> Dict:
+        rng = random.Random(self.seed)
+        mix_due: List[float] = []
+
+        def call_mix(*args, **kwargs):
+            # A primeira requisição do cenário conta do horário agendado; as seguintes, do próprio envio
+            return self._timed("mix", mix_due.pop() if mix_due else None, *args, **kwargs)
+
+        mix_user = VirtualUser(0, call_mix, rng)
+        weights = [scenario.weight for scenario in DEFAULT_SCENARIOS]
+        mix_lock = threading.Lock()
+
+        def fire_mix(scheduled: float):
+            # Um único usuário virtual, um cenário por vez: os ids que o mix cria são apagados pelo próprio mix
+            with mix_lock:
+                mix_due[:] = [scheduled]
+                rng.choices(DEFAULT_SCENARIOS, weights)[0].action(mix_user)
+
+        pacers = [("memory_leak", 1.0 / self.rate,
+                   lambda scheduled: self._timed("memory_leak", scheduled, "GET", self.endpoint)),
+                  ("health", self.health_interval, lambda scheduled: self._timed("health", scheduled, "GET", "/health"))]
+        if self.mix_rate:
+            pacers.append(("mix", 1.0 / self.mix_rate, fire_mix))
+
+        stop = threading.Event()
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        self._start = time.perf_counter()
+        try:
+            threads = [threading.Thread(target=self._paced, args=(series, interval, fire, executor, slots, stop),
+                                        daemon=True)
+                       for series, interval, fire in pacers]
+            for thread in threads:
+                thread.start()
+            stop.wait(self.duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - self._start
+        finally:
+            # O que ainda não começou é cancelado; só as requisições já enviadas são esperadas
+            executor.shutdown(wait=True, cancel_futures=True)
+        for user_id in mix_user.created_ids:
+            self.tester.make_request("DELETE", f"/users/{user_id}")
+        return {
+            "duration_s": elapsed,
+            "rate_rps": self.rate,
+            "confidence": self.confidence,
+            "series": {name: self.analyze(data, elapsed) for name, data in self.series.items()}
+        }
+
+    def windows(self, series: Dict) -> List[Dict]:
+        return [{
+            "start_s": index * self.window,
+            "requests": window["requests"],
+            "errors": window["errors"],
+            "p50_ms": window["latency"].percentile(50),
+            "p95_ms": window["latency"].percentile(95)
+        } for index, window in sorted(series["windows"].items())]
+
+    def analyze(self, series: Dict, elapsed: float) -> Dict:
+        running = series["trend"]
+        report = {
+            "requests": series["requests"],
+            "errors": series["errors"],
+            "dropped": series["dropped"],
+            "windows": self.windows(series),
+            "trend": None,
+            "verdict": "inconclusivo"
+        }
+        if running.n < 10 or running.sxx <= 0:
+            return report
+
+        trend = running.result()
+        baseline = trend["intercept"]
+        increase = trend["slope"] * elapsed / 3600
+        relative = increase / baseline if baseline > 0 else float("inf")
+        significant = trend["p_greater"] < 1 - self.confidence
+        report["trend"] = {
+            "slope_ms_per_hour": trend["slope"],
+            "baseline_ms": baseline,
+            "increase_over_run_ms": increase,
+            "relative_increase": relative,
+            "r_squared": trend["r_squared"],
+            "t": trend["t"],
+            "p_value": trend["p_greater"]
+        }
+        if significant and relative >= self.min_increase:
+            report["verdict"] = "degradação"
+        elif significant:
+            report["verdict"] = "tendência leve"
+        else:
+            report["verdict"] = "estável"
+        return report
+
+
+def print_soak_report(report: Dict):
+    print("=" * 50)
+    print(f"🕰️ Soak de {report['duration_s'] / 60:.1f} min a {report['rate_rps']:g} req/s "
+          f"(confiança {report['confidence']:.0%})")
+    for name, data in report["series"].items():
+        trend = data["trend"]
+        dropped = f" ({data['dropped']} descartadas com o pool cheio)" if data["dropped"] else ""
+        print(f"  {name}: {data['verdict']} - {data['requests']} req, {data['errors']} erros{dropped}")
+        if trend:
+            print(f"     {trend['baseline_ms']:.1f} ms no início, {trend['slope_ms_per_hour']:+.1f} ms/h "
+                  f"({trend['relative_increase']:+.0%} na execução, p={trend['p_value']:.4f}, "
+                  f"R² {trend['r_squared']:.3f})")
+        for window in data["windows"]:
+            print(f"     {window['start_s']:>7.0f}s  p50 {window['p50_ms']:7.1f} ms  p95 {window['p95_ms']:7.1f} ms"
+                  f"  {window['requests']:>5} req  {window['errors']} erros")
@@ -0,0 +1,529 @@
+import argparse
+import copy
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from transport import mount_app, unmount_app
+
+# Mesmos usuários iniciais do index.js, inclusive os dados com problemas
+SEED_USERS = [
+    {"id": 1, "name": "João Silva", "email": "joao@email.com", "age": 28, "status": "active", "createdAt": "2024-01-15T10:30:00Z", "updatedAt": "2024-01-15T10:30:00Z"},
+    {"id": 2, "name": "Maria Santos", "email": "maria@email.com", "age": 32, "status": "active", "createdAt": "2024-01-16T14:20:00Z", "updatedAt": "2024-01-16T14:20:00Z"},
+    {"id": 3, "name": "Pedro Costa", "email": "pedro@email.com", "age": 45, "status": "inactive", "createdAt": "2024-01-17T09:15:00Z", "updatedAt": "2024-01-17T09:15:00Z"},
+    {"id": 4, "name": "Ana Oliveira", "email": "ana@email.com", "age": 29, "status": "active", "createdAt": "2024-01-18T16:45:00Z", "updatedAt": "2024-01-18T16:45:00Z"},
+    {"id": 5, "name": "Carlos Pereira", "email": "carlos@email.com", "age": 35, "status": "active", "createdAt": "2024-01-19T11:30:00Z", "updatedAt": "2024-01-19T11:30:00Z"},
+    {"id": 6, "name": "Lucia Ferreira", "email": "maria@email.com", "age": 27, "status": "active", "createdAt": "2024-01-20T08:20:00Z", "updatedAt": "2024-01-20T08:20:00Z"},
+    {"id": 7, "name": "Roberto Lima", "email": "roberto@email.com", "age": "thirty", "status": "active", "createdAt": "2024-01-21T13:10:00Z", "updatedAt": "2024-01-21T13:10:00Z"},
+    {"id": 8, "name": "Fernanda Souza", "email": "fernanda@email.com", "age": 31, "status": "pending", "createdAt": "2024-01-22T15:25:00Z", "updatedAt": "2024-01-22T15:25:00Z"},
+    {"id": 9, "name": "Ricardo Alves", "email": "ricardo@email.com", "age": 40, "status": "active", "createdAt": "2024-01-23T12:00:00Z", "updatedAt": "2024-01-23T12:00:00Z"},
+    {"id": 10, "name": "Juliana Rocha", "email": "juliana@email.com", "age": 26, "status": "inactive", "createdAt": "2024-01-24T10:45:00Z", "updatedAt": "2024-01-24T10:45:00Z"},
+    {"id": 11, "name": "", "email": "empty@email.com", "age": 25, "status": "active", "createdAt": "2024-01-25T09:30:00Z", "updatedAt": "2024-01-25T09:30:00Z"},
+    {"id": 12, "name": "Sandra Mendes", "email": "invalid-email", "age": 33, "status": "active", "createdAt": "2024-01-26T14:15:00Z", "updatedAt": "2024-01-26T14:15:00Z"},
+]
+
+EMAIL_REGEX = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
+_PARSE_INT = re.compile(r"^[+-]?(0[xX][0-9a-fA-F]+|\d+)")
+_USER_ROUTE = re.compile(r"^/users/([^/]*)$")
+# setTimeout do Node trata atrasos inválidos ou acima de 2^31-1 ms como 1 ms
+_MAX_TIMEOUT_MS = 2 ** 31 - 1
+
+# Resposta de uma rota: (status, corpo JSON), com corpo None para respostas vazias
+Reply = Tuple[int, Optional[object]]
+
+
+class _JSError(Exception):
+    """Erro que no Fastify cairia no setErrorHandler (sempre responde 500)"""
+
+    def __init__(self, name: str, message: str):
+        super().__init__(message)
+        self.name = name
+
+
+# --- Semântica de JavaScript usada pelo index.js -------------------------------
+
+def _truthy(value) -> bool:
+    if value is None or value is False:
+        return False
+    if isinstance(value, (int, float)):
+        return value == value and value != 0
+    if isinstance(value, str):
+        return value != ""
+    return True
+
+
+def _js_string(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, list):
+        return ",".join("" if item is None else _js_string(item) for item in value)
+    if isinstance(value, dict):
+        return "[object Object]"
+    return str(value)
+
+
+def _parse_int(value) -> Optional[int]:
+    """parseInt() do JavaScript; None faz o papel de NaN"""
+    match = _PARSE_INT.match(_js_string(value).lstrip())
+    if not match:
+        return None
+    text = match.group(0)
+    sign = -1 if text.startswith("-") else 1
+    digits = text.lstrip("+-")
+    return sign * (int(digits, 16) if digits[:2].lower() == "0x" else int(digits))
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _strict_equal(a, b) -> bool:
+    """Operador === (objetos e arrays vindos do JSON nunca são o mesmo objeto)"""
+    if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+        return a is b
+    if _is_number(a) and _is_number(b):
+        return a == b
+    return type(a) is type(b) and a == b
+
+
+def _lower(value) -> str:
+    if not isinstance(value, str):
+        raise _JSError("TypeError", f"{_js_string(value)}.toLowerCase is not a function")
+    return value.lower()
+
+
+def _js_slice(items: list, start: Optional[int], end: Optional[int]) -> list:
+    # Array.prototype.slice converte NaN em 0; índices negativos contam do fim como em Python
+    return items[start or 0:end or 0]
+
+
+def _ceil_div(total: int, divisor: Optional[int]):
+    # Math.ceil(total / limit): NaN e Infinity viram null no JSON
+    if divisor is None or divisor == 0:
+        return None
+    return math.ceil(total / divisor)
+
+
+def _iso_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _parse_json_number(text: str):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def _reject_constant(name: str):
+    raise ValueError(f"Unexpected token {name[0]} in JSON")
+
+
+def _reject_proto(pairs):
+    for key, _ in pairs:
+        if key == "__proto__":
+            raise _JSError("SyntaxError", "Object contains forbidden prototype property")
+    return dict(pairs)
+
+
+class StandinAPI:
+    """Réplica em Python da API Fastify do index.js, para rodar os testes sem rede
+
+    Tem as mesmas rotas, os mesmos usuários iniciais e as mesmas respostas
+    aleatórias, e os sorteios acontecem na mesma ordem (e com o mesmo
+    curto-circuito) do código JavaScript. Com `seed`, cada requisição sorteia de
+    um gerador derivado da semente, da requisição (método, caminho e corpo) e de
+    quantas vezes ela já foi feita, então a ordem de chegada de requisições
+    concorrentes não altera os resultados de uma execução para outra.
+
+    - `time_scale`: multiplica o atraso de /slow-endpoint (0 responde na hora)
+    - `allocate_memory`: /memory-leak monta de fato o array de 100 mil strings
+    """
+
+    def __init__(self, seed: int = None, time_scale: float = 1.0, allocate_memory: bool = False):
+        self.seed = seed
+        self.time_scale = time_scale
+        self.allocate_memory = allocate_memory
+        self.random = random.Random(seed)
+        self.users = copy.deepcopy(SEED_USERS)
+        self.next_id = 13
+        self._occurrences = Counter()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Volta aos usuários iniciais e recomeça a sequência de sorteios"""
+        with self._lock:
+            self.random = random.Random(self.seed)
+            self.users = copy.deepcopy(SEED_USERS)
+            self.next_id = 13
+            self._occurrences.clear()
+
+    def _random_for(self, method: str, target: str, body: Optional[bytes]) -> random.Random:
+        if self.seed is None:
+            return self.random
+        key = (method, target, hashlib.sha1(body or b"").hexdigest())
+        occurrence = self._occurrences[key]
+        self._occurrences[key] += 1
+        return random.Random(f"{self.seed}:{method}:{target}:{key[2]}:{occurrence}")
+
+    # --- Entrada comum aos dois modos (loopback e em memória) ---
+
+    def handle(self, method: str, target: str, headers: Dict[str, str] = None,
+               body: bytes = None) -> Tuple[int, str, Dict[str, str], bytes]:
+        parts = urllib.parse.urlsplit(target)
+        path = parts.path or "/"
+        query = {}
+        for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True):
+            # Como o querystring do Node: chaves repetidas viram array
+            if key not in query:
+                query[key] = value
+            elif isinstance(query[key], list):
+                query[key].append(value)
+            else:
+                query[key] = [query[key], value]
+        head = method.upper() == "HEAD"
+        method = "GET" if head else method.upper()
+
+        if method == "GET" and path == "/slow-endpoint":
+            # Não segura a trava durante a espera
+            status, payload = self.slow_endpoint(query)
+        else:
+            with self._lock:
+                self.random = self._random_for(method, target, body)
+                status, payload = self._dispatch(method, path, query, headers or {}, body)
+
+        data = b"" if payload is None else json.dumps(
+            payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        response_headers = {"content-length": str(len(data))}
+        if payload is not None:
+            response_headers["content-type"] = "application/json; charset=utf-8"
+        return status, _REASONS.get(status, ""), response_headers, b"" if head else data
+
+    def _dispatch(self, method: str, path: str, query: Dict, headers: Dict[str, str],
+                  body: Optional[bytes]) -> Reply:
+        user_match = _USER_ROUTE.match(path)
+        try:
+            if method == "GET" and path == "/":
+                return self.root()
+            if method == "GET" and path == "/health":
+                return self.health()
+            if method == "GET" and path == "/users":
+                return self.list_users(query)
+            if method == "POST" and path == "/users":
+                return self.create_user(self._parse_body(method, headers, body))
+            if method == "GET" and path == "/memory-leak":
+                return self.memory_leak()
+            if user_match:
+                user_id = urllib.parse.unquote(user_match.group(1))
+                if method == "GET":
+                    return self.get_user(user_id)
+                if method == "PUT":
+                    return self.update_user(user_id, self._parse_body(method, headers, body))
+                if method == "DELETE":
+                    self._parse_body(method, headers, body)
+                    return self.delete_user(user_id)
+        except _JSError as e:
+            return self.error_handler(e)
+        return 404, {"message": f"Route {method}:{path} not found", "error": "Not Found", "statusCode": 404}
+
+    def _parse_body(self, method: str, headers: Dict[str, str], body: Optional[bytes]):
+        """Parser de corpo do Fastify: JSON, texto puro ou erro (que vira 500 no error handler)"""
+        headers = {key.lower(): value for key, value in headers.items()}
+        content_type = headers.get("content-type")
+        has_body = "content-length" in headers or "transfer-encoding" in headers or body is not None
+        if method == "DELETE" and (content_type is None or not has_body):
+            return None
+        if content_type is None:
+            if not body:
+                return None
+            raise _JSError("FastifyError", "Unsupported Media Type: ")
+        media_type = content_type.split(";", 1)[0].strip().lower()
+        text = (body or b"").decode("utf-8", errors="replace")
+        if media_type == "text/plain":
+            return text
+        if media_type != "application/json":
+            raise _JSError("FastifyError", f"Unsupported Media Type: {content_type}")
+        if text == "":
+            raise _JSError("FastifyError", "Body cannot be empty when content-type is set to 'application/json'")
+        try:
+            return json.loads(text, parse_float=_parse_json_number, parse_constant=_reject_constant,
+                              object_pairs_hook=_reject_proto)
+        except ValueError as e:
+            raise _JSError("SyntaxError", str(e))
+
+    @staticmethod
+    def _fields(body) -> Dict:
+        # const { name, ... } = request.body || {}: só objetos têm esses campos
+        return body if isinstance(body, dict) else {}
+
+    def _find_index(self, user_id: int) -> int:
+        for index, user in enumerate(self.users):
+            if _strict_equal(user["id"], user_id):
+                return index
+        return -1
+
+    # --- Rotas ---
+
+    def root(self) -> Reply:
+        return 200, {
+            "message": "Cakto QA Evaluation API",
+            "version": "1.0.0",
+            "endpoints": {"users": "/users", "health": "/health"}
+        }
+
+    def health(self) -> Reply:
+        return 200, {"status": "OK", "timestamp": _iso_now()}
+
+    def list_users(self, query: Dict) -> Reply:
+        page_num = _parse_int(query.get("page", 1))
+        limit_num = _parse_int(query.get("limit", 10))
+        offset = None if page_num is None or limit_num is None else (page_num - 1) * limit_num
+
+        filtered = list(self.users)
+        status = query.get("status")
+        if _truthy(status):
+            filtered = [user for user in filtered if _strict_equal(user["status"], status)]
+        search = query.get("search")
+        if _truthy(search):
+            term = _lower(search)
+            filtered = [user for user in filtered
+                        if term in _lower(user["name"]) or term in _lower(user["email"])]
+
+        end = None if offset is None else offset + limit_num
+        paginated = _js_slice(filtered, offset, end)
+
+        if self.random.random() > 0.8:
+            return 200, paginated
+        return 200, {
+            "data": paginated,
+            "pagination": {
+                "page": page_num,
+                "limit": limit_num,
+                "total": len(filtered),
+                "totalPages": _ceil_div(len(filtered), limit_num)
+            }
+        }
+
+    def get_user(self, raw_id: str) -> Reply:
+        user_id = _parse_int(raw_id)
+        if user_id is None:
+            return 400, {"error": "Invalid user ID"}
+        index = self._find_index(user_id)
+        if index == -1:
+            status = 500 if self.random.random() > 0.7 else 404
+            return status, {"error": "User not found" if status == 404 else "Internal server error"}
+        return 200, {"data": self.users[index]}
+
+    def create_user(self, body) -> Reply:
+        fields = self._fields(body)
+        name = fields.get("name")
+        email = fields.get("email")
+        age = fields.get("age")
+        status = fields.get("status", "active")
+
+        if not _truthy(name) and self.random.random() > 0.3:
+            return 400, {"error": "Name is required"}
+        if not _truthy(email):
+            return 400, {"error": "Email is required"}
+        if not EMAIL_REGEX.match(_js_string(email)) and self.random.random() > 0.4:
+            return 400, {"error": "Invalid email format"}
+        duplicate = any(_strict_equal(user["email"], email) for user in self.users)
+        if duplicate and self.random.random() > 0.5:
+            return 409, {"error": "Email already exists"}
+        if _truthy(age) and (not _is_number(age) or age < 0 or age > 150):
+            return 400, {"error": "Age must be a valid number between 0 and 150"}
+        if not _truthy(status):
+            return 400, {"error": "Invalid status. Must be: active, inactive, or pending"}
+
+        now = _iso_now()
+        new_user = {
+            "id": self.next_id,
+            "name": name if _truthy(name) else "",
+            "email": email,
+            "age": age if _truthy(age) else None,
+            "status": status,
+            "createdAt": now,
+            "updatedAt": now
+        }
+        self.next_id += 1
+        self.users.append(new_user)
+
+        code = 200 if self.random.random() > 0.8 else 201
+        return code, {"message": "User created successfully", "data": new_user}
+
+    def update_user(self, raw_id: str, body) -> Reply:
+        fields = self._fields(body)
+        user_id = _parse_int(raw_id)
+        if user_id is None:
+            return 400, {"error": "Invalid user ID"}
+        index = self._find_index(user_id)
+        if index == -1:
+            return 404, {"error": "User not found"}
+
+        existing = self.users[index]
+        should_update_timestamp = self.random.random() > 0.2
+        email = fields.get("email")
+        if _truthy(email) and self.random.random() > 0.6:
+            if not EMAIL_REGEX.match(_js_string(email)):
+                return 400, {"error": "Invalid email format"}
+
+        updated = dict(existing)
+        for key in ("name", "email", "age", "status"):
+            if key in fields:
+                updated[key] = fields[key]
+        updated["updatedAt"] = _iso_now() if should_update_timestamp else existing["updatedAt"]
+        self.users[index] = updated
+        return 200, {"message": "User updated successfully", "data": updated}
+
+    def delete_user(self, raw_id: str) -> Reply:
+        user_id = _parse_int(raw_id)
+        if user_id is None:
+            return 400, {"error": "Invalid user ID"}
+        index = self._find_index(user_id)
+        if index == -1:
+            return 404, {"error": "User not found"}
+        deleted = self.users.pop(index)
+        if self.random.random() > 0.5:
+            return 204, None
+        return 200, {"message": "User deleted successfully", "data": deleted}
+
+    def memory_leak(self) -> Reply:
+        size = 100000
+        if self.allocate_memory:
+            size = len([f"Memory leak test data {i}" * 100 for i in range(size)])
+        return 200, {"message": "Memory leak test completed", "size": size}
+
+    def slow_endpoint(self, query: Dict) -> Reply:
+        delay = query.get("delay")
+        if not _truthy(delay):
+            delay = 5000
+        delay_ms = _parse_int(delay)
+        if delay_ms is None or delay_ms < 1 or delay_ms > _MAX_TIMEOUT_MS:
+            delay_ms = 1
+        time.sleep(delay_ms * self.time_scale / 1000)
+        return 200, {"message": "Slow endpoint completed", "delay": delay}
+
+    def error_handler(self, error: _JSError) -> Reply:
+        if self.random.random() > 0.7:
+            return 500, {
+                "error": "Internal server error",
+                "details": str(error),
+                "stack": f"{error.name}: {error}\n    at standin_server"
+            }
+        return 500, {"error": "Internal server error"}
+
+    # --- Formas de execução ---
+
+    def mount(self, name: str = "standin") -> str:
+        """Atende requisições a memory://<name> direto no processo, sem sockets"""
+        mount_app(name, self)
+        return f"memory://{name}"
+
+    def unmount(self, name: str = "standin"):
+        unmount_app(name)
+
+
+_REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+            409: "Conflict", 500: "Internal Server Error"}
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    api: StandinAPI = None
+
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+        status, reason, headers, data = self.api.handle(self.command, self.path, dict(self.headers), body)
+        self.send_response(status, reason)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = do_PATCH = do_OPTIONS = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandinHTTPServer(ThreadingHTTPServer):
+    # A fila padrão (5) atrasa em ~1 s as conexões simultâneas que excedem o backlog
+    request_queue_size = 128
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Cliente que desiste da requisição (ex.: prazo esgotado) não é erro do servidor
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StandinServer:
+    """Serve uma StandinAPI em HTTP no loopback, numa thread em segundo plano"""
+
+    def __init__(self, api: StandinAPI = None, host: str = "127.0.0.1", port: int = 0):
+        self.api = api or StandinAPI()
+        handler = type("Handler", (_StandinHandler,), {"api": self.api})
+        self._server = _StandinHTTPServer((host, port), handler)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self):
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Réplica local da API de usuários")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--seed", type=int, help="semente das respostas aleatórias")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="fator do atraso de /slow-endpoint")
+    args = parser.parse_args()
+
+    server = StandinServer(StandinAPI(args.seed, args.time_scale), args.host, args.port)
+    print(f"🧪 API local em {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,163 @@
+import math
+from statistics import NormalDist
+from typing import Dict, Sequence, Tuple
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Percentil com interpolação linear sobre valores já ordenados"""
+    if not sorted_values:
+        return math.nan
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def z_score(confidence: float) -> float:
+    """Quantil bilateral da normal padrão para o nível de confiança (ex.: 0.95 -> 1.96)"""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes: int, n: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Intervalo de Wilson para uma proporção; continua útil com poucas amostras ou p perto de 0/1"""
+    if n == 0:
+        return 0.0, 1.0
+    z = z_score(confidence)
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def linear_fit(xs: Sequence[float], ys: Sequence[float]) -> Tuple[float, float, float]:
+    """Regressão linear por mínimos quadrados: (inclinação, intercepto, R²)"""
+    n = len(xs)
+    if n < 2:
+        raise ValueError("São necessários ao menos dois pontos")
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if sxx == 0:
+        raise ValueError("Os valores de x precisam variar")
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    residual = sum((y - (intercept + slope * x)) ** 2 for x, y in zip(xs, ys))
+    r_squared = 1.0 - residual / syy if syy else 1.0
+    return slope, intercept, r_squared
+
+
+def _beta_continued_fraction(a: float, b: float, x: float) -> float:
+    # Fração contínua de Lentz para a função beta incompleta (Numerical Recipes, betacf)
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-12:
+            break
+    return h
+
+
+def incomplete_beta(a: float, b: float, x: float) -> float:
+    """Função beta incompleta regularizada I_x(a, b)"""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    log_front = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                 + a * math.log(x) + b * math.log(1.0 - x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return math.exp(log_front) * _beta_continued_fraction(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _beta_continued_fraction(b, a, 1.0 - x) / b
+
+
+def student_t_cdf(t: float, df: float) -> float:
+    """Distribuição acumulada t de Student com `df` graus de liberdade"""
+    tail = 0.5 * incomplete_beta(df / 2.0, 0.5, df / (df + t * t))
+    return 1.0 - tail if t > 0 else tail
+
+
+def _slope_test(slope: float, intercept: float, r_squared: float, residual: float, sxx: float,
+                n: int) -> Dict[str, float]:
+    df = n - 2
+    stderr = math.sqrt(residual / df / sxx) if df > 0 else math.inf
+    if stderr == 0:
+        t = math.copysign(math.inf, slope) if slope else 0.0
+        p_greater = 0.0 if slope > 0 else 1.0
+    elif math.isinf(stderr):
+        t, p_greater = 0.0, 1.0
+    else:
+        t = slope / stderr
+        p_greater = 1.0 - student_t_cdf(t, df)
+    p_two_sided = min(1.0, 2 * min(p_greater, 1.0 - p_greater))
+    return {"slope": slope, "intercept": intercept, "r_squared": r_squared, "stderr": stderr,
+            "t": t, "df": df, "p_greater": p_greater, "p_two_sided": p_two_sided}
+
+
+def trend_test(xs: Sequence[float], ys: Sequence[float]) -> Dict[str, float]:
+    """Regressão linear com teste t da inclinação (H0: inclinação = 0)
+
+    Devolve inclinação, intercepto, R², erro padrão da inclinação, estatística
+    t e os p-valores unilateral (inclinação > 0) e bilateral.
+    """
+    slope, intercept, r_squared = linear_fit(xs, ys)
+    n = len(xs)
+    mean_x = sum(xs) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    residual = sum((y - (intercept + slope * x)) ** 2 for x, y in zip(xs, ys))
+    return _slope_test(slope, intercept, r_squared, residual, sxx, n)
+
+
+class RunningTrend:
+    """trend_test incremental: acumula médias e co-momentos (Welford) em vez de guardar os pontos"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.sxx = 0.0
+        self.syy = 0.0
+        self.sxy = 0.0
+
+    def add(self, x: float, y: float):
+        self.n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        dy = y - self.mean_y
+        self.mean_y += dy / self.n
+        self.sxx += dx * (x - self.mean_x)
+        self.syy += dy * (y - self.mean_y)
+        self.sxy += dx * (y - self.mean_y)
+
+    def result(self) -> Dict[str, float]:
+        if self.n < 2:
+            raise ValueError("São necessários ao menos dois pontos")
+        if self.sxx <= 0:
+            raise ValueError("Os valores de x precisam variar")
+        slope = self.sxy / self.sxx
+        intercept = self.mean_y - slope * self.mean_x
+        residual = max(self.syy - slope * self.sxy, 0.0)
+        r_squared = 1.0 - residual / self.syy if self.syy else 1.0
+        return _slope_test(slope, intercept, r_squared, residual, self.sxx, self.n)
@@ -0,0 +1,219 @@
+import json
+import time
+import urllib.parse
+import uuid
+from collections import Counter
+from typing import Dict, Tuple
+
+from async_runner import run_plan
+from deadlines import DeadlineExceeded
+from json_stream import JSONListStream
+from latency_slo import DEFAULT_SLOS, check_latency_slos
+from metrics import TesterMetrics, write_metrics
+from request_timing import RequestTimings, print_timing_summary, print_transfer_summary
+from results_sink import JSONLResultSink, export_legacy, write_json_array
+from results_store import ResultStore
+from retry_policy import print_retry_report
+from transport import HTTPTransport, Response, endpoint_label, get_default_transport, open_stream
+
+
+def build_url(base_url: str, endpoint: str, params: Dict = None) -> str:
+    url = f"{base_url}{endpoint}"
+    if params:
+        url += f"?{urllib.parse.urlencode(params)}"
+    return url
+
+
+def send_json(transport: HTTPTransport, timings: RequestTimings, method: str, url: str, label: str,
+              data: Dict = None, timeout: float = None) -> Tuple[Response, object]:
+    """Envia a requisição (corpo em JSON para POST/PUT) e devolve (resposta, corpo decodificado).
+    Um JSON inválido só é erro em respostas < 400; nas de erro o corpo vira None"""
+    json_data = None
+    if data and method.upper() in ["POST", "PUT"]:
+        json_data = json.dumps(data).encode('utf-8')
+
+    response = transport.request(method.upper(), url, body=json_data,
+                                 headers={'Content-Type': 'application/json'}, timeout=timeout)
+    decode_start = time.perf_counter()
+    response_data = response.body.decode('utf-8')
+    try:
+        parsed = json.loads(response_data) if response_data else None
+        decode_error = None
+    except ValueError as e:
+        parsed, decode_error = None, e
+    timings.record(label, response.status,
+                   dict(response.timings, json=(time.perf_counter() - decode_start) * 1000), response)
+
+    if response.status < 400 and decode_error:
+        raise decode_error
+    return response, parsed
+
+
+def open_json_stream(transport: HTTPTransport, timings: RequestTimings, method: str, url: str, label: str,
+                     timeout: float = None) -> Tuple[Response, JSONListStream]:
+    """Abre a resposta em stream e devolve (resposta, JSONListStream); os tempos são
+    registrados quando a leitura da lista termina (ou é interrompida)"""
+    response = open_stream(transport, method.upper(), url, timeout=timeout)
+
+    def chunks():
+        start = time.perf_counter()
+        try:
+            yield from response.iter_chunks()
+        finally:
+            # Fora a leitura do socket, o tempo da iteração é o do parser (e de quem consome os itens)
+            elapsed = (time.perf_counter() - start) * 1000
+            timings.record(label, response.status,
+                           dict(response.timings, json=max(elapsed - response.timings["body"], 0.0)), response)
+
+    return response, JSONListStream(chunks())
+
+
+class TesterBase:
+    """Estado e infraestrutura comuns a APITester e SimpleAPITester; cada um define
+    RESULTS_DIR, response_fields (o formato do dict devolvido) e build_test_plan"""
+    RESULTS_DIR = "test-cases"
+    # SimpleAPITester também imprime uma linha por teste que passou
+    PRINT_PASSES = False
+
+    def __init__(self, base_url="https://cakto-qa-eval.launchify.com.br", transport=None):
+        self.base_url = base_url
+        self.transport = transport or get_default_transport()
+        self.timings = RequestTimings()
+        self.test_results = ResultStore()
+        self.bugs_found = self.test_results.bugs
+        self.status_counts = Counter()
+        self.bug_counts = Counter()
+        self.results_sink = None
+        self.keep_results = True
+        self.retry_classifier = None
+        self.latency_slos = DEFAULT_SLOS
+        self.metrics_path = None
+
+    def log_test(self, test_name, expected, actual, status, bug_description=None, timings=None):
+        if timings is None:
+            timings = self.timings.drain()
+        self.status_counts[status] += 1
+        if status == "BUG":
+            self.bug_counts[test_name] += 1
+        if self.keep_results:
+            self.test_results.append(test_name, expected, actual, status, bug_description, timings)
+        if self.results_sink:
+            self.results_sink.write(
+                self.test_results.build_record(test_name, expected, actual, status, bug_description, timings))
+
+        if status == "BUG":
+            print(f"🐛 BUG ENCONTRADO: {test_name}")
+            print(f"   Esperado: {expected}")
+            print(f"   Atual: {actual}")
+            if bug_description:
+                print(f"   Descrição: {bug_description}")
+            print()
+        elif self.PRINT_PASSES:
+            print(f"✅ {test_name} - {status}")
+
+    def response_fields(self, response):
+        """Campos de make_request/stream_request além do corpo"""
+        return {'status_code': response.status}
+
+    def make_request(self, method, endpoint, data=None, params=None, timeout=None):
+        try:
+            response, parsed = send_json(self.transport, self.timings, method,
+                                         build_url(self.base_url, endpoint, params),
+                                         endpoint_label(method, endpoint), data=data, timeout=timeout)
+            return dict(self.response_fields(response), data=parsed)
+        except DeadlineExceeded:
+            # O prazo vale para o teste inteiro: quem o impôs (run_plan) registra a interrupção
+            raise
+        except Exception as e:
+            print(f"Erro na requisição {method} {endpoint}: {e}")
+            return None
+
+    def stream_request(self, method, endpoint, params=None, timeout=None):
+        """Como make_request, mas 'items' é um JSONListStream: a lista é lida registro a registro do socket"""
+        try:
+            response, items = open_json_stream(self.transport, self.timings, method,
+                                               build_url(self.base_url, endpoint, params),
+                                               endpoint_label(method, endpoint), timeout=timeout)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Erro na requisição {method} {endpoint}: {e}")
+            return None
+        return dict(self.response_fields(response), items=items)
+
+    def drain_stream(self, response):
+        """Lê e descarta o resto da lista; devolve quantos itens ela tinha (None se o corpo falhou)"""
+        try:
+            return response['items'].drain()
+        except DeadlineExceeded:
+            raise
+        except (ValueError, OSError) as e:
+            print(f"Erro lendo a resposta em stream: {e}")
+            return None
+        finally:
+            response['items'].close()
+
+    def request_classified(self, test_name, method, endpoint, is_expected, data=None, params=None, replay=None):
+        """make_request que, com um FailureClassifier configurado, repete a requisição quando
+        a resposta não é a esperada e devolve também o rótulo da falha (ou None)"""
+        def attempt():
+            return self.make_request(method, endpoint, data=data, params=params)
+        if self.retry_classifier is None:
+            return attempt(), None
+        return self.retry_classifier.run(test_name, method, attempt, is_expected, replay=replay)
+
+    def repeat_create_user(self, user):
+        """POST equivalente com outro email (para não conflitar com o original) que remove o usuário criado"""
+        def replay():
+            response = self.make_request("POST", "/users",
+                                         data=dict(user, email=f"repeticao-{uuid.uuid4().hex[:12]}@email.com"))
+            body = response['data'] if response and isinstance(response['data'], dict) else {}
+            created = body.get('data', body)
+            if isinstance(created, dict) and created.get('id') is not None:
+                self.make_request("DELETE", f"/users/{created['id']}")
+            return response
+        return replay
+
+    def build_test_plan(self):
+        raise NotImplementedError
+
+    def run_all_tests(self, max_concurrency=8, test_timeout=None, suite_budget=None):
+        print("🚀 Iniciando testes da API de usuários...")
+        print("=" * 50)
+
+        run_plan(self, self.build_test_plan(), max_concurrency=max_concurrency,
+                 capture_kwargs=lambda: {"timings": self.timings.drain()},
+                 test_timeout=test_timeout, suite_budget=suite_budget)
+        if self.latency_slos:
+            check_latency_slos(self.log_test, self.timings.sketches(), self.latency_slos)
+
+        print("=" * 50)
+        summary = self.timings.summary()
+        print_timing_summary(summary)
+        print_transfer_summary(summary)
+        if self.retry_classifier:
+            print_retry_report(self.retry_classifier.summary())
+        print(f"✅ Testes concluídos!")
+        print(f"📊 Total de testes: {sum(self.status_counts.values())}")
+        print(f"🐛 Bugs encontrados: {self.status_counts['BUG']}")
+        print(f"✅ Testes passaram: {self.status_counts['PASS']}")
+        print(f"❌ Testes falharam: {self.status_counts['BUG']}")
+        if self.metrics_path:
+            write_metrics(TesterMetrics(self), self.metrics_path)
+
+    def stream_results(self, path, keep_in_memory=False, **sink_options):
+        """Grava cada resultado em JSONL assim que é registrado, em vez de só no fim"""
+        self.results_sink = JSONLResultSink(path, **sink_options)
+        self.keep_results = keep_in_memory
+
+    def save_results(self):
+        results_path = f"{self.RESULTS_DIR}/test-results.json"
+        bugs_path = f"{self.RESULTS_DIR}/bugs-found.json"
+        if self.results_sink:
+            self.results_sink.close()
+            export_legacy(self.results_sink.path, results_path, bugs_path)
+        else:
+            write_json_array(self.test_results, results_path)
+            write_json_array(self.bugs_found, bugs_path)
+
+        print("💾 Resultados salvos em test-cases/")
@@ -1,29 +1,72 @@
-import urllib.request
-import urllib.parse
-import urllib.error
-import json
-import time
-from datetime import datetime
+import os
+import sys
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from crawler import PAGE_LIMIT, DuplicateIndex, crawl_users, page_params
+from dataset_validator import DatasetValidator, UserColumns
+from deadlines import DeadlineExceeded, deadline
+from request_timing import RequestTimings, print_timing_summary, print_transfer_summary
+from results_sink import JSONLResultSink, export_legacy, write_json_array
+from response_cache import CachingTransport
+from results_store import ResultStore
+from tester_base import build_url, open_json_stream, send_json
+from transport import endpoint_label, get_default_transport
+
+CAMPOS_RESULTADO = ("nome_teste", "esperado", "atual", "status", "descricao_bug")
+# Regras do validador registradas como testes (duplicados já têm testar_emails_duplicados)
+REGRAS_QUALIDADE = {
+    "missing_fields": ("Dados - Campos Obrigatórios", "Todos os campos", "Usuários devem ter todos os campos obrigatórios"),
+    "age_out_of_range": ("Dados - Faixa de Idade", "Idade entre 0 e 150", "Campo age deve estar entre 0 e 150"),
+    "empty_name": ("Dados - Nome Vazio", "Nome preenchido", "Campo name não pode ser vazio"),
+    "invalid_email": ("Dados - Formato de Email", "Emails válidos", "Campo email deve ter formato válido"),
+    "invalid_status": ("Dados - Status", "active, inactive ou pending", "Campo status deve ser active, inactive ou pending"),
+}
 
 class TestesBasicosAPI:
-    def __init__(self, url_base="https://cakto-qa-eval.launchify.com.br"):
+    # Lidos pelo plugin do pytest (pytest_plugin.py), que transforma cada testar_* num item:
+    # slow vai para o começo da fila; stateful (com grupo) roda no mesmo worker que o resto do grupo
+    MARCADORES_PYTEST = {
+        "testar_emails_duplicados": ("slow", ("stateful", "usuarios")),
+        "testar_tipos_idade": ("slow", ("stateful", "usuarios")),
+        "testar_usuario_criado": (("stateful", "usuarios"),),
+        "testar_atualizar_usuario_criado": (("stateful", "usuarios"),),
+        "testar_endpoint_memory_leak": (("stateful", "memoria"),),
+    }
+    
+    def __init__(self, url_base="https://cakto-qa-eval.launchify.com.br", transporte=None,
+                 limite_pagina_crawler=PAGE_LIMIT, concorrencia_crawler=8, json_em_stream=True,
+                 cache_respostas=None):
         self.url_base = url_base
-        self.resultados_teste = []
-        self.bugs_encontrados = []
-        
-    def registrar_teste(self, nome_teste, esperado, atual, status, descricao_bug=None):
-        resultado = {
-            "nome_teste": nome_teste,
-            "timestamp": datetime.now().isoformat(),
-            "esperado": esperado,
-            "atual": atual,
-            "status": status,
-            "descricao_bug": descricao_bug
-        }
-        self.resultados_teste.append(resultado)
+        # Lê as páginas do crawler registro a registro em vez de carregar a página inteira
+        self.json_em_stream = json_em_stream
+        self.limite_pagina_crawler = limite_pagina_crawler
+        self.concorrencia_crawler = concorrencia_crawler
+        self.transporte = transporte or get_default_transport()
+        # Com um ResponseCache, as verificações de leitura que pedem a mesma página vão à rede uma vez só
+        if cache_respostas is not None:
+            self.transporte = CachingTransport(self.transporte, cache_respostas)
+        self.tempos = RequestTimings()
+        self.resultados_teste = ResultStore(CAMPOS_RESULTADO, extra_field="tempos")
+        self.bugs_encontrados = self.resultados_teste.bugs
+        self.contagem_status = Counter()
+        self.stream_resultados = None
+        self.manter_resultados = True
+        
+    def registrar_teste(self, nome_teste, esperado, atual, status, descricao_bug=None, tempos=None):
+        if tempos is None:
+            tempos = self.tempos.drain()
+        self.contagem_status[status] += 1
+        if self.manter_resultados:
+            self.resultados_teste.append(nome_teste, esperado, atual, status, descricao_bug, tempos)
+        if self.stream_resultados:
+            self.stream_resultados.write(
+                self.resultados_teste.build_record(nome_teste, esperado, atual, status, descricao_bug, tempos))
         
         if status == "BUG":
-            self.bugs_encontrados.append(resultado)
             print(f"🐛 BUG: {nome_teste}")
             print(f"   Esperado: {esperado}")
             print(f"   Atual: {atual}")
@@ -32,52 +75,32 @@ class TestesBasicosAPI:
         else:
             print(f"✅ PASSOU: {nome_teste}")
     
-    def fazer_requisicao(self, metodo, endpoint, dados=None, parametros=None):
-        url = f"{self.url_base}{endpoint}"
-        
-        if parametros:
-            string_query = urllib.parse.urlencode(parametros)
-            url += f"?{string_query}"
-        
+    def fazer_requisicao(self, metodo, endpoint, dados=None, parametros=None, tempo_limite=None):
         try:
-            dados_json = None
-            if dados and metodo.upper() in ["POST", "PUT"]:
-                dados_json = json.dumps(dados).encode('utf-8')
-            
-            requisicao = urllib.request.Request(url, data=dados_json)
-            requisicao.add_header('Content-Type', 'application/json')
-            
-            if metodo.upper() == "GET":
-                requisicao.get_method = lambda: 'GET'
-            elif metodo.upper() == "POST":
-                requisicao.get_method = lambda: 'POST'
-            elif metodo.upper() == "PUT":
-                requisicao.get_method = lambda: 'PUT'
-            elif metodo.upper() == "DELETE":
-                requisicao.get_method = lambda: 'DELETE'
-            
-            with urllib.request.urlopen(requisicao) as resposta:
-                dados_resposta = resposta.read().decode('utf-8')
-                return {
-                    'codigo_status': resposta.getcode(),
-                    'dados': json.loads(dados_resposta) if dados_resposta else None
-                }
-                
-        except urllib.error.HTTPError as erro:
-            try:
-                dados_erro = erro.read().decode('utf-8')
-                return {
-                    'codigo_status': erro.code,
-                    'dados': json.loads(dados_erro) if dados_erro else None
-                }
-            except:
-                return {
-                    'codigo_status': erro.code,
-                    'dados': None
-                }
+            resposta, dados = send_json(self.transporte, self.tempos, metodo,
+                                        build_url(self.url_base, endpoint, parametros),
+                                        endpoint_label(metodo, endpoint), data=dados, timeout=tempo_limite)
+            return {
+                'codigo_status': resposta.status,
+                'dados': dados
+            }
+        except DeadlineExceeded:
+            raise
         except Exception as erro:
             return None
     
+    def requisitar_em_stream(self, metodo, endpoint, parametros=None, tempo_limite=None):
+        """Como fazer_requisicao, mas devolve (status, JSONListStream) com a lista lida à medida que chega"""
+        try:
+            resposta, itens = open_json_stream(self.transporte, self.tempos, metodo,
+                                               build_url(self.url_base, endpoint, parametros),
+                                               endpoint_label(metodo, endpoint), timeout=tempo_limite)
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            return None
+        return resposta.status, itens
+    
     def testar_health_check(self):
         resposta = self.fazer_requisicao("GET", "/health")
         
@@ -89,7 +112,8 @@ class TestesBasicosAPI:
                         "Health check deveria retornar 200 OK")
     
     def testar_estrutura_usuarios(self):
-        resposta = self.fazer_requisicao("GET", "/users")
+        # A mesma primeira página que o crawler pede, para ser reaproveitada com cache
+        resposta = self.fazer_requisicao("GET", "/users", parametros=page_params(1, self.limite_pagina_crawler))
         
         if resposta and resposta['codigo_status'] == 200:
             dados = resposta['dados']
@@ -113,38 +137,91 @@ class TestesBasicosAPI:
             status = resposta['codigo_status'] if resposta else "Erro de conexão"
             self.registrar_teste("GET Usuários", "200 OK", str(status), "BUG", "Deveria retornar 200 OK")
     
+    def buscar_pagina_usuarios(self, pagina, limite):
+        if self.json_em_stream:
+            return self.requisitar_em_stream("GET", "/users", parametros=page_params(pagina, limite))
+        resposta = self.fazer_requisicao("GET", "/users", parametros=page_params(pagina, limite))
+        return (resposta['codigo_status'], resposta['dados']) if resposta else None
+    
+    def percorrer_usuarios(self, *consumidores):
+        """Entrega todos os usuários da base (todas as páginas) a cada consumidor"""
+        return crawl_users(self.buscar_pagina_usuarios, consumidores,
+                           limit=self.limite_pagina_crawler, concurrency=self.concorrencia_crawler)
+    
+    @contextmanager
+    def usuario_temporario(self):
+        """Cria um usuário válido para o teste e o remove ao final; entrega None se a criação falhar"""
+        dados = {"name": "Usuário Temporário", "email": f"teste-{uuid.uuid4().hex[:12]}@exemplo.com",
+                 "age": 30, "status": "active"}
+        resposta = self.fazer_requisicao("POST", "/users", dados)
+        usuario = None
+        if resposta and resposta['codigo_status'] in (200, 201) and isinstance(resposta['dados'], dict):
+            usuario = resposta['dados'].get('data')
+        try:
+            yield usuario
+        finally:
+            if usuario and usuario.get('id') is not None:
+                self.fazer_requisicao("DELETE", f"/users/{usuario['id']}")
+    
+    @staticmethod
+    def resumir_amostra(valores, maximo=10):
+        valores = list(valores)
+        texto = f"{set(valores[:maximo])}"
+        if len(valores) > maximo:
+            texto += f" (+{len(valores) - maximo} outros)"
+        return texto
+    
     def testar_emails_duplicados(self):
-        resposta = self.fazer_requisicao("GET", "/users")
+        indice_emails = DuplicateIndex("email")
+        indice_ids = DuplicateIndex("id")
+        estatisticas = self.percorrer_usuarios(indice_emails.add, indice_ids.add)
         
-        if resposta and resposta['codigo_status'] == 200:
-            dados = resposta['dados']
-            if dados and 'data' in dados:
-                emails = [usuario['email'] for usuario in dados['data']]
-                emails_unicos = set(emails)
-                
-                if len(emails) != len(emails_unicos):
-                    duplicados = [email for email in emails if emails.count(email) > 1]
-                    self.registrar_teste("Emails Duplicados", "Emails únicos", f"Duplicados: {set(duplicados)}", "BUG",
-                                "Não deve haver emails duplicados")
-                else:
-                    self.registrar_teste("Emails Duplicados", "Emails únicos", "Todos únicos", "PASS")
+        if not estatisticas['pages']:
+            self.registrar_teste("Emails Duplicados", "Emails únicos", "Erro de conexão", "BUG")
+            return
+        
+        if indice_emails.duplicates:
+            self.registrar_teste("Emails Duplicados", "Emails únicos",
+                        f"Duplicados: {self.resumir_amostra(indice_emails.duplicates)}", "BUG",
+                        "Não deve haver emails duplicados")
+        else:
+            self.registrar_teste("Emails Duplicados", "Emails únicos", "Todos únicos", "PASS")
+        
+        if indice_ids.duplicates:
+            self.registrar_teste("IDs Duplicados", "IDs únicos",
+                        f"Duplicados: {self.resumir_amostra(indice_ids.duplicates)}", "BUG",
+                        "Não deve haver IDs duplicados")
+        else:
+            self.registrar_teste("IDs Duplicados", "IDs únicos", "Todos únicos", "PASS")
     
     def testar_tipos_idade(self):
-        resposta = self.fazer_requisicao("GET", "/users")
+        colunas = UserColumns()
+        estatisticas = self.percorrer_usuarios(colunas.add)
         
-        if resposta and resposta['codigo_status'] == 200:
-            dados = resposta['dados']
-            if dados and 'data' in dados:
-                idades_invalidas = []
-                for usuario in dados['data']:
-                    if not isinstance(usuario['age'], int):
-                        idades_invalidas.append(f"ID {usuario['id']}: {usuario['age']} ({type(usuario['age']).__name__})")
-                
-                if idades_invalidas:
-                    self.registrar_teste("Tipos de Idade", "Todos números", f"Inválidos: {idades_invalidas}", "BUG",
-                                "Campo age deve ser sempre número")
-                else:
-                    self.registrar_teste("Tipos de Idade", "Todos números", "Todos válidos", "PASS")
+        if not estatisticas['pages']:
+            self.registrar_teste("Tipos de Idade", "Todos números", "Erro de conexão", "BUG")
+            return
+        
+        # Todas as regras de qualidade numa passada por coluna sobre a base inteira
+        relatorio = DatasetValidator().validate(colunas)
+        idades = relatorio['rules']['age_non_numeric']
+        if idades['count']:
+            invalidos = [f"ID {id_usuario}: {valor}" for id_usuario, valor in zip(idades['ids'], idades['values'])]
+            if idades['count'] > len(invalidos):
+                invalidos.append(f"+{idades['count'] - len(invalidos)} outros")
+            self.registrar_teste("Tipos de Idade", "Todos números", f"Inválidos: {invalidos}", "BUG",
+                        "Campo age deve ser sempre número")
+        else:
+            self.registrar_teste("Tipos de Idade", "Todos números", "Todos válidos", "PASS")
+        
+        for regra, (nome_teste, esperado, descricao) in REGRAS_QUALIDADE.items():
+            resultado = relatorio['rules'][regra]
+            if resultado['count']:
+                self.registrar_teste(nome_teste, esperado,
+                            f"{resultado['count']} usuários, IDs: {self.resumir_amostra(resultado['ids'])}",
+                            "BUG", descricao)
+            else:
+                self.registrar_teste(nome_teste, esperado, f"{relatorio['records']} usuários válidos", "PASS")
     
     def testar_paginacao_pagina_negativa(self):
         resposta = self.fazer_requisicao("GET", "/users", parametros={"page": -1})
@@ -159,13 +236,23 @@ class TestesBasicosAPI:
             self.registrar_teste("Paginação - Página Negativa", "400 Bad Request", "Erro de conexão", "BUG")
     
     def testar_paginacao_limite_excessivo(self):
-        resposta = self.fazer_requisicao("GET", "/users", parametros={"limit": 10000})
+        # Só o status importa: a lista (possivelmente enorme) é lida e descartada registro a registro
+        resposta = self.requisitar_em_stream("GET", "/users", parametros={"limit": 10000})
         
         if resposta:
-            if resposta['codigo_status'] == 400:
-                self.registrar_teste("Paginação - Limite Excessivo", "400 Bad Request", f"{resposta['codigo_status']}", "PASS")
+            codigo_status, registros = resposta
+            try:
+                registros.drain()
+            except DeadlineExceeded:
+                raise
+            except (ValueError, OSError):
+                pass
+            finally:
+                registros.close()
+            if codigo_status == 400:
+                self.registrar_teste("Paginação - Limite Excessivo", "400 Bad Request", f"{codigo_status}", "PASS")
             else:
-                self.registrar_teste("Paginação - Limite Excessivo", "400 Bad Request", f"{resposta['codigo_status']}", "BUG",
+                self.registrar_teste("Paginação - Limite Excessivo", "400 Bad Request", f"{codigo_status}", "BUG",
                             "Limite excessivo deveria retornar 400")
         else:
             self.registrar_teste("Paginação - Limite Excessivo", "400 Bad Request", "Erro de conexão", "BUG")
@@ -182,6 +269,36 @@ class TestesBasicosAPI:
         else:
             self.registrar_teste("ID Inexistente", "404 Not Found", "Erro de conexão", "BUG")
     
+    def testar_usuario_criado(self, usuario):
+        resposta = self.fazer_requisicao("GET", f"/users/{usuario['id']}")
+        
+        if resposta and resposta['codigo_status'] == 200:
+            encontrado = (resposta['dados'] or {}).get('data') or {}
+            if encontrado.get('email') == usuario['email']:
+                self.registrar_teste("Usuário Criado - Busca", "Usuário recém-criado", "Encontrado", "PASS")
+            else:
+                self.registrar_teste("Usuário Criado - Busca", "Usuário recém-criado", f"Outro usuário: {encontrado}", "BUG",
+                            "GET /users/:id deveria devolver o usuário criado")
+        else:
+            status = resposta['codigo_status'] if resposta else "Erro de conexão"
+            self.registrar_teste("Usuário Criado - Busca", "200 OK", str(status), "BUG",
+                        "Usuário recém-criado deveria ser encontrado")
+    
+    def testar_atualizar_usuario_criado(self, usuario):
+        resposta = self.fazer_requisicao("PUT", f"/users/{usuario['id']}", {"name": "Nome Atualizado"})
+        
+        if resposta and resposta['codigo_status'] == 200:
+            atualizado = (resposta['dados'] or {}).get('data') or {}
+            if atualizado.get('name') == "Nome Atualizado":
+                self.registrar_teste("Usuário Criado - Atualização", "Nome atualizado", "Nome atualizado", "PASS")
+            else:
+                self.registrar_teste("Usuário Criado - Atualização", "Nome atualizado", f"{atualizado.get('name')}", "BUG",
+                            "PUT /users/:id deveria alterar o nome")
+        else:
+            status = resposta['codigo_status'] if resposta else "Erro de conexão"
+            self.registrar_teste("Usuário Criado - Atualização", "200 OK", str(status), "BUG",
+                        "Atualização de usuário existente deveria retornar 200")
+    
     def testar_endpoint_memory_leak(self):
         resposta = self.fazer_requisicao("GET", "/memory-leak")
         
@@ -192,31 +309,73 @@ class TestesBasicosAPI:
             self.registrar_teste("Memory Leak Endpoint", "200 OK", str(status), "BUG",
                         "Memory leak endpoint deveria retornar 200 OK")
     
-    def executar_todos_testes(self):
+    def executar_teste(self, teste, precisa_usuario):
+        if not precisa_usuario:
+            teste()
+            return
+        with self.usuario_temporario() as usuario:
+            if usuario:
+                teste(usuario)
+            else:
+                self.registrar_teste(teste.__name__, "Usuário criado para o teste", "Falha ao criar",
+                            "BUG", "POST /users com dados válidos deveria criar o usuário")
+    
+    def executar_todos_testes(self, tempo_limite_teste=None, orcamento_suite=None):
         print("🚀 Executando testes automatizados...")
         print("=" * 50)
         
-        self.testar_health_check()
-        self.testar_estrutura_usuarios()
-        self.testar_emails_duplicados()
-        self.testar_tipos_idade()
-        self.testar_paginacao_pagina_negativa()
-        self.testar_paginacao_limite_excessivo()
-        self.testar_id_usuario_invalido()
-        self.testar_endpoint_memory_leak()
+        testes = [
+            self.testar_health_check,
+            self.testar_estrutura_usuarios,
+            self.testar_emails_duplicados,
+            self.testar_tipos_idade,
+            self.testar_paginacao_pagina_negativa,
+            self.testar_paginacao_limite_excessivo,
+            self.testar_id_usuario_invalido,
+            self.testar_usuario_criado,
+            self.testar_atualizar_usuario_criado,
+            self.testar_endpoint_memory_leak,
+        ]
+        # Testes que recebem um usuário ganham um criado só para eles (e removido em seguida)
+        precisam_usuario = {self.testar_usuario_criado, self.testar_atualizar_usuario_criado}
+        # Os prazos limitam os timeouts das requisições feitas dentro de cada teste
+        with deadline(orcamento_suite, "orçamento da suíte") as suite:
+            for teste in testes:
+                if suite is not None and suite.expired:
+                    self.registrar_teste(teste.__name__, "Execução dentro do orçamento da suíte", "Não executado",
+                                "BUG", f"Orçamento de {orcamento_suite:g}s da suíte esgotado")
+                    continue
+                try:
+                    with deadline(tempo_limite_teste, f"prazo de {teste.__name__}"):
+                        self.executar_teste(teste, teste in precisam_usuario)
+                except DeadlineExceeded as erro:
+                    self.registrar_teste(teste.__name__, "Execução dentro do prazo", str(erro), "BUG",
+                                         "Teste interrompido por tempo limite")
         
         print("=" * 50)
-        print(f"📊 Total de testes: {len(self.resultados_teste)}")
-        print(f"🐛 Bugs encontrados: {len(self.bugs_encontrados)}")
-        print(f"✅ Testes passaram: {len([t for t in self.resultados_teste if t['status'] == 'PASS'])}")
-        print(f"❌ Testes falharam: {len([t for t in self.resultados_teste if t['status'] == 'BUG'])}")
+        resumo = self.tempos.summary()
+        print_timing_summary(resumo)
+        print_transfer_summary(resumo)
+        print(f"📊 Total de testes: {sum(self.contagem_status.values())}")
+        print(f"🐛 Bugs encontrados: {self.contagem_status['BUG']}")
+        print(f"✅ Testes passaram: {self.contagem_status['PASS']}")
+        print(f"❌ Testes falharam: {self.contagem_status['BUG']}")
+    
+    def gravar_resultados_em_stream(self, caminho, manter_em_memoria=False, **opcoes_stream):
+        self.stream_resultados = JSONLResultSink(caminho, **opcoes_stream)
+        self.manter_resultados = manter_em_memoria
     
     def salvar_resultados(self):
-        with open("../../test-cases/resultados-testes-automatizados.json", "w", encoding="utf-8") as arquivo:
-            json.dump(self.resultados_teste, arquivo, indent=2, ensure_ascii=False)
+        if self.stream_resultados:
+            self.stream_resultados.close()
+            export_legacy(self.stream_resultados.path,
+                          "../../test-cases/resultados-testes-automatizados.json",
+                          "../../test-cases/bugs-automatizados.json")
+            print("💾 Resultados salvos em test-cases/")
+            return
         
-        with open("../../test-cases/bugs-automatizados.json", "w", encoding="utf-8") as arquivo:
-            json.dump(self.bugs_encontrados, arquivo, indent=2, ensure_ascii=False)
+        write_json_array(self.resultados_teste, "../../test-cases/resultados-testes-automatizados.json")
+        write_json_array(self.bugs_encontrados, "../../test-cases/bugs-automatizados.json")
         
         print("💾 Resultados salvos em test-cases/")
 
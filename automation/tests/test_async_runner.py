@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from async_runner import TestStep, capture_logs, run_plan
+from simple_api_tester import SimpleAPITester
+
+
+class Registro:
+    def __init__(self):
+        self.testes = []
+        self.eventos = []
+        self._trava = threading.Lock()
+
+    def log_test(self, test_name, expected, actual, status, bug_description=None):
+        self.testes.append((test_name, status))
+
+    def evento(self, nome):
+        with self._trava:
+            self.eventos.append(nome)
+
+
+def _passo(registro, nome, demora=0.0, retorno=None):
+    def executar(**recursos):
+        registro.evento(f"início {nome}")
+        time.sleep(demora)
+        registro.log_test(nome, "ok", "ok", "PASS")
+        registro.evento(f"fim {nome}")
+        return retorno
+    return executar
+
+
+def test_dependencias_terminam_antes_e_o_log_segue_o_plano():
+    registro = Registro()
+    recursos = run_plan(registro, [
+        TestStep("lento", _passo(registro, "lento", 0.1)),
+        TestStep("cria", _passo(registro, "cria", 0.05, retorno=7), provides="usuario"),
+        TestStep("usa", _passo(registro, "usa"), requires=["usuario"], after=["lento"]),
+        TestStep("rapido", _passo(registro, "rapido")),
+    ])
+    eventos = registro.eventos
+    assert eventos.index("início usa") > max(eventos.index("fim lento"), eventos.index("fim cria"))
+    # "rapido" terminou antes dos outros, mas o relatório segue a ordem do plano
+    assert eventos.index("fim rapido") < eventos.index("fim cria")
+    assert [nome for nome, _ in registro.testes] == ["lento", "cria", "usa", "rapido"]
+    assert recursos == {"usuario": 7}
+
+
+def test_passo_cuja_dependencia_falhou_nao_roda():
+    registro = Registro()
+
+    def cria_com_erro():
+        raise RuntimeError("sem conexão")
+
+    run_plan(registro, [
+        TestStep("cria", cria_com_erro, provides="usuario"),
+        TestStep("usa", _passo(registro, "usa"), requires=["usuario"]),
+        TestStep("depois", _passo(registro, "depois"), after=["cria"]),
+    ])
+    assert "início usa" not in registro.eventos
+    # after só ordena: o passo roda mesmo que o anterior tenha falhado
+    assert registro.testes == [("cria", "BUG"), ("depois", "PASS")]
+
+
+def test_plano_invalido():
+    registro = Registro()
+    with pytest.raises(ValueError, match="circular"):
+        run_plan(registro, [TestStep("a", _passo(registro, "a"), after=["b"]),
+                            TestStep("b", _passo(registro, "b"), after=["a"])])
+    with pytest.raises(ValueError, match="sem provedor"):
+        run_plan(registro, [TestStep("a", _passo(registro, "a"), requires=["usuario"])])
+    with pytest.raises(ValueError, match="desconhecido"):
+        run_plan(registro, [TestStep("a", _passo(registro, "a"), after=["x"])])
+
+
+def test_put_espera_os_posts_com_o_email_original():
+    testador = SimpleAPITester("http://api", transport=object())
+    passos = {passo.name: passo for passo in testador.build_test_plan()}
+    for nome in ("create_user_empty_name", "create_user_negative_age"):
+        assert "create_user" in passos[nome].after
+        assert nome in passos["update_user"].after
+
+
+def test_capture_logs_nao_repassa_ao_log_original():
+    registro = Registro()
+    with capture_logs(registro) as logs:
+        registro.log_test("A", "200", "200", "PASS")
+    registro.log_test("B", "200", "200", "PASS")
+    assert logs == [(("A", "200", "200", "PASS"), {})]
+    assert registro.testes == [("B", "PASS")]
@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cassette import Cassette, CassetteMiss, CassetteTransport, request_key
+from conditional import ConditionalTransport
+from transport import Response, header_value
+
+
+class ServidorComprimido:
+    """Como o HTTPTransport: corpo já decodificado, mas com os cabeçalhos da resposta comprimida"""
+
+    def __init__(self):
+        self.listas = 0
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        if url.endswith("/users/1"):
+            if header_value(headers, "If-None-Match") == '"v1"':
+                return Response(304, "Not Modified", {"ETag": '"v1"'}, b"", wire_bytes=0)
+            return Response(200, "OK", {"ETag": '"v1"', "Content-Encoding": "gzip", "Content-Length": "40"},
+                            b'{"id": 1, "name": "Maria Silva"}', wire_bytes=40)
+        if method == "POST":
+            return Response(201, "Created", {"Content-Length": "9"}, b'{"id": 9}')
+        self.listas += 1
+        corpo = b'{"data": [%d]}' % self.listas
+        return Response(200, "OK", {"Content-Encoding": "gzip", "Transfer-Encoding": "chunked"}, corpo,
+                        wire_bytes=30)
+
+    def close(self):
+        pass
+
+
+def _sequencia(transporte):
+    respostas = [
+        transporte.request("GET", "http://api/users/1"),
+        transporte.request("GET", "http://api/users/1"),
+        transporte.request("GET", "http://api/users"),
+        transporte.request("GET", "http://api/users"),
+        transporte.request("POST", "http://api/users", body=b'{"name": "Ana"}'),
+    ]
+    return [(r.status, r.body, r.revalidated) for r in respostas]
+
+
+def test_gravar_e_reproduzir_da_o_mesmo_resultado(tmp_path):
+    caminho = str(tmp_path / "execucao.cas")
+    gravacao = ConditionalTransport(CassetteTransport(caminho, "record", ServidorComprimido()))
+    gravado = _sequencia(gravacao)
+    gravacao.close()
+
+    reproducao = ConditionalTransport(CassetteTransport(caminho, "replay"))
+    reproduzido = _sequencia(reproducao)
+    assert reproduzido == gravado
+    # O GET revalidado recebe o 304 gravado, não o 200 da primeira chamada
+    assert [revalidado for _, _, revalidado in reproduzido] == [False, True, False, False, False]
+    assert [corpo for _, corpo, _ in reproduzido[2:4]] == [b'{"data": [1]}', b'{"data": [2]}']
+    with pytest.raises(CassetteMiss):
+        reproducao.request("GET", "http://api/health")
+    reproducao.close()
+
+    # Sem a revalidação, os dois GETs são iguais e nenhum recebe o 304 gravado
+    sem_revalidacao = CassetteTransport(caminho, "replay")
+    assert [sem_revalidacao.request("GET", "http://api/users/1").status for _ in range(2)] == [200, 200]
+    sem_revalidacao.close()
+
+
+def test_corpo_gravado_sem_content_encoding(tmp_path):
+    caminho = str(tmp_path / "execucao.cas")
+    gravacao = ConditionalTransport(CassetteTransport(caminho, "record", ServidorComprimido()))
+    _sequencia(gravacao)
+    gravacao.close()
+
+    fita = Cassette(caminho)
+    trocas = list(fita.exchanges())
+    fita.close()
+    assert len(trocas) == 5
+    for troca in trocas:
+        assert header_value(troca["headers"], "Content-Encoding") is None
+        assert header_value(troca["headers"], "Transfer-Encoding") is None
+    primeira, revalidada, lista = trocas[:3]
+    assert primeira["headers"] == {"ETag": '"v1"', "Content-Length": str(len(primeira["body"]))}
+    assert (primeira["wire_bytes"], revalidada["status"], revalidada["headers"]) == (40, 304, {"ETag": '"v1"'})
+    assert lista["headers"] == {"Content-Length": str(len(lista["body"]))}
+
+
+def test_chave_considera_so_os_cabecalhos_que_mudam_a_resposta():
+    base = request_key("GET", "http://api/users?page=1")
+    assert request_key("GET", "http://outra-api:3000/users?page=1") == base
+    assert request_key("GET", "http://api/users?page=1", headers={"Accept-Encoding": "gzip",
+                                                                 "Content-Type": "application/json"}) == base
+    condicional = request_key("GET", "http://api/users?page=1", headers={"if-none-match": '"v1"'})
+    assert condicional != base
+    assert request_key("GET", "http://api/users?page=1", headers={"If-None-Match": '"v1"'}) == condicional
+    assert request_key("GET", "http://api/users?page=1", headers={"Accept": "text/html"}) != base
+    assert request_key("POST", "http://api/users", b"a") != request_key("POST", "http://api/users", b"b")
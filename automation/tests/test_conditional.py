@@ -0,0 +1,149 @@
+import gzip
+import json
+import os
+import sys
+import zlib
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from conditional import ConditionalTransport, print_revalidation_report
+from transport import (HTTPTransport, Response, _IncrementalDecoder, decode_body, header_value, mount_app,
+                       unmount_app)
+
+CORPO = json.dumps({"data": [{"id": i, "name": f"Usuário {i}"} for i in range(200)]}).encode()
+
+
+class ServidorComEtag:
+    """Responde 304 quando o cliente manda a ETag atual; um PUT muda a versão"""
+
+    def __init__(self):
+        self.versao = 1
+        self.pedidos = []
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        self.pedidos.append((method, header_value(headers, "If-None-Match")))
+        etag = f'"v{self.versao}"'
+        if method == "PUT":
+            self.versao += 1
+            return Response(200, "OK", {}, b"{}")
+        if header_value(headers, "If-None-Match") == etag:
+            return Response(304, "Not Modified", {"ETag": etag, "Date": "depois"}, b"", wire_bytes=0)
+        return Response(200, "OK", {"ETag": etag, "Date": "antes"}, CORPO)
+
+    def close(self):
+        pass
+
+
+class AppComprimida:
+    """Aplicação para memory:// que comprime conforme o Accept-Encoding recebido"""
+
+    def __init__(self):
+        self.accept_encoding = []
+
+    def handle(self, method, target, headers, body):
+        aceita = header_value(headers, "Accept-Encoding") or ""
+        self.accept_encoding.append(aceita)
+        if "gzip" in aceita:
+            return 200, "OK", {"Content-Encoding": "gzip"}, gzip.compress(CORPO)
+        return 200, "OK", {}, CORPO
+
+
+def _deflate_cru(dados):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(dados) + compressor.flush()
+
+
+def test_get_repetido_e_revalidado_com_a_etag():
+    servidor = ServidorComEtag()
+    transporte = ConditionalTransport(servidor)
+    primeira = transporte.request("GET", "http://api/users/1")
+    segunda = transporte.request("GET", "http://api/users/1")
+    assert servidor.pedidos == [("GET", None), ("GET", '"v1"')]
+    assert (primeira.revalidated, segunda.revalidated) == (False, True)
+    assert (segunda.status, segunda.body, segunda.wire_bytes) == (200, CORPO, 0)
+    # Cabeçalhos do 304 substituem os guardados
+    assert segunda.headers["Date"] == "depois"
+    assert transporte.stats()["GET /users/:id"] == {
+        "requests": 2, "revalidated": 1, "saved_bytes": len(CORPO), "uncompressed_bytes": 0,
+        "gzip_estimate_bytes": 0, "unchanged": 0, "unchanged_bytes": 0}
+
+
+def test_escrita_descarta_a_etag_guardada():
+    servidor = ServidorComEtag()
+    transporte = ConditionalTransport(servidor)
+    transporte.request("GET", "http://api/users/1")
+    transporte.request("PUT", "http://api/users/1", body=b"{}")
+    resposta = transporte.request("GET", "http://api/users/1")
+    assert servidor.pedidos[-1] == ("GET", None)
+    assert not resposta.revalidated
+    assert transporte.request("GET", "http://api/users/1").revalidated
+    assert servidor.pedidos[-1] == ("GET", '"v2"')
+
+
+def test_sem_revalidacao_nao_manda_validadores(capsys):
+    servidor = ServidorComEtag()
+    transporte = ConditionalTransport(servidor, revalidate=False)
+    for _ in range(2):
+        transporte.request("GET", "http://api/users/1")
+    assert servidor.pedidos == [("GET", None), ("GET", None)]
+    print_revalidation_report(transporte.stats())
+    assert capsys.readouterr().out == ""
+
+
+def test_estimativa_de_gzip_e_de_respostas_iguais_sem_etag(capsys):
+    class SemEtag:
+        def request(self, method, url, body=None, headers=None, timeout=None):
+            return Response(200, "OK", {}, CORPO)
+
+    transporte = ConditionalTransport(SemEtag(), estimate_savings=True)
+    for _ in range(3):
+        transporte.request("GET", "http://api/users?page=1")
+    dados = transporte.stats()["GET /users"]
+    assert dados["uncompressed_bytes"] == 3 * len(CORPO)
+    assert 0 < dados["gzip_estimate_bytes"] < dados["uncompressed_bytes"]
+    assert (dados["unchanged"], dados["unchanged_bytes"]) == (2, 2 * len(CORPO))
+    print_revalidation_report(transporte.stats())
+    assert "2 respostas iguais à anterior sem ETag" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("codificacao, comprimir", [
+    ("gzip", gzip.compress),
+    ("deflate", zlib.compress),
+    ("deflate", _deflate_cru),
+    ("gzip, deflate", lambda dados: zlib.compress(gzip.compress(dados))),
+    ("identity", lambda dados: dados),
+])
+def test_corpo_comprimido_e_decodificado(codificacao, comprimir):
+    comprimido = comprimir(CORPO)
+    assert decode_body(comprimido, codificacao) == CORPO
+    decodificador = _IncrementalDecoder(codificacao)
+    pedacos = [decodificador.decompress(comprimido[i:i + 100]) for i in range(0, len(comprimido), 100)]
+    assert b"".join(pedacos) + decodificador.flush() == CORPO
+
+
+def test_codificacao_desconhecida():
+    with pytest.raises(ValueError, match="não suportado"):
+        decode_body(b"abc", "compress")
+    with pytest.raises(ValueError, match="não suportado"):
+        _IncrementalDecoder("compress")
+
+
+def test_transporte_pede_compressao_e_conta_bytes_na_rede():
+    app = AppComprimida()
+    mount_app("comprimida", app)
+    try:
+        transporte = HTTPTransport()
+        resposta = transporte.request("GET", "memory://comprimida/users")
+        assert (resposta.body, resposta.wire_bytes) == (CORPO, len(gzip.compress(CORPO)))
+        assert resposta.wire_bytes < resposta.body_bytes
+        stream = transporte.stream("GET", "memory://comprimida/users", chunk_size=64)
+        assert stream.read() == CORPO
+        assert (stream.wire_bytes, stream.body_bytes) == (resposta.wire_bytes, len(CORPO))
+
+        sem_compressao = HTTPTransport(accept_encoding=None).request("GET", "memory://comprimida/users")
+        assert sem_compressao.wire_bytes == sem_compressao.body_bytes == len(CORPO)
+    finally:
+        unmount_app("comprimida")
+    assert app.accept_encoding[0].startswith("gzip, deflate") and app.accept_encoding[-1] == ""
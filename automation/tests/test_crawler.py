@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from crawler import DuplicateIndex, crawl_users, page_items
+from json_stream import JSONListStream
+
+
+def _usuarios(quantidade, repetir_email_a_cada=None):
+    return [{"id": i, "email": f"u{i % repetir_email_a_cada if repetir_email_a_cada else i}@email.com"}
+            for i in range(1, quantidade + 1)]
+
+
+def _paginas(usuarios, paginado=True, falhas=None):
+    """fetch_page sobre uma lista; `falhas` conta quantas vezes cada página ainda responde 500"""
+    falhas = dict(falhas or {})
+    pedidos = []
+
+    def buscar_pagina(pagina, limite):
+        pedidos.append(pagina)
+        if falhas.get(pagina):
+            falhas[pagina] -= 1
+            return 500, {"error": "instável"}
+        itens = usuarios[(pagina - 1) * limite:pagina * limite]
+        if not paginado:
+            return 200, itens
+        total = max(1, -(-len(usuarios) // limite))
+        return 200, {"data": itens, "pagination": {"page": pagina, "totalPages": total}}
+
+    return buscar_pagina, pedidos
+
+
+def test_indice_guarda_so_os_valores_repetidos():
+    indice = DuplicateIndex("email")
+    for registro in [{"id": 1, "email": "a@x.com"}, {"id": 2, "email": "b@x.com"}, {"id": 3, "email": "a@x.com"},
+                     {"id": 4, "email": "a@x.com"}, {"id": 5}, {"id": 6, "email": ["não", "hashável"]}]:
+        indice.add(registro)
+    assert indice.duplicates == {"a@x.com": [1, 3, 4]}
+    assert len(indice) == 2
+
+
+def test_indice_de_ids_repetidos():
+    indice = DuplicateIndex("id")
+    for registro in [{"id": 1}, {"id": 2}, {"id": 1}]:
+        indice.add(registro)
+    assert indice.duplicates == {1: [1, 1]}
+
+
+def test_varredura_paginada_encontra_duplicados_entre_paginas():
+    usuarios = _usuarios(25, repetir_email_a_cada=10)
+    buscar_pagina, pedidos = _paginas(usuarios)
+    emails = DuplicateIndex("email")
+    ids = DuplicateIndex("id")
+    estatisticas = crawl_users(buscar_pagina, [emails.add, ids.add], limit=4, concurrency=3)
+    assert (estatisticas["pages"], estatisticas["users"], estatisticas["paginated_shape"]) == (7, 25, 7)
+    assert sorted(pedidos) == list(range(1, 8))
+    # As páginas chegam fora de ordem; o primeiro id visto pode ser de qualquer uma
+    assert sorted(emails.duplicates["u1@email.com"]) == [1, 11, 21]
+    assert len(emails) == 10 and ids.duplicates == {}
+
+
+def test_lista_pura_para_na_primeira_pagina_incompleta():
+    buscar_pagina, pedidos = _paginas(_usuarios(10), paginado=False)
+    estatisticas = crawl_users(buscar_pagina, [lambda usuario: None], limit=4, concurrency=2)
+    assert estatisticas["users"] == 10
+    # Páginas já pedidas na mesma onda voltam vazias, mas nenhuma nova é pedida depois da incompleta
+    assert set(pedidos) >= {1, 2, 3} and max(pedidos) <= 3 + 2 * 2
+    assert estatisticas["pages"] == estatisticas["list_shape"] == len(pedidos)
+
+
+def test_pagina_com_erro_e_tentada_de_novo_ou_registrada():
+    buscar_pagina, _ = _paginas(_usuarios(12), falhas={2: 1, 3: 5})
+    estatisticas = crawl_users(buscar_pagina, [lambda usuario: None], limit=4, retries=2)
+    assert estatisticas["pages"] == 2
+    assert estatisticas["failed_pages"] == [3]
+    assert estatisticas["users"] == 8
+
+
+def test_paginas_em_stream_entregam_cada_usuario_uma_vez():
+    usuarios = _usuarios(9, repetir_email_a_cada=5)
+    json_paginas, _ = _paginas(usuarios)
+
+    def buscar_pagina(pagina, limite):
+        status, corpo = json_paginas(pagina, limite)
+        texto = json.dumps(corpo).encode()
+        return status, JSONListStream(iter([texto[i:i + 7] for i in range(0, len(texto), 7)]))
+
+    emails = DuplicateIndex("email")
+    estatisticas = crawl_users(buscar_pagina, [emails.add], limit=4, concurrency=2)
+    assert (estatisticas["pages"], estatisticas["users"]) == (3, 9)
+    assert {email: sorted(ids) for email, ids in emails.duplicates.items()} == {
+        "u1@email.com": [1, 6], "u2@email.com": [2, 7], "u3@email.com": [3, 8], "u4@email.com": [4, 9]}
+
+
+def test_formas_da_resposta():
+    assert page_items([{"id": 1}]) == ([{"id": 1}], None)
+    assert page_items({"data": [], "pagination": {"totalPages": 1}}) == ([], {"totalPages": 1})
+    assert page_items({"data": [], "pagination": "1"}) == ([], None)
+    assert page_items({"error": "x"}) == (None, None)
@@ -0,0 +1,38 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dataset_validator import validate_users
+
+
+def _usuario(id_usuario, **campos):
+    usuario = {"id": id_usuario, "name": "João", "email": f"joao{id_usuario}@email.com", "age": 30,
+               "status": "active", "createdAt": "2024-01-01", "updatedAt": "2024-01-01"}
+    usuario.update(campos)
+    return usuario
+
+
+def test_usuario_sem_id_aparece_pela_linha():
+    sem_id = _usuario(0)
+    del sem_id["id"]
+    relatorio = validate_users([_usuario(1), sem_id, _usuario(3, age=-1)])
+    ausentes = relatorio["rules"]["missing_fields"]
+    assert (ausentes["count"], ausentes["ids"], ausentes["by_field"]) == (1, ["linha 1"], {"id": 1})
+    assert relatorio["rules"]["age_out_of_range"]["ids"] == [3]
+    assert relatorio["rules"]["duplicate_id"]["count"] == 0
+
+
+def test_regras_acusam_as_linhas_certas():
+    relatorio = validate_users([
+        _usuario(1), _usuario(2, age="30", name=" "), _usuario(3, email="email-invalido", status="deleted"),
+        _usuario(4, email="joao1@email.com", age=True), _usuario(4)])
+    regras = relatorio["rules"]
+    assert regras["age_non_numeric"]["ids"] == [2, 4]
+    assert regras["empty_name"]["ids"] == [2]
+    assert regras["invalid_email"]["ids"] == [3]
+    assert regras["invalid_status"]["values"] == ["'deleted' (str)"]
+    assert regras["duplicate_email"]["ids"] == [1, 4]
+    assert (regras["duplicate_id"]["ids"], regras["duplicate_id"]["distinct"]) == ([4, 4], 1)
+    assert relatorio["failed_rules"] == ["age_non_numeric", "empty_name", "invalid_email", "invalid_status",
+                                         "duplicate_email", "duplicate_id"]
@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from async_runner import TestStep, run_plan
+from crawler import crawl_users
+from deadlines import DeadlineExceeded, deadline, effective_timeout, nearest_deadline
+from json_stream import JSONListStream
+from simple_api_tester import SimpleAPITester
+
+
+class TransporteLento:
+    """Demora a responder e, como o HTTPTransport, confere o prazo antes de ler a resposta"""
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        time.sleep(0.05)
+        effective_timeout(timeout)
+        raise ConnectionError("não deveria chegar aqui com o prazo esgotado")
+
+
+def test_prazo_mais_proximo_limita_o_timeout():
+    assert effective_timeout(10) == 10
+    with deadline(5, "suíte"):
+        with deadline(0.5, "teste") as teste:
+            assert nearest_deadline() is teste
+            assert effective_timeout(10) <= 0.5
+            assert effective_timeout(None) <= 0.5
+            time.sleep(0.5)
+            with pytest.raises(DeadlineExceeded, match="teste de 0.5s esgotado"):
+                effective_timeout(10)
+        assert 0 < effective_timeout(None) <= 5
+    with deadline(None) as sem_prazo:
+        assert sem_prazo is None and nearest_deadline() is None
+
+
+def test_requisicao_fora_do_prazo_interrompe_o_teste():
+    testador = SimpleAPITester("http://api", transport=TransporteLento())
+    testador.latency_slos = None
+    run_plan(testador, [TestStep("health", testador.test_health_endpoint),
+                        TestStep("stream", lambda: testador.stream_request("GET", "/users"))],
+             capture_kwargs=lambda: {"timings": testador.timings.drain()}, test_timeout=0.01)
+    # Sem o repasse do DeadlineExceeded o teste registraria "Falha na conexão"
+    assert [(r["test_name"], r["actual"], r["bug_description"]) for r in testador.test_results] == [
+        ("health", "prazo do teste health de 0.01s esgotado", "Teste interrompido por tempo limite"),
+        ("stream", "prazo do teste stream de 0.01s esgotado", "Teste interrompido por tempo limite"),
+    ]
+
+
+def test_paginas_do_crawler_herdam_o_prazo():
+    prazos = {}
+
+    def buscar_pagina(pagina, limite):
+        prazos[pagina] = nearest_deadline()
+        return 200, {"data": [{"id": pagina}] * limite, "pagination": {"totalPages": 4}}
+
+    with deadline(30, "prazo da varredura") as prazo:
+        estatisticas = crawl_users(buscar_pagina, [lambda usuario: None], limit=2, concurrency=2)
+    assert estatisticas["pages"] == 4
+    assert prazos == {pagina: prazo for pagina in (1, 2, 3, 4)}
+
+
+def test_prazo_esgotado_no_meio_da_pagina_nao_vira_pagina_com_falha():
+    def pedacos():
+        yield b'[{"id": 1}, '
+        raise DeadlineExceeded("prazo esgotado")
+
+    def buscar_pagina(pagina, limite):
+        return 200, JSONListStream(pedacos())
+
+    with pytest.raises(DeadlineExceeded):
+        crawl_users(buscar_pagina, [lambda usuario: None], limit=2)
@@ -0,0 +1,65 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from flakiness import SPRT, FlakinessEstimator, trial_outcome
+
+
+class VerificacaoAleatoria:
+    def __init__(self, taxa_bug, seed=1):
+        self.taxa_bug = taxa_bug
+        self.rng = random.Random(seed)
+
+    def log_test(self, *args, **kwargs):
+        pass
+
+    def verificar(self):
+        status = "BUG" if self.rng.random() < self.taxa_bug else "PASS"
+        self.log_test("Verificação", "200", "500" if status == "BUG" else "200", status)
+
+
+def _estimar(taxa_bug, **opcoes):
+    testador = VerificacaoAleatoria(taxa_bug)
+    return FlakinessEstimator(testador, **opcoes).estimate("verificar", testador.verificar)
+
+
+def test_sprt_decide_nos_dois_sentidos():
+    sempre = SPRT(0.02, 0.15)
+    nunca = SPRT(0.02, 0.15)
+    for _ in range(100):
+        sempre.update(True)
+        nunca.update(False)
+    assert (sempre.decision, nunca.decision) == ("H1", "H0")
+    with pytest.raises(ValueError):
+        SPRT(0.5, 0.1)
+
+
+def test_sempre_passa_ou_sempre_falha_para_cedo():
+    estavel = _estimar(0.0)
+    quebrado = _estimar(1.0)
+    assert estavel["verdict"] == "estável" and estavel["samples"] < 30
+    assert quebrado["verdict"] == "determinístico" and quebrado["samples"] < 30
+    assert quebrado["outcomes"] == {"Verificação: 500": {"count": quebrado["samples"], "probability": 1.0,
+                                                          "ci": quebrado["bug_rate_ci"]}}
+
+
+def test_intermitente_continua_ate_a_precisao():
+    relatorio = _estimar(0.5)
+    baixo, alto = relatorio["bug_rate_ci"]
+    assert relatorio["verdict"] == "intermitente"
+    assert (alto - baixo) / 2 <= 0.10
+    assert relatorio["samples"] < 200
+    # Só com o SPRT, a mesma verificação parava em poucas execuções com um IC largo
+    so_sprt = _estimar(0.5, precision=None)
+    baixo, alto = so_sprt["bug_rate_ci"]
+    assert so_sprt["samples"] < relatorio["samples"] and (alto - baixo) / 2 > 0.10
+
+
+def test_resultado_da_execucao():
+    logs = [(("A", "200", "200", "PASS"), {}), ((), {"nome_teste": "B", "atual": "500", "status": "BUG"})]
+    assert trial_outcome(logs) == "B: 500"
+    assert trial_outcome(logs[:1]) == "PASS"
@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from json_stream import JSONListStream
+
+USUARIOS = [{"id": 1, "name": "João", "age": 30}, {"id": 22, "name": "李小龍 👩‍💻", "age": 1e3},
+            {"id": 333, "name": "Zoë", "age": None, "tags": ["a", {"b": [1, 2]}]}]
+
+
+def _pedacos(corpo: bytes, tamanho: int):
+    return [corpo[i:i + tamanho] for i in range(0, len(corpo), tamanho)]
+
+
+@pytest.mark.parametrize("tamanho", [1, 2, 3, 7, 64, 10000])
+def test_mesmos_itens_qualquer_que_seja_o_corte(tamanho):
+    corpo = json.dumps({"data": USUARIOS, "pagination": {"page": 1, "total": 3}}, ensure_ascii=False,
+                       indent=1).encode("utf-8")
+    stream = JSONListStream(_pedacos(corpo, tamanho))
+    assert list(stream) == USUARIOS
+    assert (stream.shape, stream.count, stream.pagination) == ("paginated", 3, {"page": 1, "total": 3})
+
+
+@pytest.mark.parametrize("tamanho", [1, 2, 5])
+def test_numero_no_fim_do_pedaco_nao_e_cortado(tamanho):
+    stream = JSONListStream(_pedacos(b"[1, 23456, -7.5e2, 89]", tamanho))
+    assert list(stream) == [1, 23456, -750.0, 89]
+    assert stream.shape == "list"
+
+
+def test_formas_da_resposta():
+    vazia = JSONListStream([b" [ ] "])
+    assert list(vazia) == [] and vazia.shape == "list"
+    erro = JSONListStream([b'{"error": "Usu', b'\xc3', b'\xa1rio n\xc3\xa3o encontrado"}'])
+    assert list(erro) == [] and erro.shape == "object" and erro.extra == {"error": "Usuário não encontrado"}
+    # pagination antes de data também é lido
+    invertida = JSONListStream([b'{"pagination": {"page": 2}, "data": [{"id": 1}]}'])
+    assert list(invertida) == [{"id": 1}] and invertida.pagination == {"page": 2}
+
+
+def test_iterar_de_novo_continua_e_drain_conta_tudo():
+    stream = JSONListStream(_pedacos(json.dumps(USUARIOS).encode(), 4))
+    assert next(iter(stream)) == USUARIOS[0]
+    assert stream.drain() == 3
+    assert list(stream) == []
+
+
+@pytest.mark.parametrize("corpo", [b"", b"[1, 2", b'{"data": [1,, 2]}', b"null", b"[1] [2]"])
+def test_json_invalido(corpo):
+    with pytest.raises(ValueError):
+        list(JSONListStream(_pedacos(corpo, 2)))
+
+
+def test_le_o_corpo_ate_o_fim():
+    lidos = []
+
+    def pedacos():
+        for pedaco in (b'[{"id": 1}]', b"  \n"):
+            lidos.append(pedaco)
+            yield pedaco
+
+    assert list(JSONListStream(pedacos())) == [{"id": 1}]
+    assert lidos == [b'[{"id": 1}]', b"  \n"]
@@ -0,0 +1,99 @@
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from load_generator import (DEFAULT_SCENARIOS, LoadGenerator, OpenLoopGenerator, Scenario, parse_rates,
+                            print_open_loop_report)
+
+
+class ApiImediata:
+    def make_request(self, method, endpoint, data=None, params=None):
+        return {"status_code": 200}
+
+
+class ApiComIds:
+    """Devolve um id novo a cada POST e guarda as chamadas recebidas"""
+
+    def __init__(self):
+        self.chamadas = []
+        self._proximo_id = 100
+
+    def make_request(self, method, endpoint, data=None, params=None):
+        self.chamadas.append((method, endpoint))
+        if method == "POST":
+            self._proximo_id += 1
+            return {"status_code": 201, "data": {"data": {"id": self._proximo_id}}}
+        return {"status_code": 200, "data": {}}
+
+
+def test_degrau_sem_requisicoes_nao_conta_como_saturacao(capsys):
+    relatorio = OpenLoopGenerator(ApiImediata(), [0.05, 20], step_duration=0.2, latency_limit_ms=1000).run()
+    vazio, cheio = relatorio["steps"]
+    assert (vazio["requests"], vazio["within_limit"]) == (0, None)
+    assert (cheio["requests"], cheio["within_limit"]) == (4, True)
+    assert relatorio["saturation_rps"] is None
+    assert relatorio["max_sustained_rps"] == 20
+    print_open_loop_report(relatorio)
+    assert "sem requisições no degrau" in capsys.readouterr().out
+
+
+def test_degrau_acima_do_limite_marca_a_saturacao():
+    relatorio = OpenLoopGenerator(ApiImediata(), [20, 40], step_duration=0.2, latency_limit_ms=0).run()
+    assert [degrau["within_limit"] for degrau in relatorio["steps"]] == [False]
+    assert (relatorio["saturation_rps"], relatorio["max_sustained_rps"]) == (20, None)
+
+
+def test_taxas_nao_positivas_sao_recusadas():
+    assert parse_rates("50, 100,,200") == [50, 100, 200]
+    for taxas in ("0,5", "-10", "inf", "", "a,b"):
+        with pytest.raises(ValueError):
+            parse_rates(taxas)
+    with pytest.raises(ValueError, match="positivas"):
+        OpenLoopGenerator(ApiImediata(), [10, 0])
+
+
+def test_cenarios_sorteados_na_proporcao_dos_pesos():
+    sorteios = Counter()
+
+    def cenario(nome):
+        return Scenario(nome, {"a": 70, "b": 20, "c": 10}[nome], lambda vu: sorteios.update([nome]))
+
+    gerador = LoadGenerator(ApiImediata(), [cenario("a"), cenario("b"), cenario("c")], virtual_users=4,
+                            duration=None, iterations=1000, seed=3)
+    gerador.run()
+    assert sum(sorteios.values()) == 4000
+    assert sorteios["a"] / 4000 == pytest.approx(0.7, abs=0.03)
+    assert sorteios["b"] / 4000 == pytest.approx(0.2, abs=0.03)
+    assert sorteios["c"] / 4000 == pytest.approx(0.1, abs=0.03)
+
+
+def test_cenario_com_peso_zero_nunca_roda():
+    sorteios = Counter()
+    cenarios = [Scenario("sempre", 1, lambda vu: sorteios.update(["sempre"])),
+                Scenario("nunca", 0, lambda vu: sorteios.update(["nunca"]))]
+    LoadGenerator(ApiImediata(), cenarios, virtual_users=2, duration=None, iterations=200, seed=1).run()
+    assert sorteios == {"sempre": 400}
+
+
+def test_mix_padrao_so_altera_usuarios_criados_pela_carga():
+    api = ApiComIds()
+    relatorio = LoadGenerator(api, DEFAULT_SCENARIOS, virtual_users=1, duration=None, iterations=300, seed=7).run()
+    assert relatorio["total_requests"] == len(api.chamadas)
+    assert relatorio["endpoints"]["GET /users"]["requests"] > relatorio["endpoints"]["POST /users"]["requests"]
+    criados = {f"/users/{id_}" for id_ in range(101, 101 + sum(m == "POST" for m, _ in api.chamadas))}
+    assert {endpoint for metodo, endpoint in api.chamadas if metodo in ("PUT", "DELETE")} <= criados
+
+
+def test_mesma_semente_repete_a_sequencia():
+    sequencias = []
+    for _ in range(2):
+        api = ApiComIds()
+        LoadGenerator(api, DEFAULT_SCENARIOS, virtual_users=1, duration=None, iterations=50, seed=11).run()
+        sequencias.append([metodo for metodo, _ in api.chamadas])
+    assert sequencias[0] == sequencias[1]
+    with pytest.raises(ValueError):
+        LoadGenerator(ApiImediata(), duration=None, iterations=None)
@@ -0,0 +1,127 @@
+import os
+import re
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Importado pelo módulo: TesterMetrics no escopo do arquivo seria confundido com uma classe de teste
+import metrics
+from simple_api_tester import SimpleAPITester
+
+# Linha de amostra do formato de texto: nome{rótulos} valor
+_AMOSTRA = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+
+
+class ClassificadorFixo:
+    def summary(self):
+        return {"budget": {"spent": 3, "denied": 1}, "labels": {"flaky": 2, "persistent": 1}}
+
+
+class HedgerFixo:
+    def counters(self):
+        return {"GET /users": {"hedges": 4, "hedge_wins": 1}}
+
+
+def _testador():
+    testador = SimpleAPITester("http://api", transport=object())
+    for total_ms in (3, 30, 300, 3000):
+        testador.timings.record("GET /users", 200, {"ttfb": total_ms})
+    testador.timings.record("GET /users/:id", 404, {"ttfb": 2})
+    testador.log_test("Health", "200", "200", "PASS")
+    testador.log_test('Nome com "aspas"\nquebrado', "201", "500", "BUG")
+    return testador
+
+
+def _familias(texto):
+    """Valida a estrutura do texto e devolve {família: (tipo, unidade, [(nome, rótulos, valor)])}"""
+    assert texto.endswith("\n# EOF\n") and texto.count("# EOF") == 1
+    familias = {}
+    atual = None
+    for linha in texto.splitlines()[:-1]:
+        if linha.startswith("# TYPE "):
+            _, _, nome, tipo = linha.split(" ")
+            assert nome not in familias, f"família {nome} repetida"
+            atual = familias[nome] = (tipo, [None], [])
+        elif linha.startswith("# UNIT "):
+            nome, unidade = linha.split(" ")[2:]
+            assert atual is familias[nome] and nome.endswith(f"_{unidade}")
+            atual[1][0] = unidade
+        elif linha.startswith("# HELP "):
+            assert linha.split(" ")[2] in familias
+        else:
+            nome, rotulos, valor = _AMOSTRA.match(linha).groups()
+            assert nome.startswith(next(reversed(familias)))
+            atual[2].append((nome, dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', rotulos or "")), float(valor)))
+    return {nome: (tipo, unidade[0], amostras) for nome, (tipo, unidade, amostras) in familias.items()}
+
+
+def test_contadores_de_requisicoes_testes_e_bugs():
+    familias = _familias(metrics.TesterMetrics(_testador()).render())
+    tipo, _, requisicoes = familias["api_tester_requests"]
+    assert tipo == "counter"
+    assert requisicoes == [("api_tester_requests_total", {"endpoint": "GET /users", "status": "200"}, 4),
+                           ("api_tester_requests_total", {"endpoint": "GET /users/:id", "status": "404"}, 1)]
+    assert familias["api_tester_tests"][2] == [("api_tester_tests_total", {"status": "BUG"}, 1),
+                                               ("api_tester_tests_total", {"status": "PASS"}, 1)]
+    # Aspas e quebra de linha escapadas no valor do rótulo
+    assert familias["api_tester_bugs"][2] == [("api_tester_bugs_total", {"test": 'Nome com \\"aspas\\"\\nquebrado'}, 1)]
+    assert familias["api_tester_wire_bytes"][1] == "bytes"
+    # Famílias opcionais só aparecem com classificador ou hedger
+    assert "api_tester_retries" not in familias and "api_tester_hedges" not in familias
+
+
+def test_histograma_de_latencia_acumulado():
+    familias = _familias(metrics.TesterMetrics(_testador()).render())
+    tipo, unidade, amostras = familias["api_tester_request_duration_seconds"]
+    assert (tipo, unidade) == ("histogram", "seconds")
+    listagem = [(nome, rotulos, valor) for nome, rotulos, valor in amostras if rotulos["endpoint"] == "GET /users"]
+    baldes = [(rotulos["le"], valor) for nome, rotulos, valor in listagem if nome.endswith("_bucket")]
+    assert baldes[-1] == ("+Inf", 4)
+    limites = [float(le) for le, _ in baldes[:-1]]
+    assert limites == sorted(limites)
+    contagens = [valor for _, valor in baldes]
+    assert contagens == sorted(contagens)
+    assert dict(baldes)["0.005"] == 1 and dict(baldes)["0.05"] == 2 and dict(baldes)["0.5"] == 3
+    contagem, soma = [valor for nome, _, valor in listagem if not nome.endswith("_bucket")]
+    assert contagem == 4 and abs(soma - 3.333) <= 3.333 * 0.01
+
+
+def test_repeticoes_e_hedges():
+    testador = _testador()
+    testador.retry_classifier = ClassificadorFixo()
+    familias = _familias(metrics.TesterMetrics(testador, hedger=HedgerFixo()).render())
+    assert familias["api_tester_retries"][2] == [("api_tester_retries_total", {}, 3)]
+    assert familias["api_tester_retries_denied"][2] == [("api_tester_retries_denied_total", {}, 1)]
+    assert [rotulos["label"] for _, rotulos, _ in familias["api_tester_classified_failures"][2]] == [
+        "flaky", "persistent"]
+    assert familias["api_tester_hedge_wins"][2] == [("api_tester_hedge_wins_total", {"endpoint": "GET /users"}, 1)]
+
+
+def test_testador_sem_requisicoes_gera_so_o_eof():
+    testador = SimpleAPITester("http://api", transport=object())
+    assert metrics.TesterMetrics(testador).render() == "# EOF\n"
+
+
+def test_arquivo_e_endpoint_de_coleta(tmp_path, capsys):
+    metricas = metrics.TesterMetrics(_testador())
+    caminho = str(tmp_path / "metricas.prom")
+    metrics.write_metrics(metricas, caminho)
+    with open(caminho, encoding="utf-8") as arquivo:
+        assert arquivo.read() == metricas.render()
+    assert not os.path.exists(f"{caminho}.tmp")
+
+    servidor = metrics.MetricsServer(metricas, port=0)
+    servidor.start()
+    try:
+        with urllib.request.urlopen(servidor.url, timeout=2) as resposta:
+            assert resposta.headers["Content-Type"] == metrics.CONTENT_TYPE
+            assert resposta.read().decode("utf-8") == metricas.render()
+        with pytest.raises(urllib.error.HTTPError, match="404"):
+            urllib.request.urlopen(servidor.url.replace("/metrics", "/outra"), timeout=2)
+    finally:
+        servidor.stop()
+    assert "📡 Métricas em" in capsys.readouterr().out
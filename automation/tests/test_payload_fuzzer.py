@@ -0,0 +1,102 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from payload_fuzzer import (INVALID_ACCEPTED, PayloadFuzzer, _preference, log_fuzz_results, shrink_candidates,
+                            violations)
+
+
+def test_violations_segue_o_contrato():
+    assert violations({"name": "João", "email": "joao@email.com", "age": 30, "status": "active"}, "POST") == ()
+    assert violations({"name": "João"}, "POST") == ("email ausente",)
+    assert violations({}, "PUT") == ()
+    assert violations([], "POST") == ("corpo não é um objeto",)
+    assert violations({"age": True}, "PUT") == ("age fora de 0-150 ou não numérica",)
+    assert violations({"name": " ", "status": "deleted"}, "PUT") == (
+        "name vazio ou não textual", "status fora de active/inactive/pending")
+    # Campos extras não mudam a validade
+    assert violations({"age": None, "role": "admin"}, "PUT") == ()
+
+
+def test_candidatos_sao_menores_que_o_payload():
+    payload = {"name": "Zoë", "age": 25.5, "status": "active"}
+    candidatos = list(shrink_candidates(payload))
+    assert {"age": 25.5, "status": "active"} in candidatos
+    assert all(len(json.dumps(c)) <= len(json.dumps(payload)) for c in candidatos)
+    assert list(shrink_candidates("texto")) == [{}]
+
+
+def _fuzzer(falha, **opcoes):
+    fuzzer = PayloadFuzzer(None, shrink_attempts=1, reproduce_attempts=5, **opcoes)
+    fuzzer._attempt = lambda method, payload, target: (INVALID_ACCEPTED if falha(payload) else None, 201)
+    return fuzzer
+
+
+def _grupo(exemplo, metodo="PUT"):
+    return {"method": metodo, "kind": INVALID_ACCEPTED, "violations": list(violations(exemplo, metodo)),
+            "example": exemplo, "target": 1}
+
+
+def test_reducao_chega_ao_caso_minimo():
+    exemplo = {"name": "Teste Usuário", "email": "teste@email.com", "age": 25, "status": "", "x": [1, 2]}
+    fuzzer = _fuzzer(lambda payload: payload.get("status") == "")
+    minimo = fuzzer.shrink(_grupo(exemplo))
+    assert minimo["payload"] == {"status": ""}
+    assert (minimo["reproduced"], minimo["attempts"]) == (5, 5)
+
+
+def test_minimo_que_nao_se_repete_volta_ao_exemplo():
+    exemplo = {"name": "Teste Usuário", "status": ""}
+    vistos = set()
+
+    def falha(payload):
+        # Só o exemplo falha sempre; os candidatos falham uma única vez, por acaso
+        if payload == exemplo:
+            return True
+        chave = json.dumps(payload, sort_keys=True)
+        primeira = chave not in vistos
+        vistos.add(chave)
+        return primeira
+
+    minimo = _fuzzer(falha).shrink(_grupo(exemplo))
+    assert minimo["payload"] == exemplo
+    assert minimo["reproduced"] == 5
+
+
+def test_grupo_prefere_o_caso_que_mais_se_repete():
+    raro = {"payload": {"status": ""}, "reproduced": 1, "attempts": 10}
+    frequente = {"payload": {"name": "a", "status": ""}, "reproduced": 9, "attempts": 10}
+    assert _preference(frequente) > _preference(raro)
+    menor = dict(frequente, payload={"status": ""})
+    assert _preference(menor) > _preference(frequente)
+
+
+class Registro:
+    def __init__(self):
+        self.testes = []
+
+    def log_test(self, test_name, expected, actual, status, bug_description=None, timings=None):
+        self.testes.append((test_name, status, actual))
+
+
+def test_falha_nao_confirmada_nao_vira_bug():
+    relatorio = {
+        "methods": {"PUT": {"cases": 100}, "POST": {"cases": 100}},
+        "failures": [
+            {"method": "PUT", "kind": INVALID_ACCEPTED, "violations": ["status fora de active/inactive/pending"],
+             "count": 3, "status_codes": {"200": 3}, "confirmed": False,
+             "minimal": {"payload": {"status": ""}, "reproduced": 0, "attempts": 10}},
+            {"method": "POST", "kind": INVALID_ACCEPTED, "violations": ["email inválido"], "count": 7,
+             "status_codes": {"201": 7}, "confirmed": True,
+             "minimal": {"payload": {"name": "a", "email": ""}, "reproduced": 4, "attempts": 10}},
+        ]
+    }
+    registro = Registro()
+    log_fuzz_results(registro, relatorio)
+    status = {nome: status for nome, status, _ in registro.testes}
+    assert status == {"Fuzz - PUT /users/:id": "PASS",
+                      "Fuzz - POST /users aceitou payload inválido (email inválido)": "BUG"}
+    put = [atual for nome, _, atual in registro.testes if "PUT" in nome]
+    assert put == ["100 casos sem divergência confirmada (3 divergências não confirmadas)"]
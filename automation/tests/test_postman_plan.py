@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from postman_plan import DEFAULT_COLLECTION, compile_collection, load_plan, parse_expectation
+
+
+def _item(nome, metodo, url, teste=None):
+    item = {"name": nome, "request": {"method": metodo, "url": {"raw": url}}}
+    if teste:
+        item["event"] = [{"listen": "test", "script": {"exec": [teste]}}]
+    return item
+
+
+def _colecao(*itens):
+    return {"info": {"name": "Teste"}, "variable": [{"key": "base_url", "value": "http://api"}],
+            "item": [{"name": "Usuários", "item": list(itens)}]}
+
+
+def test_rotulo_de_url_dinamica():
+    plano = compile_collection(_colecao(_item("Aleatório", "GET", "{{base_url}}/users/{{$randomInt}}?x={{$guid}}"),
+                                        _item("Fixo", "DELETE", "{{base_url}}/users/10"),
+                                        _item("Raiz", "GET", "{{base_url}}")))
+    assert [pedido.label for pedido in plano.requests] == ["GET /users/:id", "DELETE /users/:id", "GET /"]
+
+
+def test_esperado_vem_do_script_depois_da_configuracao_e_do_metodo():
+    colecao = _colecao(
+        _item("Com script", "GET", "{{base_url}}/users/1", "pm.response.to.have.status(404);"),
+        _item("Id inexistente", "GET", "{{base_url}}/users/999999"),
+        _item("Criar", "POST", "{{base_url}}/users"))
+    plano = compile_collection(colecao, expectations={r"Usuários/Id inexistente": (404, 410), "Com script": (500,)})
+    assert [pedido.expected for pedido in plano.requests] == [(404,), (404, 410), (201,)]
+    assert [pedido.expected for pedido in compile_collection(colecao, expectations={}).requests] == \
+        [(404,), (200,), (201,)]
+
+
+def test_colecao_do_repositorio_espera_404_no_id_inexistente():
+    plano = load_plan(DEFAULT_COLLECTION, {"base_url": "http://localhost:3000"})
+    esperados = {pedido.name: pedido.expected for pedido in plano.requests}
+    assert esperados["Get User by ID - Consistency Test (Execute várias vezes)"] == (404,)
+    sem_padrao = load_plan(DEFAULT_COLLECTION, {"base_url": "http://localhost:3000"}, {})
+    assert sem_padrao is not plano
+    assert {pedido.name: pedido.expected for pedido in sem_padrao.requests}[
+        "Get User by ID - Consistency Test (Execute várias vezes)"] == (200,)
+
+
+def test_parse_expectation():
+    assert parse_expectation("Consistency Test=404") == ("Consistency Test", (404,))
+    assert parse_expectation("a=b=200, 204") == ("a=b", (200, 204))
+    for invalido in ("404", "Teste=", "=404", "Teste=abc"):
+        with pytest.raises(ValueError):
+            parse_expectation(invalido)
@@ -0,0 +1,122 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest_plugin
+
+pytest_plugins = ["pytester"]
+
+# Testador falso: registra PASS ou BUG como o TestesBasicosAPI, sem fazer requisições
+VERIFICACOES = '''
+from contextlib import contextmanager
+
+
+class Verificacoes:
+    MARCADORES_PYTEST = {
+        "testar_lento": ("slow",),
+        "testar_cria": (("stateful", "usuarios"),),
+        "testar_sem_grupo": ("stateful",),
+    }
+
+    def __init__(self, url_base, transporte):
+        self.url_base = url_base
+        self.resultados_teste = []
+
+    def registrar(self, nome, status):
+        self.resultados_teste.append({"nome_teste": nome, "esperado": "200", "atual": "500" if status == "BUG"
+                                      else "200", "status": status, "descricao_bug": None})
+
+    @contextmanager
+    def usuario_temporario(self):
+        yield {"id": 13}
+
+    def testar_rapido(self):
+        self.registrar("Rápido", "PASS")
+
+    def testar_lento(self):
+        """Varre todas as páginas"""
+        self.registrar("Lento", "PASS")
+
+    def testar_cria(self, usuario):
+        self.registrar("Cria", "PASS" if usuario["id"] == 13 else "BUG")
+
+    def testar_sem_grupo(self):
+        self.registrar("Com bug", "BUG")
+
+    def auxiliar(self):
+        raise AssertionError("não é um testar_* e não deveria ser coletado")
+'''
+
+
+@pytest.fixture
+def projeto(pytester):
+    pytester.syspathinsert(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    pytester.makepyfile(test_verificacoes=VERIFICACOES)
+    return pytester
+
+
+def test_testar_viram_itens_com_os_lentos_primeiro(projeto):
+    resultado = projeto.runpytest("-p", "pytest_plugin", "--collect-only", "-q")
+    coletados = [linha.split("::")[-1] for linha in resultado.outlines if "::" in linha]
+    assert coletados == ["testar_lento", "testar_cria", "testar_rapido", "testar_sem_grupo"]
+
+
+def test_bug_registrado_falha_o_teste(projeto):
+    resultado = projeto.runpytest("-p", "pytest_plugin", "--api-base-url", "http://api")
+    resultado.assert_outcomes(passed=3, failed=1)
+    # pytrace=False: só a mensagem com os BUGs, sem o traceback do plugin
+    resultado.stdout.fnmatch_lines(["*_ testar_sem_grupo _*", "Com bug: esperado 200, atual 500"])
+
+
+def test_sem_url_os_testes_sao_pulados(projeto, monkeypatch):
+    monkeypatch.delenv("API_BASE_URL", raising=False)
+    projeto.runpytest("-p", "pytest_plugin").assert_outcomes(skipped=4)
+
+
+def test_marcadores_filtram_e_viram_grupos_do_xdist(projeto):
+    projeto.makeconftest('''
+def pytest_collection_finish(session):
+    for item in session.items:
+        grupo = item.get_closest_marker("xdist_group")
+        print(f"GRUPO {item.name} {grupo.args[0] if grupo else '-'}")
+''')
+    resultado = projeto.runpytest("-p", "pytest_plugin", "--collect-only", "-q", "-s", "-m", "not slow")
+    resultado.stdout.fnmatch_lines(["GRUPO testar_cria usuarios", "GRUPO testar_rapido -",
+                                    f"GRUPO testar_sem_grupo {pytest_plugin.DEFAULT_STATEFUL_GROUP}"])
+    assert "testar_lento" not in resultado.stdout.str()
+
+
+def test_check_recebe_as_fixtures_e_a_docstring():
+    class Verificacoes:
+        MARCADORES_PYTEST = {"testar_cria": ("slow", ("stateful", "memoria"))}
+
+        def testar_leitura(self):
+            """Só lê"""
+
+        def testar_cria(self, usuario):
+            pass
+
+    leitura = pytest_plugin._make_check(Verificacoes, "testar_leitura")
+    cria = pytest_plugin._make_check(Verificacoes, "testar_cria")
+    assert leitura.__code__.co_varnames[:2] == ("testador_api", "api_test_timeout")
+    assert cria.__code__.co_varnames[:3] == ("testador_api", "usuario_criado", "api_test_timeout")
+    assert (leitura.__name__, leitura.__doc__, leitura.tester_cls) == ("testar_leitura", "Só lê", Verificacoes)
+    assert not hasattr(leitura, "pytestmark")
+    assert [(marca.name, marca.args) for marca in cria.pytestmark] == [("slow", ()), ("stateful", ("memoria",))]
+
+
+def test_prazo_esgotado_vira_falha_sem_traceback():
+    class Lento:
+        resultados_teste = []
+
+        def testar_espera(self):
+            from deadlines import effective_timeout
+            effective_timeout(None)
+            raise AssertionError("o prazo já deveria ter acabado")
+
+    with pytest.raises(pytest.fail.Exception, match="testar_espera: prazo de testar_espera de 0s esgotado"):
+        pytest_plugin._run_check(Lento(), "testar_espera", 0)
+
@@ -0,0 +1,84 @@
+import contextvars
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from request_timing import PHASES, RequestTimings
+from simple_api_tester import SimpleAPITester
+from standin_server import StandinAPI, StandinServer
+from transport import HTTPTransport, Response
+
+
+def test_registro_tem_todas_as_fases_e_o_total():
+    tempos = RequestTimings()
+    resposta = Response(200, "OK", {}, b"{}", {"connect": 1.0, "ttfb": 2.5}, wire_bytes=2)
+    registro = tempos.record("GET /health", 200, dict(resposta.timings, json=0.5), resposta)
+    assert [chave for chave in registro if chave.endswith("_ms")] == [f"{fase}_ms" for fase in PHASES] + ["total_ms"]
+    assert (registro["dns_ms"], registro["connect_ms"], registro["ttfb_ms"], registro["json_ms"]) == (0, 1, 2.5, 0.5)
+    assert registro["total_ms"] == 4.0
+    assert (registro["wire_bytes"], registro["body_bytes"]) == (2, 2)
+    assert tempos.drain() == [registro]
+    assert tempos.drain() == []
+
+
+def test_resumo_por_endpoint():
+    tempos = RequestTimings()
+    tempos.record("GET /users", 200, {"ttfb": 10.0, "body": 2.0})
+    tempos.record("GET /users", 500, {"ttfb": 30.0, "body": 4.0})
+    tempos.record("POST /users", None, {"connect": 1.0})
+    resumo = tempos.summary()
+    assert list(resumo) == ["GET /users", "POST /users"]
+    listagem = resumo["GET /users"]
+    assert listagem["requests"] == 2
+    assert listagem["status_codes"] == {"200": 1, "500": 1}
+    assert (listagem["mean_ms"]["ttfb"], listagem["mean_ms"]["body"], listagem["mean_ms"]["dns"]) == (20, 3, 0)
+    assert abs(listagem["total_max_ms"] - 34) <= 34 * 0.01
+    assert resumo["POST /users"]["status_codes"] == {"erro": 1}
+
+
+def test_pendentes_ficam_no_contexto_de_cada_teste():
+    tempos = RequestTimings()
+    tempos.record("GET /health", 200, {})
+
+    def outro_teste():
+        tempos.record("GET /users", 200, {})
+        return [registro["endpoint"] for registro in tempos.drain()]
+
+    # O contexto copiado herda o que já estava pendente, mas não devolve o que mediu
+    assert contextvars.copy_context().run(outro_teste) == ["GET /health", "GET /users"]
+    assert [registro["endpoint"] for registro in tempos.drain()] == ["GET /health"]
+    assert tempos.summary()["GET /users"]["requests"] == 1
+
+
+def test_sem_keep_pending_so_o_resumo_guarda():
+    tempos = RequestTimings()
+    tempos.keep_pending = False
+    for _ in range(3):
+        tempos.record("GET /users", 200, {"ttfb": 1.0})
+    assert tempos.drain() == []
+    assert tempos.summary()["GET /users"]["requests"] == 3
+    tempos.reset()
+    assert tempos.summary() == {}
+
+
+def test_resultado_do_teste_leva_os_tempos_medidos():
+    transporte = HTTPTransport(pool_size=1, timeout=2)
+    try:
+        with StandinServer(StandinAPI(seed=1, time_scale=0)) as servidor:
+            testador = SimpleAPITester(servidor.base_url, transport=transporte)
+            testador.make_request("GET", "/health")
+            testador.make_request("GET", "/users", params={"page": 1})
+            testador.log_test("Health", "200", "200", "PASS")
+            testador.make_request("GET", "/health")
+            testador.log_test("Health de novo", "200", "200", "PASS")
+    finally:
+        transporte.close()
+
+    primeiro, segundo = list(testador.test_results)
+    assert [registro["endpoint"] for registro in primeiro["timings"]] == ["GET /health", "GET /users"]
+    conexao_nova, listagem = primeiro["timings"]
+    assert conexao_nova["connect_ms"] > 0 and conexao_nova["ttfb_ms"] > 0
+    assert listagem["connect_ms"] == 0 and listagem["json_ms"] > 0
+    assert [registro["endpoint"] for registro in segundo["timings"]] == ["GET /health"]
+    assert testador.timings.summary()["GET /health"]["requests"] == 2
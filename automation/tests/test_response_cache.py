@@ -0,0 +1,119 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import test_api_basic
+from request_timing import RequestTimings
+from response_cache import CachingTransport, ResponseCache, cache_key
+from standin_server import StandinAPI
+from transport import Response, StreamingResponse
+
+API = "http://api"
+
+
+class TransporteContador:
+    """Responde 200 a tudo (201 no POST) e guarda o que recebeu"""
+
+    def __init__(self):
+        self.pedidos = []
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        self.pedidos.append((method, url, dict(headers or {})))
+        status = 201 if method == "POST" else 200
+        return Response(status, "OK", {}, f"{method} {url}".encode())
+
+    def stream(self, method, url, body=None, headers=None, timeout=None):
+        self.pedidos.append((method, url, dict(headers or {})))
+        return StreamingResponse(200, "OK", {}, iter([b"[1, ", b"2, ", b"3]"]), wire_bytes=9)
+
+    def close(self):
+        pass
+
+
+def test_chave_ignora_ordem_da_query_e_barra_final():
+    assert cache_key("get", f"{API}/users/?page=1&limit=5") == cache_key("GET", f"{API}/users?limit=5&page=1")
+
+
+def test_escrita_invalida_recurso_filhos_e_colecao():
+    cache = ResponseCache()
+    for caminho in ("/users?page=1", "/users?page=2", "/users/5", "/users/5/posts", "/users/6", "/health", "/"):
+        cache.put("GET", f"{API}{caminho}", Response(200, "OK", {}, b"x"))
+    assert cache.invalidate(f"{API}/users/5") == 4
+    assert cache.get("GET", f"{API}/users/6") is not None
+    assert cache.get("GET", f"{API}/health") is not None
+    assert cache.get("GET", f"{API}/users?page=1") is None
+    # Um POST na coleção de primeiro nível não derruba a raiz nem os outros endpoints
+    cache.put("GET", f"{API}/users?page=1", Response(200, "OK", {}, b"x"))
+    assert cache.invalidate(f"{API}/users") == 2
+    assert cache.get("GET", f"{API}/") is not None and cache.get("GET", f"{API}/health") is not None
+
+
+def test_lru_e_ttl():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    for caminho in ("/a", "/b"):
+        cache.put("GET", f"{API}{caminho}", Response(200, "OK", {}, b"x"))
+    cache.get("GET", f"{API}/a")
+    cache.put("GET", f"{API}/c", Response(200, "OK", {}, b"x"))
+    assert cache.get("GET", f"{API}/b") is None and cache.get("GET", f"{API}/a") is not None
+    assert cache.stats()["evictions"] == 1
+    vencido = ResponseCache(ttl=0)
+    vencido.put("GET", f"{API}/a", Response(200, "OK", {}, b"x"))
+    assert vencido.get("GET", f"{API}/a") is None
+
+
+def test_caching_transport_responde_do_cache_ate_uma_escrita():
+    interno = TransporteContador()
+    transporte = CachingTransport(interno)
+    primeira = transporte.request("GET", f"{API}/users")
+    repetida = transporte.request("GET", f"{API}/users")
+    assert repetida.body == primeira.body and repetida.wire_bytes == 0 and len(interno.pedidos) == 1
+    transporte.request("POST", f"{API}/users", body=b"{}")
+    transporte.request("GET", f"{API}/users")
+    assert [metodo for metodo, _, _ in interno.pedidos] == ["GET", "POST", "GET"]
+    # Um hit no stream também não vai à rede
+    assert transporte.stream("GET", f"{API}/users").read() == primeira.body
+    assert len(interno.pedidos) == 3
+
+
+
+def test_stream_lido_ate_o_fim_fica_no_cache():
+    interno = TransporteContador()
+    transporte = CachingTransport(interno)
+    interrompido = transporte.stream("GET", f"{API}/users?page=1")
+    next(interrompido.iter_chunks())
+    interrompido.close()
+    assert transporte.cache.stats()["entries"] == 0
+    assert transporte.stream("GET", f"{API}/users?page=1").read() == b"[1, 2, 3]"
+    acerto = transporte.request("GET", f"{API}/users?page=1")
+    assert (acerto.body, acerto.wire_bytes, acerto.from_cache) == (b"[1, 2, 3]", 0, True)
+    assert len(interno.pedidos) == 2
+
+
+def test_acertos_nao_entram_nos_tempos_nem_nos_slos():
+    tempos = RequestTimings()
+    transporte = CachingTransport(TransporteContador())
+    for _ in range(3):
+        resposta = transporte.request("GET", f"{API}/users")
+        tempos.record("GET /users", resposta.status, dict(resposta.timings, ttfb=5.0), resposta)
+    acerto = transporte.stream("GET", f"{API}/users")
+    assert acerto.from_cache
+    tempos.record("GET /users", acerto.status, acerto.timings, acerto)
+    assert tempos.summary()["GET /users"]["requests"] == 1
+    assert tempos.sketches()["GET /users"].min >= 5.0
+    assert len(tempos.drain()) == 1
+
+
+def test_verificacoes_de_leitura_pedem_a_mesma_pagina():
+    api = StandinAPI(seed=1, time_scale=0)
+    cache = ResponseCache()
+    testador = test_api_basic.TestesBasicosAPI(api.mount("cache"), cache_respostas=cache)
+    try:
+        testador.testar_emails_duplicados()
+        testador.testar_tipos_idade()
+        testador.testar_estrutura_usuarios()
+    finally:
+        api.unmount("cache")
+    # A página lida em stream pelo crawler serve as outras duas verificações
+    assert (cache.stats()["misses"], cache.stats()["hits"]) == (1, 2)
+    assert testador.tempos.summary()["GET /users"]["requests"] == 1
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from results_sink import JSONLResultSink, export_legacy, iter_records, segment_paths
+
+
+def _execucao(caminho, quantidade, **opcoes):
+    sink = JSONLResultSink(caminho, **opcoes)
+    for i in range(quantidade):
+        sink.write({"test_name": f"teste {i}", "status": "BUG" if i % 2 else "PASS", "actual": "x" * 50})
+    sink.close()
+
+
+def test_segunda_execucao_nao_exporta_a_primeira(tmp_path):
+    caminho = str(tmp_path / "results.jsonl")
+    resultados, bugs = str(tmp_path / "test-results.json"), str(tmp_path / "bugs-found.json")
+    _execucao(caminho, 10, max_bytes=200)
+    assert len(segment_paths(caminho)) > 1
+    _execucao(caminho, 4)
+
+    assert export_legacy(caminho, resultados, bugs) == 4
+    with open(resultados, encoding="utf-8") as f:
+        assert len(json.load(f)) == 4
+    with open(bugs, encoding="utf-8") as f:
+        assert len(json.load(f)) == 2
+    assert segment_paths(caminho) == [caminho]
+
+
+def test_rotacao_mantem_a_ordem_entre_segmentos(tmp_path):
+    caminho = str(tmp_path / "results.jsonl")
+    _execucao(caminho, 10, max_bytes=200, buffer_records=1)
+    segmentos = segment_paths(caminho)
+    assert segmentos[0] == caminho and segmentos[1:] == [f"{caminho}.{i}" for i in range(1, len(segmentos))]
+    assert [registro["test_name"] for registro in iter_records(caminho)] == [f"teste {i}" for i in range(10)]
+
+
+def test_ultima_linha_truncada_e_ignorada(tmp_path):
+    caminho = str(tmp_path / "results.jsonl")
+    _execucao(caminho, 3)
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write('{"test_name": "teste 3", "sta')
+    assert [registro["test_name"] for registro in iter_records(caminho)] == ["teste 0", "teste 1", "teste 2"]
+
+
+def test_records_inclui_o_que_ainda_esta_no_buffer(tmp_path):
+    sink = JSONLResultSink(str(tmp_path / "results.jsonl"), buffer_records=100, flush_interval=60)
+    try:
+        sink.write({"test_name": "teste 0", "status": "PASS"})
+        assert [registro["test_name"] for registro in sink.records()] == ["teste 0"]
+    finally:
+        sink.close()
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from results_store import ResultStore
+
+CAMPOS = ("nome_teste", "esperado", "atual", "status", "descricao_bug")
+
+
+@pytest.fixture
+def resultados():
+    store = ResultStore(CAMPOS, extra_field="tempos")
+    store.append("Health", "200", "200", "PASS")
+    store.append("Criar usuário", "201", "500", "BUG", "Erro interno", extra=[{"endpoint": "POST /users"}])
+    store.append("Listar", "200", "200", "PASS")
+    store.append("Buscar", "404", "500", "BUG", "Status errado")
+    return store
+
+
+def test_registro_no_formato_de_sempre(resultados):
+    registro = resultados[1]
+    assert list(registro) == ["nome_teste", "timestamp", "esperado", "atual", "status", "descricao_bug", "tempos"]
+    assert (registro["nome_teste"], registro["status"], registro["tempos"]) == (
+        "Criar usuário", "BUG", [{"endpoint": "POST /users"}])
+    assert resultados[0]["descricao_bug"] is None and resultados[0]["tempos"] == []
+    assert resultados[-1]["nome_teste"] == "Buscar"
+    with pytest.raises(IndexError):
+        resultados[4]
+
+
+def test_fatias_iteracao_e_textos_repetidos(resultados):
+    assert [registro["nome_teste"] for registro in resultados[1:3]] == ["Criar usuário", "Listar"]
+    assert [registro["nome_teste"] for registro in resultados] == ["Health", "Criar usuário", "Listar", "Buscar"]
+    assert resultados.to_list() == list(resultados)
+    # "200", "PASS", "BUG", "500"... cada texto distinto guardado uma vez
+    assert len(resultados.strings) < 4 * len(CAMPOS)
+
+
+def test_visao_de_bugs_acompanha_o_store(resultados):
+    bugs = resultados.bugs
+    assert len(bugs) == 2
+    assert [bug["nome_teste"] for bug in bugs] == ["Criar usuário", "Buscar"]
+    assert bugs[-1]["descricao_bug"] == "Status errado"
+    assert [bug["nome_teste"] for bug in bugs[:1]] == ["Criar usuário"]
+    resultados.append("Apagar", "200", "500", "BUG")
+    assert len(bugs) == 3 and resultados.status_of(4) == "BUG"
+
+
+def test_build_record_nao_armazena(resultados):
+    registro = resultados.build_record("Extra", "200", "200", "PASS")
+    assert registro["nome_teste"] == "Extra" and len(resultados) == 4
+    with pytest.raises(ValueError):
+        ResultStore(("a", "b"))
@@ -0,0 +1,69 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from retry_policy import DETERMINISTIC, INTERMITTENT, TRANSIENT, UNCLASSIFIED, FailureClassifier, RetryBudget
+
+
+def test_orcamento_conta_gastos_e_recusas():
+    orcamento = RetryBudget(2, ratio=0.5)
+    assert orcamento.spend() and orcamento.spend()
+    assert not orcamento.spend()
+    orcamento.deposit()
+    assert not orcamento.spend()
+    orcamento.deposit()
+    assert orcamento.spend()
+    assert orcamento.stats() == {"spent": 3, "denied": 2, "remaining": 0}
+
+
+def test_orcamento_nao_gasta_alem_das_fichas_em_paralelo():
+    orcamento = RetryBudget(100)
+    aprovados = []
+    threads = [threading.Thread(target=lambda: aprovados.extend(orcamento.spend() for _ in range(50)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert aprovados.count(True) == 100
+    assert orcamento.stats() == {"spent": 100, "denied": 300, "remaining": 0}
+
+
+def _classificar(respostas, metodo="GET", fichas=10, replay=None):
+    sequencia = iter(respostas)
+    classificador = FailureClassifier(RetryBudget(fichas), max_attempts=5, base_delay=0, seed=1)
+    primeira, registro = classificador.run("teste", metodo, lambda: next(sequencia), lambda ok: ok, replay)
+    return classificador, primeira, registro
+
+
+@pytest.mark.parametrize("respostas, rotulo, tentativas", [
+    ([False] * 5, DETERMINISTIC, 5),
+    ([False, True, True], TRANSIENT, 3),
+    ([False, True, False, True, False], INTERMITTENT, 5),
+])
+def test_rotulos(respostas, rotulo, tentativas):
+    classificador, primeira, registro = _classificar(respostas)
+    assert primeira is False
+    assert (registro["label"], registro["attempts"]) == (rotulo, tentativas)
+    assert classificador.budget.stats()["spent"] == tentativas - 1
+
+
+def test_sem_orcamento_ou_sem_replay_fica_sem_classificacao():
+    classificador, _, registro = _classificar([False, False, False], fichas=1)
+    assert (registro["label"], registro["attempts"]) == (DETERMINISTIC, 2)
+    assert registro["reason"] == "orçamento de repetições esgotado"
+    assert classificador.budget.stats() == {"spent": 1, "denied": 1, "remaining": 0}
+
+    classificador, _, registro = _classificar([False], metodo="POST")
+    assert (registro["label"], registro["reason"]) == (UNCLASSIFIED, "POST não é idempotente")
+    assert classificador.budget.stats()["spent"] == 0
+
+
+def test_resposta_esperada_nao_gasta_fichas():
+    classificador, primeira, registro = _classificar([True])
+    assert (primeira, registro) == (True, None)
+    assert classificador.summary()["budget"]["spent"] == 0
@@ -0,0 +1,92 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from request_timing import RequestTimings
+from results_sink import JSONLResultSink
+from run_history import RunHistory
+from sketches import DDSketch
+
+
+def _resultado(nome, status):
+    return {"test_name": nome, "status": status, "expected": "200", "actual": "200" if status == "PASS" else "500"}
+
+
+def _sketch(*valores):
+    sketch = DDSketch()
+    for valor in valores:
+        sketch.add(valor)
+    return sketch
+
+
+@pytest.fixture
+def historico(tmp_path):
+    with RunHistory(str(tmp_path / "history.db")) as history:
+        yield history
+
+
+def test_primeira_falha_da_sequencia_atual(historico):
+    for status in ("BUG", "PASS", "BUG", "BUG"):
+        historico.record_run([_resultado("Criar usuário", status)])
+    assert historico.first_failure("Criar usuário")["id"] == 3
+
+    historico.record_run([_resultado("Criar usuário", "PASS")])
+    assert historico.first_failure("Criar usuário") is None
+
+
+def test_tendencia_de_p95_crescente(historico):
+    for execucao in range(6):
+        base = 100 + 20 * execucao
+        historico.record_run([_resultado("Listar", "PASS")],
+                             {"GET /users": _sketch(*(base + i for i in range(20)))})
+    tendencia = historico.latency_trend("GET /users")
+    valores = [ponto["value"] for ponto in tendencia["points"]]
+    assert len(valores) == 6 and valores == sorted(valores)
+    assert tendencia["trend"]["slope"] == pytest.approx(20, rel=0.05)
+    with pytest.raises(ValueError):
+        historico.latency_trend("GET /users", "p42_ms")
+
+
+def test_taxa_de_instabilidade_separa_instavel_de_quebrado(historico):
+    for status in ("PASS", "BUG", "PASS", "BUG"):
+        historico.record_run([_resultado("Instável", status), _resultado("Quebrado", "BUG"),
+                              _resultado("Estável", "PASS")])
+    taxas = {taxa["test"]: taxa for taxa in historico.flake_rates()}
+    assert [taxa["test"] for taxa in historico.flake_rates()][0] == "Instável"
+    assert (taxas["Instável"]["failures"], taxas["Instável"]["flips"]) == (2, 3)
+    assert (taxas["Quebrado"]["failure_rate"], taxas["Quebrado"]["flips"]) == (1.0, 0)
+    baixo, alto = taxas["Estável"]["failure_rate_ci"]
+    assert baixo == 0 and 0 < alto < 1
+    # Só as duas últimas execuções entram na janela
+    assert {taxa["test"]: taxa["runs"] for taxa in historico.flake_rates(last=2)}["Instável"] == 2
+
+
+def test_diff_entre_execucoes(historico):
+    antes = historico.record_run([_resultado("A", "PASS"), _resultado("B", "BUG"), _resultado("C", "PASS")],
+                                 {"GET /users": _sketch(*range(100, 200))})
+    depois = historico.record_run([_resultado("A", "BUG"), _resultado("B", "PASS"), _resultado("D", "PASS")],
+                                  {"GET /users": _sketch(*range(200, 300))})
+    diferenca = historico.diff(antes, depois)
+    assert diferenca["new_failures"] == ["A"]
+    assert diferenca["fixed"] == ["B"]
+    assert (diferenca["added"], diferenca["removed"]) == (["D"], ["C"])
+    p95 = diferenca["endpoints"][0]["p95_ms"]
+    assert p95["after"] > p95["before"] and p95["change"] > 0
+
+
+def test_grava_so_os_resultados_desta_execucao(historico, tmp_path):
+    caminho = str(tmp_path / "results.jsonl")
+    for quantidade in (5, 3):
+        sink = JSONLResultSink(caminho)
+        for i in range(quantidade):
+            sink.write(_resultado(f"teste {i}", "PASS"))
+        testador = SimpleNamespace(keep_results=False, results_sink=sink, test_results=[],
+                                   timings=RequestTimings(), base_url="http://localhost")
+        execucao = historico.record_tester(testador)
+        sink.close()
+    assert historico.runs()[-1]["id"] == execucao
+    assert [run["tests"] for run in historico.runs()] == [5, 3]
@@ -0,0 +1,65 @@
+import math
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sketches import DDSketch, summarize
+from stats import percentile
+
+
+def _valores(seed, quantidade=5000):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(4, 1) for _ in range(quantidade)]
+
+
+def _sketch(valores, **opcoes):
+    sketch = DDSketch(**opcoes)
+    for valor in valores:
+        sketch.add(valor)
+    return sketch
+
+
+@pytest.mark.parametrize("precisao", [0.01, 0.05])
+def test_erro_relativo_dos_quantis(precisao):
+    valores = _valores(1)
+    sketch = _sketch(valores, relative_accuracy=precisao)
+    ordenados = sorted(valores)
+    for pct in (1, 25, 50, 90, 95, 99, 99.9):
+        # Mesmo posto que o sketch usa: q * (n - 1), sem interpolar
+        exato = ordenados[int(pct / 100 * (len(ordenados) - 1))]
+        assert abs(sketch.percentile(pct) - exato) <= precisao * exato * 1.0001
+    assert sketch.percentile(0) == min(valores) and sketch.percentile(100) == max(valores)
+
+
+def test_merge_equivale_a_um_sketch_so():
+    a, b = _valores(1), _valores(2)
+    juntos = _sketch(a)
+    juntos.merge(_sketch(b))
+    unico = _sketch(a + b)
+    assert juntos.buckets == unico.buckets
+    assert (juntos.count, juntos.min, juntos.max) == (unico.count, unico.min, unico.max)
+    assert juntos.sum == pytest.approx(unico.sum)
+    assert juntos.percentile(95) == unico.percentile(95)
+    with pytest.raises(ValueError):
+        juntos.merge(DDSketch(relative_accuracy=0.05))
+
+
+def test_zeros_vazio_e_serializacao():
+    sketch = _sketch([0, 0, 10, 20])
+    assert sketch.percentile(25) == 0.0
+    assert sketch.count_at_most(0) == 2
+    copia = DDSketch.from_dict(sketch.to_dict())
+    assert copia.buckets == sketch.buckets and copia.percentile(90) == sketch.percentile(90)
+    assert all(math.isnan(valor) for valor in summarize(DDSketch()).values())
+
+
+def test_colapso_mantem_os_quantis_altos():
+    valores = [1.01 ** i for i in range(3000)]
+    limitado = _sketch(valores, max_buckets=200)
+    assert len(limitado.buckets) <= 200
+    ordenados = sorted(valores)
+    assert limitado.percentile(99) == pytest.approx(percentile(ordenados, 99), rel=0.02)
@@ -0,0 +1,36 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from soak import SoakTest
+
+
+class ApiLenta:
+    def __init__(self, demora):
+        self.demora = demora
+
+    def make_request(self, method, endpoint, data=None, params=None):
+        time.sleep(self.demora)
+        return {"status_code": 200}
+
+
+def test_latencia_conta_do_horario_agendado():
+    soak = SoakTest(ApiLenta(0.01), window=60)
+    soak._start = time.perf_counter()
+    soak._timed("health", soak._start - 0.1, "GET", "/health")
+    janela = soak.windows(soak.series["health"])[0]
+    assert janela["p50_ms"] >= 100
+
+
+def test_pool_cheio_descarta_e_nao_passa_da_duracao():
+    soak = SoakTest(ApiLenta(0.3), duration=0.5, rate=40, health_interval=10, max_in_flight=2)
+    inicio = time.perf_counter()
+    relatorio = soak.run()
+    # Sem fila: no máximo as duas requisições em andamento são esperadas depois do fim
+    assert time.perf_counter() - inicio < 0.5 + 0.3 + 0.2
+    serie = relatorio["series"]["memory_leak"]
+    assert serie["dropped"] > 0
+    assert serie["errors"] == serie["dropped"]
+    assert sum(janela["requests"] for janela in serie["windows"]) == serie["requests"]
@@ -0,0 +1,169 @@
+import json
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from standin_server import SEED_USERS, StandinAPI, StandinServer
+from transport import HTTPTransport
+
+INDEX_JS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "index.js")
+
+
+class SorteioFixo:
+    """Substitui o gerador da API: cada Math.random() devolve o próximo valor da lista"""
+
+    def __init__(self, *valores):
+        self.valores = list(valores)
+
+    def random(self):
+        return self.valores.pop(0)
+
+
+def _index_js():
+    with open(INDEX_JS, encoding="utf-8") as arquivo:
+        return arquivo.read()
+
+
+def _chamar(api, metodo, alvo, corpo=None, sorteios=()):
+    """Requisição em memória; devolve (status, JSON) com o Math.random() controlado"""
+    api.random = SorteioFixo(*sorteios)
+    dados = None if corpo is None else json.dumps(corpo).encode()
+    cabecalhos = {} if corpo is None else {"Content-Type": "application/json", "Content-Length": str(len(dados))}
+    status, _, _, resposta = api.handle(metodo, alvo, cabecalhos, dados)
+    assert api.random.valores == [], "sorteios a mais para a rota"
+    return status, json.loads(resposta) if resposta else None
+
+
+@pytest.fixture
+def api():
+    return StandinAPI(time_scale=0)
+
+
+def test_usuarios_iniciais_iguais_aos_do_index_js():
+    bloco = re.search(r"let users = \[(.*?)\n\]", _index_js(), re.S).group(1)
+    # Objetos literais do JavaScript viram JSON colocando as chaves entre aspas
+    usuarios = [json.loads(re.sub(r"([{,]\s*)(\w+):", r'\1"\2":', linha.strip().rstrip(",")))
+                for linha in bloco.strip().splitlines()]
+    assert usuarios == SEED_USERS
+    assert "let nextId = 13" in _index_js()
+
+
+def test_todas_as_rotas_do_index_js_existem(api):
+    rotas = re.findall(r'fastify\.(get|post|put|delete)\("([^"]+)"', _index_js())
+    assert len(rotas) == 9
+    corpo = {"name": "Novo", "email": "novo@email.com", "age": 30}
+    for metodo, rota in rotas:
+        alvo = rota.replace(":id", "1") + ("?delay=1" if rota == "/slow-endpoint" else "")
+        api.random = SorteioFixo(*[0.9] * 4)
+        dados = json.dumps(corpo).encode()
+        status, _, _, resposta = api.handle(metodo.upper(), alvo, {"Content-Type": "application/json"}, dados)
+        assert status != 404 and b"not found" not in resposta, f"{metodo.upper()} {rota}"
+    assert _chamar(api, "GET", "/nao-existe")[0] == 404
+
+
+def test_raiz_e_health(api):
+    assert _chamar(api, "GET", "/") == (200, {"message": "Cakto QA Evaluation API", "version": "1.0.0",
+                                              "endpoints": {"users": "/users", "health": "/health"}})
+    status, corpo = _chamar(api, "GET", "/health")
+    assert status == 200 and corpo["status"] == "OK"
+    assert re.match(r"^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z$", corpo["timestamp"])
+
+
+def test_listagem_paginada_ou_lista_pura(api):
+    status, corpo = _chamar(api, "GET", "/users?page=2&limit=5", sorteios=[0.5])
+    assert status == 200
+    assert [usuario["id"] for usuario in corpo["data"]] == [6, 7, 8, 9, 10]
+    assert corpo["pagination"] == {"page": 2, "limit": 5, "total": 12, "totalPages": 3}
+    # Math.random() > 0.8 devolve só o array, sem paginação
+    assert _chamar(api, "GET", "/users?page=2&limit=5", sorteios=[0.81])[1] == corpo["data"]
+    assert [u["id"] for u in _chamar(api, "GET", "/users", sorteios=[0.9])[1]] == list(range(1, 11))
+
+
+def test_listagem_filtra_por_status_e_busca(api):
+    inativos = _chamar(api, "GET", "/users?status=inactive", sorteios=[0.5])[1]
+    assert [usuario["id"] for usuario in inativos["data"]] == [3, 10]
+    busca = _chamar(api, "GET", "/users?search=MARIA", sorteios=[0.5])[1]
+    assert [usuario["id"] for usuario in busca["data"]] == [2, 6]
+    # parseInt("abc") é NaN: slice vazio e totalPages null
+    invalida = _chamar(api, "GET", "/users?limit=abc", sorteios=[0.5])[1]
+    assert invalida["data"] == [] and invalida["pagination"]["totalPages"] is None
+
+
+def test_busca_por_id(api):
+    assert _chamar(api, "GET", "/users/7") == (200, {"data": SEED_USERS[6]})
+    assert _chamar(api, "GET", "/users/7abc")[1]["data"]["id"] == 7
+    assert _chamar(api, "GET", "/users/abc") == (400, {"error": "Invalid user ID"})
+    assert _chamar(api, "GET", "/users/99", sorteios=[0.7]) == (404, {"error": "User not found"})
+    assert _chamar(api, "GET", "/users/99", sorteios=[0.71]) == (500, {"error": "Internal server error"})
+
+
+def test_criacao_com_as_validacoes_aleatorias(api):
+    sem_nome = {"email": "x@email.com"}
+    assert _chamar(api, "POST", "/users", sem_nome, sorteios=[0.31]) == (400, {"error": "Name is required"})
+    status, corpo = _chamar(api, "POST", "/users", sem_nome, sorteios=[0.3, 0.5])
+    assert (status, corpo["data"]["id"], corpo["data"]["name"], corpo["data"]["age"]) == (201, 13, "", None)
+
+    assert _chamar(api, "POST", "/users", {"name": "A"}) == (400, {"error": "Email is required"})
+    invalido = {"name": "A", "email": "sem-arroba"}
+    assert _chamar(api, "POST", "/users", invalido, sorteios=[0.41])[0] == 400
+    assert _chamar(api, "POST", "/users", invalido, sorteios=[0.4, 0.81])[0] == 200
+    repetido = {"name": "A", "email": "joao@email.com"}
+    assert _chamar(api, "POST", "/users", repetido, sorteios=[0.51]) == (409, {"error": "Email already exists"})
+    assert _chamar(api, "POST", "/users", repetido, sorteios=[0.5, 0.5])[1]["data"]["id"] == 15
+    idade_texto = {"name": "A", "email": "a@email.com", "age": "30"}
+    assert _chamar(api, "POST", "/users", idade_texto)[0] == 400
+
+
+def test_atualizacao_e_remocao(api):
+    assert _chamar(api, "PUT", "/users/99", {"name": "X"}) == (404, {"error": "User not found"})
+    status, corpo = _chamar(api, "PUT", "/users/1", {"name": "Novo Nome"}, sorteios=[0.1])
+    assert (status, corpo["data"]["name"], corpo["data"]["email"]) == (200, "Novo Nome", "joao@email.com")
+    # Math.random() <= 0.2 mantém o updatedAt antigo
+    assert corpo["data"]["updatedAt"] == SEED_USERS[0]["updatedAt"]
+    assert _chamar(api, "PUT", "/users/1", {"email": "ruim"}, sorteios=[0.5, 0.61])[0] == 400
+    assert _chamar(api, "PUT", "/users/1", {"email": "ruim"}, sorteios=[0.5, 0.6])[1]["data"]["email"] == "ruim"
+
+    assert _chamar(api, "DELETE", "/users/2", sorteios=[0.51]) == (204, None)
+    assert _chamar(api, "DELETE", "/users/3", sorteios=[0.5])[1]["data"]["id"] == 3
+    assert _chamar(api, "DELETE", "/users/2") == (404, {"error": "User not found"})
+
+
+def test_corpo_invalido_cai_no_error_handler(api):
+    api.random = SorteioFixo(0.71)
+    status, _, _, resposta = api.handle("POST", "/users", {"Content-Type": "application/json"}, b"{nome")
+    detalhes = json.loads(resposta)
+    assert status == 500 and detalhes["error"] == "Internal server error" and "stack" in detalhes
+
+
+def test_mesma_semente_mesmas_respostas_em_qualquer_ordem():
+    pedidos = [("GET", f"/users/{99 + i}") for i in range(10)] + [("GET", "/users")] * 5
+
+    def executar(ordem):
+        api = StandinAPI(seed=42, time_scale=0)
+        return {(indice, alvo): api.handle(metodo, alvo)[0]
+                for indice, (metodo, alvo) in ordem}
+
+    em_ordem = list(enumerate(pedidos))
+    # Mesma requisição repetida conta ocorrências, então a ordem entre requisições iguais é mantida
+    invertida = [par for par in reversed(em_ordem) if par[1][1] != "/users"] + \
+                [par for par in em_ordem if par[1][1] == "/users"]
+    assert executar(em_ordem) == executar(invertida)
+    assert {status for (_, alvo), status in executar(em_ordem).items() if alvo != "/users"} == {404, 500}
+
+
+def test_loopback_e_memoria_respondem_igual():
+    api = StandinAPI(seed=1, time_scale=0)
+    transporte = HTTPTransport(pool_size=1, timeout=2)
+    try:
+        na_memoria = transporte.request("GET", f"{api.mount('contrato')}/users/12")
+        with StandinServer(api) as servidor:
+            no_loopback = transporte.request("GET", f"{servidor.base_url}/users/12")
+    finally:
+        api.unmount("contrato")
+        transporte.close()
+    assert (na_memoria.status, na_memoria.body) == (no_loopback.status, no_loopback.body)
+    assert json.loads(no_loopback.body)["data"]["email"] == "invalid-email"
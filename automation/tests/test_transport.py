@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from conditional import ConditionalTransport
+from response_cache import CachingTransport, ResponseCache
+from standin_server import StandinAPI, StandinServer
+from transport import ConnectionPool, HTTPTransport, open_stream
+
+
+@pytest.fixture
+def servidor():
+    with StandinServer(StandinAPI(seed=1, time_scale=0)) as server:
+        yield server
+
+
+def test_pool_reaproveita_a_conexao_devolvida():
+    pool = ConnectionPool("http", "127.0.0.1", 1, max_size=2)
+    conexao, reaproveitada = pool.acquire()
+    assert not reaproveitada
+    pool.release(conexao)
+    assert pool.acquire() == (conexao, True)
+
+
+def test_pool_descarta_conexao_ociosa_vencida_ou_nao_reutilizavel():
+    pool = ConnectionPool("http", "127.0.0.1", 1, max_size=2, idle_timeout=0.01)
+    vencida, _ = pool.acquire()
+    pool.release(vencida)
+    time.sleep(0.05)
+    nova, reaproveitada = pool.acquire()
+    assert nova is not vencida and not reaproveitada
+    pool.release(nova, reusable=False)
+    assert pool.acquire()[0] is not nova
+
+
+def test_pool_cheio_espera_uma_vaga():
+    pool = ConnectionPool("http", "127.0.0.1", 1, max_size=1)
+    conexao, _ = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    pool.release(conexao)
+    assert pool.acquire(timeout=0.05)[0] is conexao
+
+
+def test_requisicoes_seguidas_usam_uma_conexao(servidor):
+    transporte = HTTPTransport(pool_size=4, timeout=2)
+    try:
+        respostas = [transporte.request("GET", f"{servidor.base_url}/health") for _ in range(5)]
+        assert all(resposta.status == 200 for resposta in respostas)
+        assert respostas[0].timings["connect"] > 0
+        assert all(resposta.timings["connect"] == 0 for resposta in respostas[1:])
+    finally:
+        transporte.close()
+
+
+def test_stream_fechado_sem_ler_devolve_a_conexao(servidor):
+    transporte = HTTPTransport(pool_size=1, timeout=2)
+    try:
+        for _ in range(3):
+            resposta = transporte.stream("GET", f"{servidor.base_url}/users")
+            resposta.close()
+        assert transporte.request("GET", f"{servidor.base_url}/health").status == 200
+    finally:
+        transporte.close()
+
+
+def test_stream_fechado_duas_vezes_libera_uma_vez(servidor):
+    transporte = HTTPTransport(pool_size=1, timeout=2)
+    try:
+        resposta = transporte.stream("GET", f"{servidor.base_url}/users")
+        assert resposta.read()
+        resposta.close()
+        resposta.close()
+        # Uma segunda liberação estouraria o BoundedSemaphore do pool
+        assert transporte.request("GET", f"{servidor.base_url}/health").status == 200
+    finally:
+        transporte.close()
+
+
+@pytest.mark.parametrize("envolver", [
+    lambda t: ConditionalTransport(t),
+    lambda t: CachingTransport(t, ResponseCache()),
+    lambda t: CachingTransport(ConditionalTransport(t), ResponseCache()),
+])
+def test_envoltorios_repassam_o_stream(servidor, envolver, capsys):
+    transporte = envolver(HTTPTransport(pool_size=1, timeout=2))
+    try:
+        resposta = open_stream(transporte, "GET", f"{servidor.base_url}/users")
+        # Corpo ainda não lido: num stream de verdade nenhum byte passou pela rede
+        assert resposta.wire_bytes == 0
+        assert resposta.read()
+        assert resposta.wire_bytes > 0
+        assert "stream()" not in capsys.readouterr().out
+    finally:
+        transporte.close()
@@ -0,0 +1,510 @@
+import http.client
+import re
+import socket
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+from deadlines import deadline_error, effective_timeout
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Codificações que o transporte sabe decodificar; br só com o pacote brotli instalado
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli else "gzip, deflate"
+
+_NUMERIC_SEGMENT = re.compile(r"/-?\d+(?=/|$)")
+
+
+def endpoint_label(method: str, path: str) -> str:
+    """Agrupa caminhos pela rota, ex.: GET /users/42?x=1 -> GET /users/:id"""
+    path = path.split("?", 1)[0] or "/"
+    return f"{method.upper()} {_NUMERIC_SEGMENT.sub('/:id', path)}"
+
+
+def header_value(headers: Optional[Dict[str, str]], name: str) -> Optional[str]:
+    """Valor de um cabeçalho ignorando maiúsculas/minúsculas no nome"""
+    name = name.lower()
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def decode_body(data: bytes, content_encoding: Optional[str]) -> bytes:
+    """Desfaz o Content-Encoding (gzip, deflate, br), na ordem inversa em que foi aplicado"""
+    if not data or not content_encoding:
+        return data
+    for encoding in reversed([e.strip().lower() for e in content_encoding.split(",")]):
+        if encoding in ("gzip", "x-gzip"):
+            data = zlib.decompress(data, 16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            # Há servidores que mandam deflate "cru", sem o cabeçalho zlib
+            try:
+                data = zlib.decompress(data)
+            except zlib.error:
+                data = zlib.decompress(data, -zlib.MAX_WBITS)
+        elif encoding == "br" and brotli:
+            data = brotli.decompress(data)
+        elif encoding not in ("identity", ""):
+            raise ValueError(f"Content-Encoding não suportado: {encoding}")
+    return data
+
+
+class Response:
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], body: bytes,
+                 timings: Dict[str, float] = None, wire_bytes: Optional[int] = None,
+                 revalidated: bool = False, from_cache: bool = False):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        # Corpo já decodificado (sem gzip/deflate/br)
+        self.body = body
+        # Tempo de cada fase em ms: dns, connect, tls (zero em conexão reaproveitada), ttfb e body
+        self.timings = timings or {}
+        # Bytes do corpo como vieram na rede (comprimidos, ou zero numa revalidação 304)
+        self.wire_bytes = len(body) if wire_bytes is None else wire_bytes
+        # True quando o corpo veio do armazenamento local depois de um 304 Not Modified
+        self.revalidated = revalidated
+        # True quando a resposta veio do cache sem requisição (ver response_cache.py)
+        self.from_cache = from_cache
+
+    @property
+    def body_bytes(self) -> int:
+        return len(self.body)
+
+
+class _IncrementalDecoder:
+    """Versão incremental de decode_body, para corpos lidos em pedaços"""
+
+    def __init__(self, content_encoding: Optional[str]):
+        self._stages = []
+        for encoding in reversed([e.strip().lower() for e in (content_encoding or "").split(",")]):
+            if encoding in ("gzip", "x-gzip"):
+                self._stages.append(zlib.decompressobj(16 + zlib.MAX_WBITS))
+            elif encoding == "deflate":
+                self._stages.append(None)  # zlib ou deflate cru: decidido no primeiro pedaço
+            elif encoding == "br" and brotli:
+                self._stages.append(brotli.Decompressor())
+            elif encoding not in ("identity", ""):
+                raise ValueError(f"Content-Encoding não suportado: {encoding}")
+
+    def decompress(self, data: bytes) -> bytes:
+        for index, stage in enumerate(self._stages):
+            if not data:
+                return data
+            if stage is None:
+                # Cabeçalho zlib: CMF com método 8 e (CMF * 256 + FLG) múltiplo de 31
+                wrapped = len(data) >= 2 and data[0] & 0x0F == 8 and (data[0] * 256 + data[1]) % 31 == 0
+                stage = self._stages[index] = zlib.decompressobj(zlib.MAX_WBITS if wrapped else -zlib.MAX_WBITS)
+            data = stage.process(data) if hasattr(stage, "process") else stage.decompress(data)
+        return data
+
+    def flush(self) -> bytes:
+        data = b""
+        for stage in self._stages:
+            if data:
+                data = stage.process(data) if hasattr(stage, "process") else stage.decompress(data)
+            if hasattr(stage, "flush"):
+                data += stage.flush()
+        return data
+
+
+def _split(data: bytes, size: int):
+    view = memoryview(data)
+    for start in range(0, len(data), size):
+        yield bytes(view[start:start + size])
+
+
+class StreamingResponse:
+    """Resposta com o corpo lido sob demanda, em pedaços já descomprimidos
+
+    Iterar iter_chunks() até o fim (ou chamar close()) libera a conexão: close()
+    sempre chama `release` (uma única vez), mesmo que o corpo nunca tenha sido
+    lido. wire_bytes e body_bytes crescem à medida que o corpo é lido e o tempo
+    de leitura vai para timings["body"].
+    """
+
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], chunks, timings: Dict[str, float] = None,
+                 wire_bytes: Optional[int] = None, release: Callable[[], None] = None):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.timings = dict({"body": 0.0}, **(timings or {}))
+        # Conhecido de antemão quando o corpo já foi baixado inteiro (ver open_stream)
+        self._count_wire = wire_bytes is None
+        self.wire_bytes = wire_bytes or 0
+        self.body_bytes = 0
+        self.revalidated = False
+        self.from_cache = False
+        # Chamado com o corpo inteiro (descomprimido) quando a leitura chega ao fim; definido,
+        # faz os pedaços ficarem guardados até lá (usado pelo cache para guardar o stream lido)
+        self.on_complete: Optional[Callable[[bytes], None]] = None
+        self._chunks = chunks
+        self._release = release
+        self._release_lock = threading.Lock()
+        self._decoder = _IncrementalDecoder(header_value(headers, "Content-Encoding"))
+
+    def iter_chunks(self):
+        parts = [] if self.on_complete is not None else None
+        try:
+            while True:
+                start = time.perf_counter()
+                raw = next(self._chunks, None)
+                data = self._decoder.decompress(raw) if raw is not None else self._decoder.flush()
+                self.timings["body"] += (time.perf_counter() - start) * 1000
+                if raw is not None and self._count_wire:
+                    self.wire_bytes += len(raw)
+                self.body_bytes += len(data)
+                if data:
+                    if parts is not None:
+                        parts.append(data)
+                    yield data
+                if raw is None:
+                    if parts is not None:
+                        self.on_complete(b"".join(parts))
+                    return
+        finally:
+            self.close()
+
+    def read(self) -> bytes:
+        return b"".join(self.iter_chunks())
+
+    def close(self):
+        close = getattr(self._chunks, "close", None)
+        if close:
+            close()
+        with self._release_lock:
+            release, self._release = self._release, None
+        if release:
+            release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def buffered_stream(response: Response) -> StreamingResponse:
+    """StreamingResponse sobre um corpo já baixado e decodificado (cache, fita, transportes sem stream())"""
+    streamed = StreamingResponse(response.status, response.reason,
+                                 {k: v for k, v in response.headers.items() if k.lower() != "content-encoding"},
+                                 iter((response.body,)), response.timings, response.wire_bytes)
+    streamed.revalidated = response.revalidated
+    streamed.from_cache = response.from_cache
+    return streamed
+
+
+_warned_without_stream = set()
+
+
+def open_stream(transport, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None,
+                timeout: Optional[float] = None) -> StreamingResponse:
+    """Abre a resposta em stream; um transporte sem stream() baixa o corpo inteiro (e isso é avisado)"""
+    if hasattr(transport, "stream"):
+        return transport.stream(method, url, body=body, headers=headers, timeout=timeout)
+    kind = type(transport).__name__
+    if kind not in _warned_without_stream:
+        _warned_without_stream.add(kind)
+        print(f"⚠️ {kind} não tem stream(): os corpos serão baixados inteiros antes de serem lidos")
+    return buffered_stream(transport.request(method, url, body=body, headers=headers, timeout=timeout))
+
+
+class _TimedConnectionMixin:
+    """Abre o socket medindo separadamente resolução DNS, conexão TCP e handshake TLS"""
+
+    connect_timings: Dict[str, float] = {}
+
+    def _open_socket(self):
+        start = time.perf_counter()
+        family, socktype, proto, _, address = socket.getaddrinfo(
+            self.host, self.port, 0, socket.SOCK_STREAM)[0]
+        resolved = time.perf_counter()
+        sock = socket.socket(family, socktype, proto)
+        try:
+            if self.timeout is not None:
+                sock.settimeout(self.timeout)
+            sock.connect(address)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except Exception:
+            sock.close()
+            raise
+        connected = time.perf_counter()
+        self.connect_timings = {
+            "dns": (resolved - start) * 1000,
+            "connect": (connected - resolved) * 1000,
+            "tls": 0.0
+        }
+        return sock
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, http.client.HTTPConnection):
+    def connect(self):
+        self.sock = self._open_socket()
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, http.client.HTTPSConnection):
+    def connect(self):
+        sock = self._open_socket()
+        start = time.perf_counter()
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+        self.connect_timings["tls"] = (time.perf_counter() - start) * 1000
+
+
+class ConnectionPool:
+    """Pool limitado de conexões HTTP/1.1 persistentes para um único host"""
+
+    def __init__(self, scheme: str, host: str, port: Optional[int], max_size: int = 10,
+                 idle_timeout: float = 30.0, timeout: Optional[float] = None):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def _new_connection(self):
+        if self.scheme == "https":
+            return TimedHTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return TimedHTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _evict_idle(self, now: float):
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            conn.close()
+
+    def acquire(self, timeout: Optional[float] = None):
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"Nenhuma conexão livre para {self.host} em {timeout:.3f}s")
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            if self._idle:
+                conn, _ = self._idle.pop()
+                return conn, True
+        return self._new_connection(), False
+
+    def release(self, conn, reusable: bool = True):
+        if reusable:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                conn.close()
+
+
+_mounted_apps: Dict[str, object] = {}
+
+
+def mount_app(name: str, app):
+    """Registra uma aplicação em processo, atendida pelas URLs memory://<name>
+
+    A aplicação precisa de um método handle(method, target, headers, body) que
+    devolva (status, reason, headers, body), como a StandinAPI.
+    """
+    _mounted_apps[name] = app
+
+
+def unmount_app(name: str):
+    _mounted_apps.pop(name, None)
+
+
+class HTTPTransport:
+    """Transporte HTTP compartilhado pelos testadores, com um pool keep-alive por host"""
+
+    def __init__(self, pool_size: int = 10, idle_timeout: float = 30.0, timeout: Optional[float] = None,
+                 accept_encoding: Optional[str] = ACCEPT_ENCODING):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        # Enviado como Accept-Encoding quando a requisição não traz um; None desliga a compressão
+        self.accept_encoding = accept_encoding
+        self._pools: Dict[Tuple[str, str, Optional[int]], ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def _pool_for(self, scheme: str, host: str, port: Optional[int]) -> ConnectionPool:
+        key = (scheme, host, port)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(scheme, host, port, self.pool_size, self.idle_timeout, self.timeout)
+                self._pools[key] = pool
+            return pool
+
+    def request(self, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None,
+                timeout: Optional[float] = None) -> Response:
+        """Envia a requisição; `timeout` (ou o do transporte) limita cada operação de socket
+
+        Dentro de um bloco deadlines.deadline(), os timeouts de socket também são
+        limitados ao tempo que resta do prazo, e a requisição é interrompida com
+        DeadlineExceeded quando ele acaba. Corpos comprimidos são decodificados;
+        Response.wire_bytes guarda o tamanho que trafegou.
+        """
+        timeout, parts, path, headers = self._prepare(url, headers, timeout)
+        if parts.scheme == "memory":
+            effective_timeout(timeout)
+            return self._request_app(parts.hostname, method, path, body, headers)
+
+        pool = self._pool_for(parts.scheme, parts.hostname, parts.port)
+        conn, response, timings = self._open(pool, method, path, body, headers, timeout)
+        try:
+            if conn.sock is not None:
+                conn.sock.settimeout(effective_timeout(timeout))
+            start = time.perf_counter()
+            raw = response.read()
+            data = decode_body(raw, response.getheader("Content-Encoding"))
+            timings["body"] = (time.perf_counter() - start) * 1000
+        except TimeoutError as e:
+            pool.release(conn, reusable=False)
+            raise deadline_error(e) from e
+        except Exception:
+            pool.release(conn, reusable=False)
+            raise
+
+        pool.release(conn, reusable=not response.will_close)
+        return Response(response.status, response.reason, dict(response.headers), data, timings, len(raw))
+
+    def stream(self, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None,
+               timeout: Optional[float] = None, chunk_size: int = 64 * 1024) -> "StreamingResponse":
+        """Como request(), mas devolve assim que chegam os cabeçalhos; o corpo é lido sob demanda
+
+        A conexão volta ao pool quando o corpo termina de ser lido (ou é
+        descartada se a resposta for fechada antes disso).
+        """
+        timeout, parts, path, headers = self._prepare(url, headers, timeout)
+        if parts.scheme == "memory":
+            effective_timeout(timeout)
+            response = self._request_app(parts.hostname, method, path, body, headers, decode=False)
+            return StreamingResponse(response.status, response.reason, response.headers,
+                                     _split(response.body, chunk_size), response.timings)
+
+        pool = self._pool_for(parts.scheme, parts.hostname, parts.port)
+        conn, response, timings = self._open(pool, method, path, body, headers, timeout)
+
+        completed = []
+
+        def chunks():
+            try:
+                while True:
+                    if conn.sock is not None:
+                        conn.sock.settimeout(effective_timeout(timeout))
+                    chunk = response.read(chunk_size)
+                    if not chunk:
+                        completed.append(True)
+                        return
+                    yield chunk
+            except TimeoutError as e:
+                raise deadline_error(e) from e
+
+        def release():
+            # Fora do gerador: um gerador nunca iniciado não roda o finally ao ser fechado
+            pool.release(conn, reusable=bool(completed) and not response.will_close)
+
+        return StreamingResponse(response.status, response.reason, dict(response.headers), chunks(), timings,
+                                 release=release)
+
+    def _prepare(self, url: str, headers: Optional[Dict[str, str]], timeout: Optional[float]):
+        timeout = self.timeout if timeout is None else timeout
+        if self.accept_encoding and header_value(headers, "Accept-Encoding") is None:
+            headers = dict(headers or {}, **{"Accept-Encoding": self.accept_encoding})
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https", "memory"):
+            raise ValueError(f"Esquema de URL não suportado: {parts.scheme}")
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+        return timeout, parts, path, headers
+
+    def _open(self, pool: ConnectionPool, method: str, path: str, body: Optional[bytes],
+              headers: Optional[Dict[str, str]], timeout: Optional[float]):
+        """Envia a requisição e espera os cabeçalhos da resposta; a conexão fica presa até o corpo ser lido"""
+        try:
+            conn, reused = pool.acquire(effective_timeout(timeout))
+        except TimeoutError as e:
+            raise deadline_error(e) from e
+        try:
+            try:
+                response, timings = self._send(conn, method, path, body, headers, timeout)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # O servidor fechou a conexão ociosa; tenta de novo numa conexão nova
+                conn.close()
+                conn = pool._new_connection()
+                response, timings = self._send(conn, method, path, body, headers, timeout)
+        except TimeoutError as e:
+            pool.release(conn, reusable=False)
+            raise deadline_error(e) from e
+        except Exception:
+            pool.release(conn, reusable=False)
+            raise
+        return conn, response, timings
+
+    @staticmethod
+    def _request_app(name: str, method: str, path: str, body: Optional[bytes],
+                     headers: Optional[Dict[str, str]], decode: bool = True) -> Response:
+        app = _mounted_apps.get(name)
+        if app is None:
+            raise ConnectionRefusedError(f"Nenhuma aplicação montada em memory://{name}")
+        start = time.perf_counter()
+        status, reason, response_headers, raw = app.handle(method, path, dict(headers or {}), body)
+        timings = {"dns": 0.0, "connect": 0.0, "tls": 0.0,
+                   "ttfb": (time.perf_counter() - start) * 1000, "body": 0.0}
+        if not decode:
+            return Response(status, reason, response_headers, raw, timings)
+        data = decode_body(raw, header_value(response_headers, "Content-Encoding"))
+        return Response(status, reason, response_headers, data, timings, len(raw))
+
+    @staticmethod
+    def _send(conn, method: str, path: str, body: Optional[bytes], headers: Optional[Dict[str, str]],
+              timeout: Optional[float] = None):
+        timings = {"dns": 0.0, "connect": 0.0, "tls": 0.0}
+        conn.timeout = effective_timeout(timeout)
+        if conn.sock is None:
+            conn.connect()
+            timings.update(conn.connect_timings)
+        else:
+            conn.sock.settimeout(conn.timeout)
+        conn.request(method, path, body=body, headers=headers or {})
+        # O tempo de espera pela resposta usa o que sobrou do prazo depois do envio
+        conn.sock.settimeout(effective_timeout(timeout))
+        sent = time.perf_counter()
+        response = conn.getresponse()
+        timings["ttfb"] = (time.perf_counter() - sent) * 1000
+        return response, timings
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+
+DEFAULT_TIMEOUT = 30.0
+# Comporta os testes simultâneos do plano mais as chamadas paralelas da varredura de atrasos
+DEFAULT_POOL_SIZE = 32
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport() -> HTTPTransport:
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HTTPTransport(pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT)
+        return _default_transport